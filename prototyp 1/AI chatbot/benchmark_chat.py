@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark chatovací smyčky na skriptovaných konverzacích, bez sítě
+
+Projde konverzace z konverzace.json přes ChatBot a pro každý tah změří
+počet volání LLM (round tripy), volání nástrojů a jejich latenci, tokeny
+a celkovou dobu tahu. Model podle režimu:
+
+    python benchmark_chat.py                                   # MistniModel
+    LLM_BACKEND=gemini python benchmark_chat.py --nahrat nahravka.jsonl
+    python benchmark_chat.py --nahravka nahravka.jsonl --opakovani 50
+    python benchmark_chat.py --nahravka nahravka.jsonl --zpozdeni --output chat.json
+
+Data jsou vždy lokální (GeoJSON -> SQLite v paměti), takže výsledky jdou
+porovnávat mezi commity. Výstup je JSON jako u ../databaze/benchmark.py.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+CHATBOT_DIR = Path(__file__).parent
+KONVERZACE = CHATBOT_DIR / "konverzace.json"
+
+
+def nacti_konverzace(cesta=KONVERZACE):
+    """Seznam {"nazev", "zpravy": [...]}"""
+    with open(cesta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def postav_kolekci(data):
+    """SQLite kolekce v paměti z GeoJSON adresáře"""
+    from geojson_loader import load_directory
+    from related import attach_related
+    from sqlite_store import SQLiteCollection
+
+    kolekce = SQLiteCollection(":memory:")
+    kolekce.insert_many(attach_related(load_directory(data, with_kategorie=True)))
+    return kolekce
+
+
+def rozbor_tahu(tah):
+    """Počty a doby volání LLM a nástrojů ze stromu spanů jednoho tahu"""
+    rozbor = {"llm_ms": [], "tool_ms": [], "prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+    zasobnik = list(tah.children)
+    while zasobnik:
+        s = zasobnik.pop()
+        if s.name == "llm.generate":
+            rozbor["llm_ms"].append(s.duration_ms)
+            rozbor["prompt_tokens"] += s.attributes.get("prompt_tokens", 0)
+            rozbor["output_tokens"] += s.attributes.get("output_tokens", 0)
+            rozbor["cached_tokens"] += s.attributes.get("cached_tokens", 0)
+        elif s.name.startswith("tool."):
+            rozbor["tool_ms"].append(s.duration_ms)
+        zasobnik.extend(s.children)
+    return rozbor
+
+
+def spust(konverzace, vytvor_llm, kolekce, opakovani=1, podrobne=False):
+    """
+    Projde konverzace opakovani-krát, každou s novým ChatBotem
+
+    Returns:
+        Seznam záznamů tahů {"konverzace", "turn_ms", "llm_ms", "tool_ms", tokeny, "error"}
+    """
+    from chat import ChatBot
+    from telemetry import span
+
+    tahy = []
+    for _ in range(opakovani):
+        for rozhovor in konverzace:
+            bot = ChatBot(kolekce, llm=vytvor_llm())
+            try:
+                for zprava in rozhovor["zpravy"]:
+                    vystup = contextlib.nullcontext() if podrobne else contextlib.redirect_stdout(io.StringIO())
+                    chyba = None
+                    with span("bench.turn") as tah:
+                        try:
+                            with vystup:
+                                bot.send_message(zprava)
+                        except Exception as e:
+                            chyba = f"{type(e).__name__}: {e}"
+                    zaznam = rozbor_tahu(tah)
+                    zaznam.update(konverzace=rozhovor["nazev"], turn_ms=tah.duration_ms, error=chyba)
+                    tahy.append(zaznam)
+                    if chyba:
+                        break  # zbytek konverzace by navazoval na chybějící odpověď
+            finally:
+                bot.close()
+    return tahy
+
+
+def _histogram(hodnoty):
+    from telemetry import Histogram
+
+    histogram = Histogram(size=max(len(hodnoty), 1))
+    for hodnota in hodnoty:
+        histogram.observe(hodnota)
+    return histogram.snapshot()
+
+
+def souhrn(tahy, doba_s):
+    """JSON souhrn: latence tahu, volání LLM a nástrojů, round tripy a tokeny na tah"""
+    uspesne = [t for t in tahy if not t["error"]]
+    pocet = len(uspesne) or 1
+    round_tripy = {}
+    for t in uspesne:
+        round_tripy[len(t["llm_ms"])] = round_tripy.get(len(t["llm_ms"]), 0) + 1
+
+    po_konverzacich = {}
+    for t in uspesne:
+        po_konverzacich.setdefault(t["konverzace"], []).append(t)
+
+    return {
+        "turns": len(tahy),
+        "errors": len(tahy) - len(uspesne),
+        "error_examples": sorted({t["error"] for t in tahy if t["error"]})[:5],
+        "turns_per_s": round(len(tahy) / doba_s, 1) if doba_s else 0.0,
+        "round_trips_per_turn": {
+            "mean": round(sum(len(t["llm_ms"]) for t in uspesne) / pocet, 2),
+            "distribution": dict(sorted(round_tripy.items())),
+        },
+        "tool_calls_per_turn": round(sum(len(t["tool_ms"]) for t in uspesne) / pocet, 2),
+        "tokens_per_turn": {
+            "prompt": round(sum(t["prompt_tokens"] for t in uspesne) / pocet, 1),
+            "output": round(sum(t["output_tokens"] for t in uspesne) / pocet, 1),
+            "cached": round(sum(t["cached_tokens"] for t in uspesne) / pocet, 1),
+        },
+        "latency": {
+            "turn": _histogram([t["turn_ms"] for t in uspesne]),
+            "llm_call": _histogram([ms for t in uspesne for ms in t["llm_ms"]]),
+            "tool_call": _histogram([ms for t in uspesne for ms in t["tool_ms"]]),
+        },
+        "conversations": {
+            nazev: {
+                "turns": len(t),
+                "mean_turn_ms": round(sum(x["turn_ms"] for x in t) / len(t), 3),
+                "round_trips": sum(len(x["llm_ms"]) for x in t),
+            }
+            for nazev, t in sorted(po_konverzacich.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--konverzace", default=str(KONVERZACE), help="JSON se skriptovanými konverzacemi")
+    parser.add_argument("--nahravka", help="Přehrát nahrávku (JSONL z --nahrat / LLM_RECORD)")
+    parser.add_argument("--zpozdeni", action="store_true", help="Při přehrávání čekat nahranou dobu volání")
+    parser.add_argument("--nahrat", help="Nahrát volání modelu podle LLM_BACKEND do JSONL souboru")
+    parser.add_argument("--opakovani", type=int, default=1, help="Kolikrát projít všechny konverzace")
+    parser.add_argument("--data", help="GeoJSON adresář (výchozí data HK)")
+    parser.add_argument("--podrobne", action="store_true", help="Vypisovat odpovědi chatbota")
+    parser.add_argument("--output", help="Zapsat JSON report do souboru")
+    args = parser.parse_args()
+
+    # Lokální úložiště - bez limitu Atlasu a bez připojení k síti
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+
+    import config  # noqa: F401 - přidá ../databaze do sys.path přes database
+    import database  # noqa: F401
+    from geojson_loader import DATA_DIRECTORY
+    from llm import MistniModel, vytvor_klienta
+    from replay import PrehravanyModel
+
+    if args.nahravka:
+        nahravka = PrehravanyModel(args.nahravka, zpozdeni=args.zpozdeni)
+        vytvor_llm, popis = (lambda: nahravka), f"replay:{args.nahravka}"
+    elif args.nahrat:
+        vytvor_llm, popis = (lambda: vytvor_klienta(nahravka=args.nahrat)), f"record:{config.LLM_BACKEND}"
+    else:
+        vytvor_llm, popis = MistniModel, "local"
+
+    data = args.data or DATA_DIRECTORY
+    kolekce = postav_kolekci(data)
+    konverzace = nacti_konverzace(args.konverzace)
+
+    print(f"⏱  {len(konverzace)} konverzací x{args.opakovani}, model {popis}...", file=sys.stderr)
+    zacatek = time.perf_counter()
+    tahy = spust(konverzace, vytvor_llm, kolekce, args.opakovani, args.podrobne)
+    doba_s = time.perf_counter() - zacatek
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "model": popis,
+            "conversations": len(konverzace),
+            "repeat": args.opakovani,
+            "data": str(data),
+            "documents": kolekce.count_documents({}),
+            "prefetch": config.PREFETCH_ENABLED,
+        },
+        "summary": souhrn(tahy, doba_s),
+    }
+    kolekce.close()
+
+    vystup = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(vystup + "\n")
+        print(f"✓ Report zapsán do {args.output}", file=sys.stderr)
+    else:
+        print(vystup)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,97 @@
 """
 Chat logika a zpracování zpráv
 """
-import json
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL
-from tools import get_tool
-from prompts import SYSTEMOVA_INSTRUKCE
-from database import hledej_mista_na_rande
+from config import OPRAVA_ARGUMENTU, PREFETCH_ENABLED
+from database import hledej_mista_na_rande, je_atlas, oprav_argumenty, souvisejici_mista
+from llm import vytvor_klienta
+from prefetch import Prefetcher
+from telemetry import metrics, span
+from serialization import dumps
+from throttle import RateLimited, SingleFlight, upstream
 
-# Konfigurace Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# Stejné dotazy z více konverzací najednou se do databáze pošlou jen jednou
+_dotazy = SingleFlight("db.coalesced")
 
 
 class ChatBot:
     """Chatbot pro doporučování míst na rande"""
     
-    def __init__(self, places_collection):
+    def __init__(self, places_collection, llm=None):
+        """
+        Args:
+            places_collection: Kolekce s místy
+            llm: Klient LLM s metodou generuj(historie) (výchozí podle LLM_BACKEND, viz llm.py)
+        """
         self.places_collection = places_collection
-        self.model = None
-        self.chat = None
-        self._init_model()
-    
-    def _init_model(self):
-        """Inicializace Gemini modelu"""
-        self.model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
-            tools=[get_tool()],
-            system_instruction=SYSTEMOVA_INSTRUKCE
-        )
-        self.chat = self.model.start_chat()
+        self.llm = llm or vytvor_klienta()
+        self.historie = []  # konverzace v neutrálním formátu llm.py
+        self.prefetcher = Prefetcher(places_collection) if PREFETCH_ENABLED else None
     
     def _execute_function(self, function_name, function_args):
         """Provedení databázové funkce"""
+        with span(f"tool.{function_name}") as s:
+            vysledek = self._spust_funkci(function_name, function_args, s)
+            s.set(pocet=vysledek.get("pocet", 0), uspech=vysledek.get("uspech", False))
+            return vysledek
+
+    def _spust_funkci(self, function_name, function_args, s):
         if function_name == "hledej_mista_na_rande":
-            return hledej_mista_na_rande(self.places_collection, **function_args)
+            if OPRAVA_ARGUMENTU:
+                # Překlep v názvu obce by jinak vrátil prázdný výsledek
+                function_args = oprav_argumenty(self.places_collection, function_args)
+            if self.prefetcher:
+                vysledek = self.prefetcher.vyhledej(function_args)
+                if vysledek is not None:
+                    print("⚡ Výsledek z předem načtené cache")
+                    s.set(z_cache=True)
+                    return vysledek
+
+            vysledek = self._dotaz(function_args)
+
+            # Pravděpodobné další dotazy se načtou na pozadí, zatímco LLM odpovídá
+            if self.prefetcher:
+                self.prefetcher.naplanuj(function_args, vysledek)
+            return vysledek
+        if function_name == "souvisejici_mista":
+            # Předpočítané seznamy - jedno čtení podle id, bez prefetch
+            if je_atlas(self.places_collection):
+                upstream("atlas").acquire()
+            return souvisejici_mista(self.places_collection, **function_args)
         return {"uspech": False, "chyba": "Neznámá funkce", "mista": []}
+
+    def _dotaz(self, function_args):
+        """Dotaz do databáze - sdílený se stejným právě běžícím dotazem, v rámci limitu Atlasu"""
+        # Přesné argumenty - zaokrouhlený klic_dotazu() je jen pro prefetch cache (ta se ořezává
+        # a plní maximem); sdílet výsledek smí jen dotaz se stejnými souřadnicemi i počtem
+        klic = dumps(dict(sorted(function_args.items())))
+
+        def proved():
+            if je_atlas(self.places_collection):
+                upstream("atlas").acquire()
+            return hledej_mista_na_rande(self.places_collection, **function_args)
+
+        vysledek, _ = _dotazy.do(klic, proved)
+        return vysledek
+
+    def _generuj(self, zprava):
+        """Jedno volání LLM (span 'llm.generate' s počty tokenů); zpráva i odpověď jdou do historie"""
+        self.historie.append(zprava)
+        with span("llm.generate") as s:
+            odpoved = self.llm.generuj(self.historie)
+            tokeny = odpoved["tokeny"]
+            vstupni, vystupni, z_cache = tokeny["vstup"], tokeny["vystup"], tokeny.get("z_cache", 0)
+            s.set(prompt_tokens=vstupni, output_tokens=vystupni, cached_tokens=z_cache)
+            metrics.increment("llm.tokens.prompt", vstupni)
+            metrics.increment("llm.tokens.output", vystupni)
+            metrics.increment("llm.tokens.cached", z_cache)
+
+        self.historie.append({"role": "model", "text": odpoved["text"], "volani": odpoved["volani"]})
+        return odpoved
+    
+    def close(self):
+        """Ukončení běžících dotazů na pozadí"""
+        if self.prefetcher:
+            self.prefetcher.close()
     
     def send_message(self, user_message):
         """
@@ -46,47 +103,46 @@ class ChatBot:
         Returns:
             None (výstup je vytištěn)
         """
+        with span("chat.turn") as tah:
+            try:
+                self._zpracuj_zpravu(user_message)
+            except RateLimited as e:
+                tah.set(omezeno=e.name)
+                print(f"\n⏳ Služba je teď přetížená, zkus to prosím za {max(1, round(e.retry_after))} s.\n")
+        self._vypis_casy(tah)
+
+    def _vypis_casy(self, tah):
+        """Rozpad doby odpovědi - LLM, databáze, formátování"""
+        casy = tah.breakdown()
+        tool_ms = sum(ms for nazev, ms in casy.items() if nazev.startswith("tool."))
+        print(
+            f"⏱️  Celkem {tah.duration_ms / 1000:.2f} s"
+            f" | LLM {casy.get('llm.generate', 0) / 1000:.2f} s"
+            f" | nástroje {tool_ms / 1000:.3f} s"
+            f" (databáze {casy.get('db.query', 0) / 1000:.3f} s,"
+            f" formátování {casy.get('db.format', 0) / 1000:.3f} s)\n"
+        )
+
+    def _zpracuj_zpravu(self, user_message):
         # Odeslání zprávy
-        response = self.chat.send_message(user_message)
-        
-        # Zpracování volání funkcí
-        while True:
-            if response.candidates[0].content.parts:
-                function_responses = []
-                has_function_calls = False
-                
-                for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'function_call') and part.function_call:
-                        has_function_calls = True
-                        function_call = part.function_call
-                        function_name = function_call.name
-                        function_args = dict(function_call.args)
-                        
-                        print(f"🔍 HLEDÁNÍ V DATABÁZI: {function_name}")
-                        print(f"📝 Parametry: {json.dumps(function_args, indent=2, ensure_ascii=False)}")
-                        
-                        # Provedení funkce
-                        function_result = self._execute_function(function_name, function_args)
-                        print(f"✅ Nalezeno {function_result.get('pocet', 0)} míst\n")
-                        
-                        # Přidání odpovědi funkce
-                        function_responses.append(
-                            genai.protos.Part(
-                                function_response=genai.protos.FunctionResponse(
-                                    name=function_name,
-                                    response={'result': function_result}
-                                )
-                            )
-                        )
-                
-                if has_function_calls and function_responses:
-                    # Odeslání výsledků funkcí zpět do LLM
-                    response = self.chat.send_message(genai.protos.Content(parts=function_responses))
-                else:
-                    # Textová odpověď
-                    for part in response.candidates[0].content.parts:
-                        if hasattr(part, 'text'):
-                            print(f"\n💬 ASISTENT: {part.text}\n")
-                    break
-            else:
-                break
+        odpoved = self._generuj({"role": "user", "text": user_message})
+
+        # Zpracování volání funkcí - výsledky jdou zpět do LLM, dokud neodpoví textem
+        while odpoved["volani"]:
+            vysledky = []
+            for volani in odpoved["volani"]:
+                function_name, function_args = volani["nazev"], dict(volani["args"])
+
+                print(f"🔍 HLEDÁNÍ V DATABÁZI: {function_name}")
+                print(f"📝 Parametry: {dumps(function_args).decode()}")
+
+                # Provedení funkce
+                function_result = self._execute_function(function_name, function_args)
+                print(f"✅ Nalezeno {function_result.get('pocet', 0)} míst\n")
+                vysledky.append({"nazev": function_name, "vysledek": function_result})
+
+            odpoved = self._generuj({"role": "user", "vysledky": vysledky})
+
+        # Textová odpověď
+        if odpoved["text"]:
+            print(f"\n💬 ASISTENT: {odpoved['text']}\n")
@@ -5,7 +5,8 @@ import os
 from dotenv import load_dotenv
 
 # Načtení prostředí z databáze
-env_path = os.path.join(os.path.dirname(__file__), '..', 'databaze', '.env')
+DATABAZE_DIR = os.path.join(os.path.dirname(__file__), '..', 'databaze')
+env_path = os.path.join(DATABAZE_DIR, '.env')
 load_dotenv(env_path)
 
 # API klíče
@@ -16,8 +17,42 @@ MONGODB_URI = os.getenv('MONGODB_URI')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'hackathon_hk')
 COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'places')
 
+# Úložiště: 'mongo' (Atlas) nebo 'sqlite' (lokální soubor, bez připojení k síti)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo').lower()
+
 # Model konfigurace
 GEMINI_MODEL = 'gemini-2.0-flash-exp'
 
 # Timeout konfigurace
 MONGODB_TIMEOUT = 10000  # ms
+
+# Spekulativní předběžné načítání (prefetch) dalších dotazů
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', '1') != '0'
+PREFETCH_TTL = 300  # s - jak dlouho platí předem načtené výsledky
+PREFETCH_WORKERS = 3
+PREFETCH_KATEGORIE = ["restaurace", "pivovary", "rozhledny"]
+
+# Oprava překlepů v argumentech region / hledany_text podle názvů v databázi (../databaze/suggest.py)
+OPRAVA_ARGUMENTU = os.getenv('OPRAVA_ARGUMENTU', '1') != '0'
+KONTROLA_VERZE_S = float(os.getenv('KONTROLA_VERZE_S', '60'))  # s - jak často zjišťovat nový import
+
+# Rozmanitost výsledků (rozmanitost.py): váha relevance proti rozmanitosti druhů a obcí (1 = vypnuto)
+ROZMANITOST_LAMBDA = float(os.getenv('ROZMANITOST_LAMBDA', '0.6'))
+
+# Klient LLM: 'gemini' nebo 'local' (deterministický responder nad databází, bez sítě)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini').lower()
+LLM_DEADLINE_S = float(os.getenv('LLM_DEADLINE_S', '30'))  # s - jedno volání včetně opakování
+LLM_RETRIES = int(os.getenv('LLM_RETRIES', '3'))
+LLM_BACKOFF_S = 0.5  # s - první pauza před opakováním, pak se zdvojnásobuje
+LLM_HEDGE_S = float(os.getenv('LLM_HEDGE_S', '0'))  # s - pak souběžně druhý požadavek (0 = vypnuto)
+LLM_FALLBACK = os.getenv('LLM_FALLBACK', '1') != '0'  # záloha MistniModel při výpadku
+
+# Systémová instrukce a schéma nástroje v kontextové cache Gemini (obnovuje se před expirací).
+# Vypnuto: dnešní prompt je pod minimem tokenů, které Gemini pro cache vyžaduje.
+LLM_CONTEXT_CACHE = os.getenv('LLM_CONTEXT_CACHE', '0') != '0'
+LLM_CONTEXT_CACHE_TTL_S = int(os.getenv('LLM_CONTEXT_CACHE_TTL_S', '3600'))
+LLM_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv('LLM_CONTEXT_CACHE_MIN_TOKENS', '4096'))
+
+# Nahrávání volání LLM do JSONL souboru a jeho přehrávání (LLM_BACKEND=replay), viz replay.py
+LLM_RECORD = os.getenv('LLM_RECORD')
+LLM_REPLAY = os.getenv('LLM_REPLAY')
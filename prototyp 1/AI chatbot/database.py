@@ -1,35 +1,59 @@
 """
-Databázové funkce pro MongoDB
+Databázové funkce pro MongoDB (nebo lokální SQLite)
 """
+import re
 import sys
-from pymongo import MongoClient
-from config import MONGODB_URI, DATABASE_NAME, COLLECTION_NAME, MONGODB_TIMEOUT
+import threading
+import time
+import weakref
+from config import DATABAZE_DIR, STORAGE_BACKEND, MONGODB_TIMEOUT, ROZMANITOST_LAMBDA, KONTROLA_VERZE_S
+from rozmanitost import vyber_rozmanite
+
+# Sdílená vrstva úložiště je v adresáři databaze
+sys.path.insert(0, DATABAZE_DIR)
+from storage import StorageError, connect  # noqa: E402
+from sqlite_store import SQLiteCollection  # noqa: E402
+from telemetry import metrics, span  # noqa: E402
+from throttle import upstream  # noqa: E402
+from suggest import SuggestIndex  # noqa: E402
+from corridor import corridor_position, corridor_query, normalize_route, route_length_m  # noqa: E402
+from related import COMPLEMENTS, SIMILAR  # noqa: E402
+from schema import RELATED_PROJECTION  # noqa: E402
+from geojson_loader import DEFAULT_KATEGORIE, SOURCE_PREFIX  # noqa: E402
+from versions import META_COLLECTION, current_version  # noqa: E402
 
 
 class Database:
-    """Správce MongoDB připojení"""
+    """Správce připojení k úložišti míst (MongoDB Atlas nebo SQLite)"""
     
-    def __init__(self):
+    def __init__(self, backend=STORAGE_BACKEND, vypis=True):
+        """
+        Args:
+            backend: 'mongo' nebo 'sqlite'
+            vypis: Vypsat úspěšné připojení (chyby se vypisují vždy)
+        """
+        self.backend = backend
+        self.vypis = vypis
         self.client = None
-        self.db = None
         self.collection = None
         self._connect()
     
     def _connect(self):
-        """Připojení k MongoDB"""
-        if not MONGODB_URI:
-            print("CHYBA: MONGODB_URI nenalezeno v .env souboru!")
+        """Připojení k úložišti"""
+        try:
+            self.client, self.collection = connect(self.backend, timeout_ms=MONGODB_TIMEOUT)
+        except StorageError as e:
+            print(f"✗ Připojení k databázi selhalo: {e}")
+            if self.backend == "mongo":
+                print("  Tip: STORAGE_BACKEND=sqlite spustí chatbota nad lokálními daty")
             sys.exit(1)
         
-        try:
-            self.client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=MONGODB_TIMEOUT)
-            self.client.admin.command('ping')
-            self.db = self.client[DATABASE_NAME]
-            self.collection = self.db[COLLECTION_NAME]
+        if not self.vypis:
+            return
+        if self.backend == "sqlite":
+            print("✓ Připojeno k lokální SQLite databázi")
+        else:
             print("✓ Připojeno k MongoDB Atlas")
-        except Exception as e:
-            print(f"✗ Připojení k MongoDB selhalo: {e}")
-            sys.exit(1)
     
     def get_collection(self):
         """Vrací MongoDB kolekci"""
@@ -45,6 +69,372 @@ class Database:
             self.client.close()
 
 
+# Tematické skupiny kategorií (AI tagy v poli "kategorie")
+ROMANTICKE_KATEGORIE = [
+    "romantické", "hrad", "zámek", "rozhledna", "výhled",
+    "příroda", "park", "zahrada", "lázně", "wellness",
+    "pivovar", "restaurace", "galerie", "museum", "klidné"
+]
+VENKOVNI_KATEGORIE = [
+    "venkovní", "příroda", "park", "rozhledna",
+    "koupání", "sport", "aktivní", "turistika", "golf"
+]
+KULTURNI_KATEGORIE = [
+    "kulturní", "museum", "galerie", "divadlo", "kino",
+    "hrad", "zámek", "církevní", "historické", "památka"
+]
+WELLNESS_KATEGORIE = [
+    "lázně", "wellness", "relaxace", "klidné", "koupání"
+]
+
+# Mapování uživatelských dotazů na AI kategorie
+KATEGORIE_MAPPING = {
+    "hrady": ["hrad"],
+    "hrad": ["hrad"],
+    "zámky": ["zámek"],
+    "zámek": ["zámek"],
+    "lázně": ["lázně", "wellness"],
+    "koupaliště": ["koupání", "aquapark", "bazén"],
+    "koupání": ["koupání", "aquapark", "bazén"],
+    "letní koupání": ["koupání", "aquapark", "bazén"],
+    "muzea": ["museum"],
+    "museum": ["museum"],
+    "pivovary": ["pivovar"],
+    "pivovar": ["pivovar"],
+    "restaurace": ["restaurace"],
+    "zoo": ["zoo"],
+    "příroda": ["příroda"],
+    "rozhledny": ["rozhledna"],
+    "rozhledna": ["rozhledna"],
+    "divadla": ["divadlo"],
+    "divadlo": ["divadlo"],
+    "galerie": ["galerie"],
+    "kina": ["kino"]
+}
+
+# Pole vracená vyhledáváním - celé dokumenty (geometrie, detail) se nepřenáší
+VRACENA_POLE = {
+    "_id": 0,
+    "nazev": 1,
+    "dp_id": 1,
+    "source_file": 1,
+    "source_files": 1,
+    "kategorie": 1,
+    "nazev_okresu": 1,
+    "nazev_obce": 1,
+    "nazev_ulice": 1,
+    "www": 1,
+    "bezbarierovost": 1,
+    "kapacita": "$atributy.kapacita",
+    "typ_muzea": "$detail.typ_muzea",
+    "zamereni_muzea": "$detail.zamereni_muzea",
+    "souradnice": "$location.coordinates",
+    "popis": {"$substrCP": ["$popis", 0, 300]},
+    "vzdalenost_m": 1
+}
+
+VYCHOZI_VZDALENOST_KM = 20  # Výchozí okruh pro rande
+VYCHOZI_SIRKA_KORIDORU_KM = 5  # Jak daleko od trasy smí být zastávka
+MAX_KANDIDATU_TRASY = 1000  # Místa v koridoru, ze kterých se vybírají zastávky
+KANDIDATU_ROZMANITOSTI = 100  # Kandidáti pro rozmanitý výběr (nezávisle na počtu výsledků)
+POLOMER_ZEME_M = 6378100
+
+
+# Index názvů pro opravu překlepů - jeden na kolekci (zaniká s ní), sestaví se při prvním
+# použití a znovu po novém importu (verze katalogu se zjišťuje po KONTROLA_VERZE_S sekundách)
+_indexy_nazvu = weakref.WeakKeyDictionary()
+_indexy_lock = threading.Lock()
+
+
+def je_atlas(places_collection):
+    """
+    Kolekce v MongoDB Atlas (čerpá z limitu 'atlas'), ne lokální SQLite
+
+    Podle kolekce samotné, ne podle STORAGE_BACKEND - Database(backend=...)
+    i benchmark mohou úložiště zvolit jinak než prostředí.
+    """
+    return not isinstance(places_collection, SQLiteCollection)
+
+
+def verze_katalogu(places_collection):
+    """Verze katalogu z importu (../databaze/versions.py), 0 = importováno bez verzí"""
+    if je_atlas(places_collection):
+        upstream("atlas").acquire()
+        return current_version(places_collection.database[META_COLLECTION])
+    # SQLite se vždy staví celá znovu - všechna místa mají verzi sestavení
+    misto = places_collection.find_one({}, {"_id": 0, "version": 1})
+    return (misto or {}).get("version", 0)
+
+
+def index_nazvu(places_collection):
+    """SuggestIndex nad názvy míst, obcí a okresů v kolekci"""
+    with _indexy_lock:
+        index, verze, zkontrolovano = _indexy_nazvu.get(places_collection, (None, None, 0.0))
+        if index is not None and time.monotonic() - zkontrolovano <= KONTROLA_VERZE_S:
+            return index
+
+        aktualni = verze_katalogu(places_collection)
+        if index is None or aktualni != verze:
+            with span("db.suggest_index"):
+                if je_atlas(places_collection):
+                    upstream("atlas").acquire()
+                index = SuggestIndex(places_collection.find(
+                    {}, {"_id": 0, "dp_id": 1, "nazev": 1, "nazev_obce": 1, "nazev_okresu": 1}
+                ))
+        _indexy_nazvu[places_collection] = (index, aktualni, time.monotonic())
+        return index
+
+
+def oprav_argumenty(places_collection, function_args):
+    """
+    Argumenty nástroje s opravenými překlepy v regionu a hledaném textu
+
+    'Trutnova' -> 'Trutnov', 'Jicin' -> 'Jičín', 'pivovr' -> 'Pivovar'. Region,
+    který je částí názvu okresu nebo obce, i známá slova zůstávají beze změny.
+
+    Returns:
+        Nový slovník argumentů (původní se nemění)
+    """
+    index = index_nazvu(places_collection)
+    opravene = dict(function_args)
+    for pole, oprava in (("region", index.resolve_area), ("hledany_text", index.resolve_text)):
+        hodnota = function_args.get(pole)
+        nova = oprava(hodnota) if hodnota else None
+        if nova and nova != hodnota:
+            print(f"🔤 {pole}: '{hodnota}' -> '{nova}'")
+            metrics.increment(f"tool.args.corrected.{pole}")
+            opravene[pole] = nova
+    return opravene
+
+
+def _filtr_regionu(region):
+    """Filtr podle okresu, obce nebo ORP"""
+    vzor = {"$regex": re.escape(region), "$options": "i"}
+    return {
+        "$or": [
+            {"nazev_okresu": vzor},
+            {"nazev_obce": vzor},
+            {"nazev_orp": vzor}
+        ]
+    }
+
+
+def _filtr_kategorie(kategorie):
+    """
+    Filtr podle kategorie
+
+    Kromě AI tagů v poli "kategorie" se hledá i podle zdrojových souborů
+    (dřívější záložní dotaz) - vše v jednom dotazu. Sloučené místo (např. hrad
+    z Hrady i Národní kulturní památky) má všechny soubory v "source_files".
+    Obě větve jsou přesné $in, takže je zodpoví index.
+    """
+    kategorie_lower = kategorie.lower().strip()
+    ai_kategorie = KATEGORIE_MAPPING.get(kategorie_lower, [kategorie_lower])
+    soubory = soubory_kategorie(kategorie)
+    if not soubory:
+        return {"kategorie": {"$in": ai_kategorie}}
+    return {
+        "$or": [
+            {"kategorie": {"$in": ai_kategorie}},
+            {"source_files": {"$in": soubory}}
+        ]
+    }
+
+
+def soubory_kategorie(kategorie):
+    """
+    Zdrojové soubory kategorie ('rozhledny' -> data_hk_rande/Rozhledny a výhlídky.geojson)
+
+    Název souboru musí kategorií začínat celými slovy, 'hrady' tedy nenajde
+    Botanické zahrady a arboreta.
+    """
+    hledany = kategorie.strip().casefold()
+    if not hledany:
+        return []
+    return [
+        f"{SOURCE_PREFIX}/{nazev}.geojson" for nazev in DEFAULT_KATEGORIE
+        if nazev.casefold() == hledany or nazev.casefold().startswith(hledany + " ")
+    ]
+
+
+def hledane_stitky(typ_dotazu, kategorie=None, romanticky=False, venkovni=False, kulturni=False, wellness=False):
+    """Štítky, které dotaz hledá (tématem nebo kategorií) - pro relevanci rozmanitého výběru"""
+    stitky = []
+    if romanticky or typ_dotazu == "romantic":
+        stitky += ROMANTICKE_KATEGORIE
+    elif venkovni:
+        stitky += VENKOVNI_KATEGORIE
+    elif kulturni:
+        stitky += KULTURNI_KATEGORIE
+    elif wellness:
+        stitky += WELLNESS_KATEGORIE
+    if kategorie:
+        kategorie_lower = kategorie.lower().strip()
+        stitky += KATEGORIE_MAPPING.get(kategorie_lower, [kategorie_lower])
+    return stitky
+
+
+def trasa_dotazu(typ_dotazu, sirka=None, delka=None, cil_sirka=None, cil_delka=None, trasa=None):
+    """
+    Trasa [[délka, šířka], ...] pro typ_dotazu 'route'
+
+    Bere body trasy, jinak úsečku start (sirka, delka) -> cíl (cil_sirka,
+    cil_delka). None, když to není dotaz na trasu nebo chybí body.
+    """
+    if typ_dotazu != "route":
+        return None
+    if not trasa and None not in (sirka, delka, cil_sirka, cil_delka):
+        trasa = [[delka, sirka], [cil_delka, cil_sirka]]
+    body = normalize_route(trasa)
+    return body if len(body) >= 2 else None
+
+
+def _zastavky(mista, delka_trasy_m, pocet):
+    """
+    Zastávky rozložené podél trasy
+
+    Trasa se rozdělí na pocet úseků, z každého se vezme místo nejblíž
+    trase a volná místa doplní další nejbližší. Výsledek je seřazený od
+    startu k cíli.
+    """
+    useky = {}
+    for doc in mista:
+        usek = min(int(doc["na_trase_m"] / delka_trasy_m * pocet), pocet - 1) if delka_trasy_m else 0
+        if usek not in useky or doc["od_trasy_m"] < useky[usek]["od_trasy_m"]:
+            useky[usek] = doc
+    vybrane = list(useky.values())
+    vybrana_id = {id(doc) for doc in vybrane}
+    zbytek = sorted((doc for doc in mista if id(doc) not in vybrana_id), key=lambda doc: doc["od_trasy_m"])
+    vybrane += zbytek[:max(0, pocet - len(vybrane))]
+    return sorted(vybrane, key=lambda doc: doc["na_trase_m"])
+
+
+def zastavky_na_trase(vysledky, trasa, sirka_m, pocet):
+    """Místa z koridoru do sirka_m od trasy (přesně), rozložená podél ní"""
+    mista = []
+    for doc in vysledky:
+        if not doc.get("souradnice"):
+            continue
+        od_trasy, na_trase = corridor_position(trasa, doc["souradnice"])
+        # Polygony koridoru jsou o kousek větší než koridor - rohy se tu zahodí
+        if od_trasy <= sirka_m:
+            mista.append(dict(doc, od_trasy_m=od_trasy, na_trase_m=na_trase))
+    return _zastavky(mista, route_length_m(trasa), pocet)
+
+
+def sestav_pipeline(
+    typ_dotazu: str,
+    hledany_text: str = None,
+    kategorie: str = None,
+    region: str = None,
+    sirka: float = None,
+    delka: float = None,
+    max_vzdalenost_km: float = None,
+    pocet_vysledku: int = 5,
+    romanticky: bool = False,
+    venkovni: bool = False,
+    kulturni: bool = False,
+    wellness: bool = False,
+    bezbarierove: bool = False,
+    castecne_bezbarierove: bool = False,
+    min_kapacita: int = None,
+    cil_sirka: float = None,
+    cil_delka: float = None,
+    trasa: list = None
+):
+    """
+    Sestaví agregační pipeline pro hledej_mista_na_rande
+
+    Poloha, kategorie, téma i region se kombinují (AND). Se souřadnicemi je
+    prvním krokem $geoNear (výsledky seřazené podle vzdálenosti), jinak $match.
+    Dotaz na trasu ('route') hledá $geoWithin v koridoru kolem každého úseku
+    trasy a vrací kandidáty pro zastavky_na_trase.
+
+    Returns:
+        (pipeline, filtr) - filtr je použitá podmínka na dokumenty
+    """
+    podminky = []
+
+    # Tematické skupiny (romantická, venkovní, kulturní, wellness místa)
+    if romanticky or typ_dotazu == "romantic":
+        podminky.append({"kategorie": {"$in": ROMANTICKE_KATEGORIE}})
+    elif venkovni:
+        podminky.append({"kategorie": {"$in": VENKOVNI_KATEGORIE}})
+    elif kulturni:
+        podminky.append({"kategorie": {"$in": KULTURNI_KATEGORIE}})
+    elif wellness:
+        podminky.append({"kategorie": {"$in": WELLNESS_KATEGORIE}})
+
+    # Textové vyhledávání
+    textove = typ_dotazu == "text_search" and bool(hledany_text)
+    if textove:
+        podminky.append({"$text": {"$search": hledany_text}})
+
+    # Specifické místo
+    if typ_dotazu == "specific_place" and hledany_text:
+        podminky.append({
+            "$or": [
+                {"nazev": {"$regex": re.escape(hledany_text), "$options": "i"}},
+                {"dp_id": hledany_text},
+                {"merged_ids": hledany_text}
+            ]
+        })
+
+    # Kategorie jde kombinovat s polohou i regionem
+    if kategorie:
+        podminky.append(_filtr_kategorie(kategorie))
+
+    # Filtr podle regionu
+    if region:
+        podminky.append(_filtr_regionu(region))
+
+    # Typované atributy (schema.ATTRIBUTE_TYPES) - v MongoDB indexy, v SQLite bitmapy
+    if bezbarierove:
+        hodnoty = ["ano", "částečně"] if castecne_bezbarierove else ["ano"]
+        podminky.append({"atributy.bezbarierovost": {"$in": hodnoty}})
+    if min_kapacita:
+        podminky.append({"atributy.kapacita": {"$gte": int(min_kapacita)}})
+
+    # Koridor kolem trasy - max_vzdalenost_km je pak vzdálenost od trasy
+    koridor = trasa_dotazu(typ_dotazu, sirka, delka, cil_sirka, cil_delka, trasa)
+    if koridor:
+        podminky.append(corridor_query(koridor, (max_vzdalenost_km or VYCHOZI_SIRKA_KORIDORU_KM) * 1000))
+
+    pouzij_polohu = koridor is None and sirka is not None and delka is not None
+    max_vzdalenost_m = (max_vzdalenost_km or VYCHOZI_VZDALENOST_KM) * 1000
+
+    # $text nelze spojit s $geoNear - poloha pak jen jako okruh bez řazení
+    if pouzij_polohu and textove:
+        podminky.append({"location": {"$geoWithin": {
+            "$centerSphere": [[delka, sirka], max_vzdalenost_m / POLOMER_ZEME_M]
+        }}})
+
+    filtr = {}
+    if len(podminky) == 1:
+        filtr = podminky[0]
+    elif podminky:
+        filtr = {"$and": podminky}
+
+    if pouzij_polohu and not textove:
+        # Geolokační vyhledávání - filtr se vyhodnotí přímo v $geoNear
+        pipeline = [{
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [delka, sirka]},
+                "distanceField": "vzdalenost_m",
+                "maxDistance": max_vzdalenost_m,
+                "query": filtr,
+                "key": "location",
+                "spherical": True
+            }
+        }]
+    else:
+        pipeline = [{"$match": filtr}]
+
+    pipeline.append({"$limit": MAX_KANDIDATU_TRASY if koridor else pocet_vysledku})
+    pipeline.append({"$project": VRACENA_POLE})
+    return pipeline, filtr
+
+
 def hledej_mista_na_rande(
     places_collection,
     typ_dotazu: str,
@@ -58,202 +448,115 @@ def hledej_mista_na_rande(
     romanticky: bool = False,
     venkovni: bool = False,
     kulturni: bool = False,
-    wellness: bool = False
+    wellness: bool = False,
+    bezbarierove: bool = False,
+    castecne_bezbarierove: bool = False,
+    min_kapacita: int = None,
+    cil_sirka: float = None,
+    cil_delka: float = None,
+    trasa: list = None
 ):
     """
     Hledá místa vhodná na rande v Královéhradeckém kraji.
     
+    Celé vyhledávání je jedna agregace (jeden dotaz do databáze), která
+    vrací jen potřebná pole a při zadané poloze řadí podle vzdálenosti.
+    
     Args:
         places_collection: MongoDB kolekce s místy
-        typ_dotazu: Typ dotazu - "text_search", "category", "geospatial", "romantic", "all"
+        typ_dotazu: Typ dotazu - "text_search", "category", "geospatial", "route", "romantic", "all"
         hledany_text: Text k vyhledání v názvech a popisech míst
         kategorie: Filtr podle kategorie (Restaurace, Hrady, Pivovary, Muzea, atd.)
         region: Filtr podle regionu (okres, obec)
-        sirka: Zeměpisná šířka pro vyhledávání podle polohy
-        delka: Zeměpisná délka pro vyhledávání podle polohy
-        max_vzdalenost_km: Maximální vzdálenost v kilometrech
+        sirka: Zeměpisná šířka pro vyhledávání podle polohy (u trasy start)
+        delka: Zeměpisná délka pro vyhledávání podle polohy (u trasy start)
+        max_vzdalenost_km: Maximální vzdálenost v kilometrech (výchozí 20, od trasy 5)
         pocet_vysledku: Maximální počet výsledků (výchozí 5, max 20)
         romanticky: Hledat romantická místa (restaurace, hrady, rozhledny, příroda)
         venkovni: Hledat venkovní aktivity
         kulturni: Hledat kulturní místa (muzea, divadla, galerie)
+        wellness: Hledat wellness a relaxaci
+        bezbarierove: Jen bezbariérově přístupná místa
+        castecne_bezbarierove: S bezbarierove i částečně bezbariérová místa
+        min_kapacita: Minimální kapacita sálu (divadla, kina, kluby)
+        cil_sirka: Zeměpisná šířka cíle trasy
+        cil_delka: Zeměpisná délka cíle trasy
+        trasa: Body trasy [[délka, šířka], ...] místo úsečky start -> cíl
     
     Returns:
         Seznam míst vhodných na rande s detaily
     """
     
     try:
-        pocet_vysledku = min(pocet_vysledku, 20)
-        query = {}
+        pocet_vysledku = int(min(pocet_vysledku or 5, 20))
+        koridor = trasa_dotazu(typ_dotazu, sirka, delka, cil_sirka, cil_delka, trasa)
+        # Z víc kandidátů se vybírají různé druhy míst v různých obcích (rozmanitost.py)
+        rozmanite = (ROZMANITOST_LAMBDA < 1 and pocet_vysledku > 1 and koridor is None
+                     and typ_dotazu != "specific_place")
+        pipeline, query = sestav_pipeline(
+            typ_dotazu, hledany_text, kategorie, region, sirka, delka,
+            max_vzdalenost_km, KANDIDATU_ROZMANITOSTI if rozmanite else pocet_vysledku,
+            romanticky, venkovni, kulturni, wellness,
+            bezbarierove, castecne_bezbarierove, min_kapacita, cil_sirka, cil_delka, trasa
+        )
         
-        # Romantická místa - kombinace vhodných kategorií
-        if romanticky or typ_dotazu == "romantic":
-            romantic_categories = [
-                "romantické", "hrad", "zámek", "rozhledna", "výhled",
-                "příroda", "park", "zahrada", "lázně", "wellness",
-                "pivovar", "restaurace", "galerie", "museum", "klidné"
-            ]
-            query["kategorie"] = {"$in": romantic_categories}
+        # Provedení dotazu
+        with span("db.query", typ_dotazu=typ_dotazu) as s:
+            vysledky = list(places_collection.aggregate(pipeline))
+            s.set(vysledku=len(vysledky))
         
-        # Venkovní aktivity
-        elif venkovni:
-            outdoor_categories = [
-                "venkovní", "příroda", "park", "rozhledna",
-                "koupání", "sport", "aktivní", "turistika", "golf"
-            ]
-            query["kategorie"] = {"$in": outdoor_categories}
+        if rozmanite:
+            with span("db.diversity", kandidatu=len(vysledky)):
+                vysledky = vyber_rozmanite(
+                    vysledky, pocet_vysledku, ROZMANITOST_LAMBDA,
+                    hledane_stitky(typ_dotazu, kategorie, romanticky, venkovni, kulturni, wellness)
+                )
         
-        # Kulturní místa
-        elif kulturni:
-            cultural_categories = [
-                "kulturní", "museum", "galerie", "divadlo", "kino",
-                "hrad", "zámek", "církevní", "historické", "památka"
-            ]
-            query["kategorie"] = {"$in": cultural_categories}
-        
-        # Wellness a relaxace
-        elif wellness:
-            wellness_categories = [
-                "lázně", "wellness", "relaxace", "klidné", "koupání"
-            ]
-            query["kategorie"] = {"$in": wellness_categories}
+        if koridor:
+            sirka_koridoru_km = max_vzdalenost_km or VYCHOZI_SIRKA_KORIDORU_KM
+            with span("db.corridor", kandidatu=len(vysledky)):
+                vysledky = zastavky_na_trase(vysledky, koridor, sirka_koridoru_km * 1000, pocet_vysledku)
+            # Polygony koridoru by zbytečně nafoukly odpověď pro LLM
+            query = f"koridor {sirka_koridoru_km} km kolem trasy {koridor}"
         
-        # Textové vyhledávání
-        elif typ_dotazu == "text_search" and hledany_text:
-            query["$text"] = {"$search": hledany_text}
-        
-        # Vyhledávání podle kategorie
-        elif typ_dotazu == "category" and kategorie:
-            # Mapování uživatelských dotazů na AI kategorie
-            kategorie_lower = kategorie.lower()
-            
-            kategorie_mapping = {
-                "hrady": ["hrad"],
-                "hrad": ["hrad"],
-                "zámky": ["zámek"],
-                "zámek": ["zámek"],
-                "lázně": ["lázně", "wellness"],
-                "koupaliště": ["koupání", "aquapark", "bazén"],
-                "koupání": ["koupání", "aquapark", "bazén"],
-                "letní koupání": ["koupání", "aquapark", "bazén"],
-                "muzea": ["museum"],
-                "museum": ["museum"],
-                "pivovary": ["pivovar"],
-                "pivovar": ["pivovar"],
-                "restaurace": ["restaurace"],
-                "zoo": ["zoo"],
-                "příroda": ["příroda"],
-                "rozhledny": ["rozhledna"],
-                "rozhledna": ["rozhledna"],
-                "divadla": ["divadlo"],
-                "divadlo": ["divadlo"],
-                "galerie": ["galerie"],
-                "kina": ["kino"]
-            }
-            
-            # Pokud je kategorie v mappingu, použij seznam
-            if kategorie_lower in kategorie_mapping:
-                query["kategorie"] = {"$in": kategorie_mapping[kategorie_lower]}
-            else:
-                # Jinak hledej přímou shodu v kategoriích
-                query["kategorie"] = kategorie_lower
-        
-        # Geolokační vyhledávání
-        elif typ_dotazu == "geospatial" and sirka and delka:
-            if not max_vzdalenost_km:
-                max_vzdalenost_km = 20  # Výchozí 20km pro rande
-            
-            query["geometry"] = {
-                "$near": {
-                    "$geometry": {
-                        "type": "Point",
-                        "coordinates": [delka, sirka]
-                    },
-                    "$maxDistance": max_vzdalenost_km * 1000
+        # Formátování výsledků
+        with span("db.format"):
+            formatovana_mista = []
+            for doc in vysledky:
+                misto = {
+                    "nazev": doc.get("nazev", "Neznámé"),
+                    "id": doc.get("dp_id", "N/A"),
+                    "kategorie": ", ".join(
+                        f.split("/")[-1].replace(".geojson", "")
+                        for f in doc.get("source_files") or [doc.get("source_file", "N/A")]
+                    ),
+                    "okres": doc.get("nazev_okresu", "N/A"),
+                    "obec": doc.get("nazev_obce", "N/A"),
+                    "adresa": f"{doc.get('nazev_ulice', '')}, {doc.get('nazev_obce', '')}".strip(", "),
+                    "souradnice": doc.get("souradnice") or [],
+                    "web": doc.get("www", "Není k dispozici"),
+                    "pristupnost": doc.get("bezbarierovost", "Neuvedeno"),
                 }
-            }
-        
-        # Specifické místo
-        elif typ_dotazu == "specific_place" and hledany_text:
-            query["$or"] = [
-                {"nazev": {"$regex": hledany_text, "$options": "i"}},
-                {"dp_id": hledany_text}
-            ]
-        
-        # Filtr podle regionu
-        if region and "source_file" in query:
-            # Combine with existing query
-            query = {
-                "$and": [
-                    query,
-                    {
-                        "$or": [
-                            {"nazev_okresu": {"$regex": region, "$options": "i"}},
-                            {"nazev_obce": {"$regex": region, "$options": "i"}},
-                            {"nazev_orp": {"$regex": region, "$options": "i"}}
-                        ]
-                    }
-                ]
-            }
-        elif region:
-            query["$or"] = [
-                {"nazev_okresu": {"$regex": region, "$options": "i"}},
-                {"nazev_obce": {"$regex": region, "$options": "i"}},
-                {"nazev_orp": {"$regex": region, "$options": "i"}}
-            ]
-        
-        # Provedení dotazu
-        vysledky = list(places_collection.find(query).limit(pocet_vysledku))
-        
-        # FALLBACK: Pokud najdeme málo výsledků (< 3) a byl to category search,
-        # zkus regex search v source_file jako backup
-        if len(vysledky) < 3 and typ_dotazu == "category" and kategorie:
-            fallback_query = {"source_file": {"$regex": kategorie, "$options": "i"}}
             
-            # Přidej region filtr pokud existuje
-            if region:
-                fallback_query = {
-                    "$and": [
-                        fallback_query,
-                        {
-                            "$or": [
-                                {"nazev_okresu": {"$regex": region, "$options": "i"}},
-                                {"nazev_obce": {"$regex": region, "$options": "i"}},
-                                {"nazev_orp": {"$regex": region, "$options": "i"}}
-                            ]
-                        }
-                    ]
-                }
+                if doc.get("kapacita"):
+                    misto["kapacita"] = doc["kapacita"]
             
-            fallback_vysledky = list(places_collection.find(fallback_query).limit(pocet_vysledku))
+                if "vzdalenost_m" in doc:
+                    misto["vzdalenost_km"] = round(doc["vzdalenost_m"] / 1000, 1)
             
-            # Pokud fallback našel více, použij ty výsledky
-            if len(fallback_vysledky) > len(vysledky):
-                vysledky = fallback_vysledky
-        
-        # Formátování výsledků
-        formatovana_mista = []
-        for doc in vysledky:
-            misto = {
-                "nazev": doc.get("nazev", "Neznámé"),
-                "id": doc.get("dp_id", "N/A"),
-                "kategorie": doc.get("source_file", "N/A").split("/")[-1].replace(".geojson", ""),
-                "okres": doc.get("nazev_okresu", "N/A"),
-                "obec": doc.get("nazev_obce", "N/A"),
-                "adresa": f"{doc.get('nazev_ulice', '')}, {doc.get('nazev_obce', '')}".strip(", "),
-                "souradnice": doc.get("geometry", {}).get("coordinates", []),
-                "web": doc.get("www", "Není k dispozici"),
-                "pristupnost": doc.get("bezbarierovost", "Neuvedeno"),
-            }
+                if "na_trase_m" in doc:
+                    misto["na_trase_km"] = round(doc["na_trase_m"] / 1000, 1)
+                    misto["od_trasy_km"] = round(doc["od_trasy_m"] / 1000, 1)
             
-            # Přidání specifických polí
-            if "typ_muzea" in doc:
-                misto["typ_muzea"] = doc.get("typ_muzea")
-                misto["zamereni"] = doc.get("zamereni_muzea", "")
+                # Přidání specifických polí
+                if doc.get("typ_muzea"):
+                    misto["typ_muzea"] = doc.get("typ_muzea")
+                    misto["zamereni"] = doc.get("zamereni_muzea", "")
             
-            if "popis" in doc:
-                misto["popis"] = doc.get("popis", "")[:300]
+                if doc.get("popis"):
+                    misto["popis"] = doc["popis"]
             
-            formatovana_mista.append(misto)
+                formatovana_mista.append(misto)
         
         return {
             "uspech": True,
@@ -268,3 +571,63 @@ def hledej_mista_na_rande(
             "chyba": str(e),
             "mista": []
         }
+
+
+# Seznamy souvisejících míst u dokumentu (../databaze/related.py)
+TYPY_SOUVISEJICICH = [SIMILAR] + list(COMPLEMENTS)
+
+
+def souvisejici_mista(places_collection, id_mista: str, typ: str = None):
+    """
+    Předpočítaná související místa k místu z předchozích výsledků
+
+    Podobná místa a nejbližší restaurace, pivovary a rozhledny jsou uložené
+    u dokumentu (spočítá je import), takže stačí jedno čtení podle dp_id.
+
+    Args:
+        places_collection: MongoDB kolekce s místy
+        id_mista: dp_id místa (pole "id" ve výsledcích hledání)
+        typ: Jen jeden seznam - "podobna", "restaurace", "pivovary" nebo "rozhledny"
+
+    Returns:
+        Seznam souvisejících míst (u blízkých se vzdáleností)
+    """
+    try:
+        with span("db.related", typ=typ):
+            doc = places_collection.find_one({"dp_id": id_mista}, RELATED_PROJECTION)
+            if not doc:
+                # dp_id duplicity sloučené do jiného místa
+                doc = places_collection.find_one({"merged_ids": id_mista}, RELATED_PROJECTION)
+
+        if not doc:
+            return {"uspech": False, "chyba": f"Místo s id {id_mista} neexistuje", "mista": []}
+
+        related = doc.get("related") or {}
+        typy = [typ] if typ in TYPY_SOUVISEJICICH else TYPY_SOUVISEJICICH
+        mista = []
+        for nazev_typu in typy:
+            for polozka in related.get(nazev_typu, []):
+                misto = {
+                    "nazev": polozka.get("nazev", "Neznámé"),
+                    "id": polozka.get("dp_id", "N/A"),
+                    "kategorie": polozka.get("druh", "N/A"),
+                    "obec": polozka.get("nazev_obce", "N/A"),
+                    "vztah": nazev_typu,
+                }
+                if "vzdalenost_m" in polozka:
+                    misto["vzdalenost_km"] = round(polozka["vzdalenost_m"] / 1000, 1)
+                mista.append(misto)
+
+        return {
+            "uspech": True,
+            "pocet": len(mista),
+            "k_mistu": doc.get("nazev", id_mista),
+            "mista": mista
+        }
+
+    except Exception as e:
+        return {
+            "uspech": False,
+            "chyba": str(e),
+            "mista": []
+        }
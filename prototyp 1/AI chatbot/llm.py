@@ -0,0 +1,529 @@
+"""
+Klient LLM - Gemini s časovými limity, opakováním, hedgingem a lokální zálohou
+
+Konverzace se drží v neutrálním formátu (seznam slovníků), takže model jde
+vyměnit za lokální nebo nahraný stub a testy i benchmarky běží bez sítě:
+
+    {"role": "user", "text": "Ukaž mi hrady"}
+    {"role": "model", "text": None, "volani": [{"nazev": "hledej_mista_na_rande", "args": {...}}]}
+    {"role": "user", "vysledky": [{"nazev": "hledej_mista_na_rande", "vysledek": {...}}]}
+    {"role": "model", "text": "Tady jsou hrady...", "volani": []}
+
+Každý model má metodu generuj(historie, timeout) -> odpověď
+{"text", "volani", "tokeny": {"vstup", "vystup"}}.
+
+- GeminiModel    bezstavové volání Gemini (celá historie v každém požadavku,
+                 systémová instrukce a schéma nástroje v kontextové cache)
+- MistniModel    deterministický responder nad databázovým vyhledáváním
+- OdolnyKlient   deadline na volání, exponenciální backoff, volitelný hedge
+                 (druhý souběžný požadavek při pomalé odpovědi) a při
+                 nedostupnosti nebo vyčerpané kvótě přepnutí na MistniModel
+"""
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from config import (
+    DATABAZE_DIR, GEMINI_API_KEY, GEMINI_MODEL, LLM_BACKEND, LLM_BACKOFF_S, LLM_CONTEXT_CACHE,
+    LLM_CONTEXT_CACHE_MIN_TOKENS, LLM_CONTEXT_CACHE_TTL_S, LLM_DEADLINE_S, LLM_FALLBACK, LLM_HEDGE_S, LLM_RECORD, LLM_REPLAY, LLM_RETRIES
+)
+
+# Sdílené moduly jsou v adresáři databaze
+if DATABAZE_DIR not in sys.path:
+    sys.path.insert(0, DATABAZE_DIR)
+from dedup import normalize_name  # noqa: E402
+from telemetry import metrics  # noqa: E402
+from throttle import RateLimited, upstream  # noqa: E402
+
+NAZEV_FUNKCE = "hledej_mista_na_rande"
+NAZEV_SOUVISEJICI = "souvisejici_mista"
+
+# HTTP kódy chyb, u kterých má smysl to zkusit znovu
+DOCASNE_KODY = {408, 429, 500, 502, 503, 504}
+
+MAX_PAUZA_S = 8.0
+
+# Kontextová cache se obnoví, když do její expirace zbývá méně
+REZERVA_CACHE_S = 120
+
+
+def je_docasna_chyba(chyba):
+    """Přetížení, výpadek nebo timeout (ne např. neplatný klíč nebo požadavek)"""
+    if isinstance(chyba, (TimeoutError, ConnectionError, FutureTimeout)):
+        return True
+    kod = getattr(chyba, "code", None)
+    kod = getattr(kod, "value", kod)  # grpc StatusCode
+    return kod in DOCASNE_KODY or type(chyba).__name__ in (
+        "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError", "TooManyRequests"
+    )
+
+
+def odpoved(text=None, volani=None, vstup=0, vystup=0, z_cache=0):
+    """Odpověď modelu; z_cache je část vstupních tokenů načtená z kontextové cache"""
+    return {"text": text, "volani": volani or [], "tokeny": {"vstup": vstup, "vystup": vystup, "z_cache": z_cache}}
+
+
+def priprav(klient):
+    """Předem připraví model klienta (import SDK, konfigurace), pokud to potřebuje"""
+    funkce = getattr(klient, "priprav", None)
+    if funkce is not None:
+        funkce()
+
+
+class KontextovaCache:
+    """
+    Systémová instrukce a schéma nástroje uložené na serveru Gemini (context caching)
+
+    Požadavky pak posílají jen odkaz na cache a samotnou konverzaci. Cache se
+    hledá podle otisku obsahu, takže ji sdílí všechna sezení i procesy se
+    stejným promptem. Před expirací se prodlouží, a když mezitím zmizela,
+    vytvoří se znovu - pro volajícího transparentně.
+    """
+
+    def __init__(self, genai, model_name, system_instruction, tool, ttl_s=LLM_CONTEXT_CACHE_TTL_S):
+        self._genai = genai
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.tool = tool
+        self.ttl_s = ttl_s
+        obsah = json.dumps([model_name, system_instruction, type(tool).to_dict(tool)],
+                           ensure_ascii=False, sort_keys=True, default=str)
+        self.display_name = "rande-chatbot-" + hashlib.sha1(obsah.encode("utf-8")).hexdigest()[:16]
+        self._cache = None
+        self._model = None
+        self._platnost_do = 0.0
+        self._lock = threading.Lock()
+
+    def model(self):
+        """GenerativeModel nad platnou cache (případně ji prodlouží nebo vytvoří)"""
+        with self._lock:
+            if self._model is None or time.time() > self._platnost_do - REZERVA_CACHE_S:
+                self._obnov()
+            return self._model
+
+    def zneplatni(self):
+        """Cache na serveru už neexistuje - příští model() ji vytvoří znovu"""
+        with self._lock:
+            self._cache = self._model = None
+
+    def _najdi(self):
+        """Platná cache se stejným obsahem, kterou vytvořil jiný proces nebo sezení"""
+        for cache in self._genai.caching.CachedContent.list(page_size=100):
+            if cache.display_name == self.display_name and \
+                    cache.expire_time.timestamp() > time.time() + REZERVA_CACHE_S:
+                return cache
+        return None
+
+    def _obnov(self):
+        if self._cache is not None:
+            try:
+                self._cache.update(ttl=self.ttl_s)
+                metrics.increment("llm.context_cache.refresh")
+            except Exception:
+                self._cache = None
+        if self._cache is None:
+            self._cache = self._najdi()
+        if self._cache is None:
+            self._cache = self._genai.caching.CachedContent.create(
+                model=self.model_name,
+                display_name=self.display_name,
+                system_instruction=self.system_instruction,
+                tools=[self.tool],
+                ttl=self.ttl_s
+            )
+            metrics.increment("llm.context_cache.create")
+        self._platnost_do = self._cache.expire_time.timestamp()
+        self._model = self._genai.GenerativeModel.from_cached_content(cached_content=self._cache)
+
+
+class GeminiModel:
+    """
+    Gemini přes google.generativeai; historie se posílá celá, volání nemá stav
+
+    Import SDK, konfigurace a schéma nástroje se připraví až při prvním
+    volání (nebo předem na pozadí přes priprav()), start CLI na nich nečeká.
+    """
+
+    nazev = "gemini"
+
+    def __init__(self, model_name=GEMINI_MODEL, kontextova_cache=LLM_CONTEXT_CACHE):
+        self.model_name = model_name
+        self.kontextova_cache = kontextova_cache
+        self.model = None
+        self.kontext = None
+        self._lock = threading.Lock()
+
+    def priprav(self):
+        """Import google.generativeai, configure a GenerativeModel (jen jednou)"""
+        with self._lock:
+            if self.model is None:
+                import google.generativeai as genai
+                from prompts import SYSTEMOVA_INSTRUKCE
+                from tools import get_tool
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                self._genai = genai
+                self.model = genai.GenerativeModel(
+                    model_name=self.model_name,
+                    tools=[get_tool()],
+                    system_instruction=SYSTEMOVA_INSTRUKCE
+                )
+                if self.kontextova_cache:
+                    self.kontext = self._vytvor_kontext(get_tool(), SYSTEMOVA_INSTRUKCE)
+        return self.model
+
+    def _vytvor_kontext(self, tool, system_instruction):
+        """Kontextová cache, nebo None, když ji model nebo velikost promptu nepodporuje"""
+        # Krátký prompt cache odmítne - jedno count_tokens místo výpisu všech cache a neúspěšného create
+        try:
+            tokenu = self.model.count_tokens(".").total_tokens
+        except Exception:
+            tokenu = None
+        if tokenu is not None and tokenu < LLM_CONTEXT_CACHE_MIN_TOKENS:
+            metrics.increment("llm.context_cache.too_small")
+            return None
+
+        kontext = KontextovaCache(self._genai, self.model_name, system_instruction, tool)
+        try:
+            kontext.model()
+        except Exception as e:
+            # Např. příliš krátký prompt (cache má minimální počet tokenů) nebo model bez podpory
+            print(f"⚠️  Kontextová cache Gemini není k dispozici ({type(e).__name__}: {e}) - posílám celý prompt")
+            metrics.increment("llm.context_cache.unavailable")
+            return None
+        return kontext
+
+    def _model_s_kontextem(self):
+        """Model nad kontextovou cache, pokud je k dispozici"""
+        model = self.priprav()
+        if self.kontext is None:
+            metrics.increment("llm.context_cache.miss")
+            return model, False
+        try:
+            model = self.kontext.model()
+        except Exception:
+            metrics.increment("llm.context_cache.miss")
+            return model, False
+        metrics.increment("llm.context_cache.hit")
+        return model, True
+
+    def _obsah(self, zprava):
+        """Zpráva v neutrálním formátu -> genai.protos.Content"""
+        protos = self._genai.protos
+        parts = []
+        if zprava.get("text"):
+            parts.append(protos.Part(text=zprava["text"]))
+        for volani in zprava.get("volani") or []:
+            parts.append(protos.Part(function_call=protos.FunctionCall(
+                name=volani["nazev"], args=volani["args"])))
+        for vysledek in zprava.get("vysledky") or []:
+            parts.append(protos.Part(function_response=protos.FunctionResponse(
+                name=vysledek["nazev"], response={"result": vysledek["vysledek"]})))
+        return protos.Content(role=zprava["role"], parts=parts or [protos.Part(text="")])
+
+    def generuj(self, historie, timeout=None):
+        model, s_kontextem = self._model_s_kontextem()
+        obsah = [self._obsah(zprava) for zprava in historie]
+        volby = {"timeout": timeout} if timeout else None
+        try:
+            response = model.generate_content(obsah, request_options=volby)
+        except Exception as e:
+            if not s_kontextem or type(e).__name__ not in ("NotFound", "PermissionDenied"):
+                raise
+            # Cache zmizela dřív, než jsme čekali - vytvoří se znovu
+            self.kontext.zneplatni()
+            model, _ = self._model_s_kontextem()
+            response = model.generate_content(obsah, request_options=volby)
+
+        texty, volani = [], []
+        parts = response.candidates[0].content.parts if response.candidates else []
+        for part in parts:
+            if part.function_call and part.function_call.name:
+                fc = type(part.function_call).to_dict(part.function_call)
+                volani.append({"nazev": fc["name"], "args": fc.get("args") or {}})
+            elif part.text:
+                texty.append(part.text)
+
+        usage = getattr(response, "usage_metadata", None)
+        return odpoved(
+            "".join(texty) or None, volani,
+            getattr(usage, "prompt_token_count", 0) or 0,
+            getattr(usage, "candidates_token_count", 0) or 0,
+            getattr(usage, "cached_content_token_count", 0) or 0
+        )
+
+
+# Klíčová slova (bez diakritiky, začátky slov) -> kategorie pro vyhledávání
+KLICOVA_SLOVA = [
+    (("hrad",), "hrady"),
+    (("zamek", "zamk"), "zámky"),
+    (("pivo", "pivn", "pivovar"), "pivovary"),
+    (("muze",), "muzea"),
+    (("galeri",), "galerie"),
+    (("restaura", "jidl", "najist", "vecer", "obed", "veceri"), "restaurace"),
+    (("rozhled", "vyhlid", "vyhled"), "rozhledny"),
+    (("lazn", "wellness", "relax"), "lázně"),
+    (("zoo",), "zoo"),
+    (("kino", "kina", "film"), "kina"),
+    (("divadl",), "divadla"),
+    (("koupa", "bazen", "aquapark"), "koupaliště"),
+    (("prirod", "prochaz", "les"), "příroda"),
+]
+
+# Potřeba bezbariérového přístupu (vozíček, kočárek)
+BEZBARIEROVE = ("bezbarier", "vozick", "vozik", "kocar")
+
+REGIONY = {
+    "hradec": "Hradec Králové",
+    "hradc": "Hradec Králové",
+    "trutnov": "Trutnov",
+    "nachod": "Náchod",
+    "jicin": "Jičín",
+    "rychnov": "Rychnov nad Kněžnou",
+}
+
+# Centra okresních měst (šířka, délka) pro dotazy na trasu "z Hradce do Trutnova"
+SOURADNICE_REGIONU = {
+    "Hradec Králové": (50.2092, 15.8328),
+    "Trutnov": (50.5610, 15.9127),
+    "Náchod": (50.4167, 16.1629),
+    "Jičín": (50.4372, 15.3517),
+    "Rychnov nad Kněžnou": (50.1628, 16.2750),
+}
+
+
+def odhadni_dotaz(text, pocet_vysledku=5):
+    """Argumenty hledej_mista_na_rande odhadnuté z textu uživatele (podle klíčových slov)"""
+    slova = normalize_name(text).split()
+    args = {"typ_dotazu": "romantic", "pocet_vysledku": pocet_vysledku}
+
+    # Regiony v pořadí, jak jsou v textu
+    zminene, slova_regionu = [], set()
+    for slovo in slova:
+        for zacatek, region in REGIONY.items():
+            if slovo.startswith(zacatek):
+                slova_regionu.add(slovo)
+                if region not in zminene:
+                    zminene.append(region)
+
+    # "Hradce" není hrad
+    for zacatky, kategorie in KLICOVA_SLOVA:
+        if any(slovo.startswith(zacatky) for slovo in slova if slovo not in slova_regionu):
+            args.update(typ_dotazu="category", kategorie=kategorie)
+            break
+
+    if len(zminene) >= 2 and ("do" in slova or any(slovo.startswith("cest") for slovo in slova)):
+        (sirka, delka), (cil_sirka, cil_delka) = (SOURADNICE_REGIONU[r] for r in zminene[:2])
+        args.update(typ_dotazu="route", sirka=sirka, delka=delka, cil_sirka=cil_sirka, cil_delka=cil_delka)
+    elif zminene:
+        args["region"] = zminene[0]
+
+    if any(slovo.startswith(BEZBARIEROVE) for slovo in slova):
+        args["bezbarierove"] = True
+    return args
+
+
+# Navazující dotaz na místo z předchozích výsledků ("něco podobného", "je tam poblíž rozhledna?")
+PODOBNE = ("podobn",)
+ODKAZ_NA_MISTO = {"tam", "pobliz", "blizko", "okoli", "vedle", "kolem"}
+DOPLNKOVE_KATEGORIE = {"restaurace", "pivovary", "rozhledny"}
+
+
+def _nalezena_mista(historie):
+    """Místa z výsledků v historii - nejnovější první, výsledky hledání před souvisejícími"""
+    hledana, souvisejici = [], []
+    for zprava in reversed(historie):
+        for vysledek in zprava.get("vysledky") or []:
+            mista = [m for m in vysledek["vysledek"].get("mista", []) if m.get("id")]
+            (hledana if vysledek["nazev"] == NAZEV_FUNKCE else souvisejici).extend(mista)
+    return hledana + souvisejici
+
+
+def odhadni_navazujici(text, historie):
+    """Argumenty souvisejici_mista, pokud se text ptá na místo z předchozích výsledků (jinak None)"""
+    mista = _nalezena_mista(historie)
+    if not mista:
+        return None
+
+    slova = normalize_name(text).split()
+    args = odhadni_dotaz(text)
+    if args.get("region") or args["typ_dotazu"] == "route":
+        return None  # nové hledání jinde
+    if any(slovo.startswith(PODOBNE) for slovo in slova):
+        typ = "podobna"
+    elif args.get("kategorie") in DOPLNKOVE_KATEGORIE and ODKAZ_NA_MISTO.intersection(slova):
+        typ = args["kategorie"]
+    else:
+        return None
+
+    # Místo jmenované v textu, jinak první z posledního hledání
+    vyznamna = {slovo for slovo in slova if len(slovo) >= 4}
+    misto = max(mista, key=lambda m: len(vyznamna.intersection(normalize_name(m.get("nazev")).split())))
+    if not vyznamna.intersection(normalize_name(misto.get("nazev")).split()):
+        misto = mista[0]
+    return {"id_mista": misto["id"], "typ": typ}
+
+
+def _zkrat(text, delka=150):
+    text = " ".join(str(text).split())
+    return text if len(text) <= delka else text[:delka].rsplit(" ", 1)[0] + "…"
+
+
+class MistniModel:
+    """
+    Deterministický responder bez sítě
+
+    Na zprávu uživatele odpoví voláním hledej_mista_na_rande s argumenty
+    podle klíčových slov (nebo souvisejici_mista u navazujícího dotazu na
+    nalezené místo), na výsledky funkce seznamem nalezených míst.
+    Slouží jako záloha při výpadku Gemini a jako model pro offline testy.
+    """
+
+    nazev = "local"
+
+    def generuj(self, historie, timeout=None):
+        posledni = historie[-1] if historie else {}
+
+        if posledni.get("vysledky"):
+            mista = [m for v in posledni["vysledky"] for m in v["vysledek"].get("mista", [])]
+            if not mista:
+                return odpoved("Bohužel jsem nic nenašel. Zkuste to prosím jinak, "
+                               "třeba 'hrady u Trutnova' nebo 'pivovary v okolí Jičína'.")
+            radky = ["Tady jsou místa, která by se mohla hodit:"]
+            for i, misto in enumerate(mista, 1):
+                radky.append(f"{i}. {misto.get('nazev')} - {misto.get('obec')} ({misto.get('kategorie')})")
+                if misto.get("popis"):
+                    radky.append(f"   {_zkrat(misto['popis'])}")
+                if misto.get("web") and misto["web"] != "Není k dispozici":
+                    radky.append(f"   🌐 {misto['web']}")
+            return odpoved("\n".join(radky))
+
+        if posledni.get("text"):
+            navazujici = odhadni_navazujici(posledni["text"], historie[:-1])
+            if navazujici:
+                return odpoved(volani=[{"nazev": NAZEV_SOUVISEJICI, "args": navazujici}])
+            return odpoved(volani=[{"nazev": NAZEV_FUNKCE, "args": odhadni_dotaz(posledni["text"])}])
+        return odpoved("Jak vám mohu pomoci s výběrem místa na rande?")
+
+
+class OdolnyKlient:
+    """Obal modelu: deadline, opakování s backoffem, hedging a záložní model"""
+
+    def __init__(self, model, deadline_s=LLM_DEADLINE_S, pokusy=LLM_RETRIES,
+                 backoff_s=LLM_BACKOFF_S, hedge_po_s=LLM_HEDGE_S, zalozni=None):
+        self.model = model
+        self.deadline_s = deadline_s
+        self.pokusy = pokusy
+        self.backoff_s = backoff_s
+        self.hedge_po_s = hedge_po_s
+        self.zalozni = zalozni
+        # Volání běží ve vlákně, aby deadline platil i pro model bez vlastního timeoutu
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm")
+
+    @property
+    def nazev(self):
+        return self.model.nazev
+
+    def priprav(self):
+        priprav(self.model)
+
+    def _pokus(self, historie, timeout):
+        # Kvóta Gemini (RATE_LIMIT_GEMINI) - čeká se nejdéle do deadlinu
+        upstream("gemini").acquire(timeout=timeout)
+        return self.model.generuj(historie, timeout=timeout)
+
+    def _s_hedgem(self, historie, timeout):
+        """Pokus; když do hedge_po_s nepřijde odpověď, souběžně i druhý a platí první hotový"""
+        prvni = self._executor.submit(self._pokus, historie, timeout)
+        if not self.hedge_po_s or timeout <= self.hedge_po_s:
+            return prvni.result(timeout=timeout)
+
+        try:
+            return prvni.result(timeout=self.hedge_po_s)
+        except FutureTimeout:
+            pass
+
+        bezici = [prvni]
+        zbyva = timeout - self.hedge_po_s
+        # Hedge jen pokud na něj zbývá kvóta - nesmí sám způsobit 429
+        if upstream("gemini").try_acquire():
+            metrics.increment("llm.hedge")
+            bezici.append(self._executor.submit(self.model.generuj, historie, zbyva))
+
+        chyba = None
+        for future in as_completed(bezici, timeout=zbyva):
+            try:
+                return future.result()
+            except Exception as e:
+                chyba = e
+        raise chyba
+
+    def generuj(self, historie, timeout=None):
+        konec = time.monotonic() + min(timeout or self.deadline_s, self.deadline_s)
+        chyba = None
+
+        for pokus in range(self.pokusy + 1):
+            zbyva = konec - time.monotonic()
+            if zbyva <= 0:
+                break
+            try:
+                return self._s_hedgem(historie, zbyva)
+            except RateLimited as e:
+                chyba = e
+                break  # kvóta vyčerpaná - rovnou záloha
+            except FutureTimeout:
+                chyba = TimeoutError(f"LLM neodpověděl do {self.deadline_s} s")
+                break
+            except Exception as e:
+                chyba = e
+                if not je_docasna_chyba(e):
+                    break
+                pauza = min(self.backoff_s * 2 ** pokus, MAX_PAUZA_S) * random.uniform(0.5, 1.0)
+                if time.monotonic() + pauza >= konec:
+                    break
+                metrics.increment("llm.retry")
+                time.sleep(pauza)
+
+        if chyba is None:
+            chyba = TimeoutError(f"LLM neodpověděl do {self.deadline_s} s")
+        if self.zalozni is None:
+            raise chyba
+
+        metrics.increment("llm.fallback")
+        print(f"⚠️  LLM nedostupný ({type(chyba).__name__}: {chyba}) - odpovídám ve zjednodušeném režimu")
+        return self.zalozni.generuj(historie)
+
+
+def vytvor_model(backend=LLM_BACKEND):
+    """Model podle LLM_BACKEND: 'gemini', 'local' nebo 'replay' (nahrávka LLM_REPLAY)"""
+    if backend == "local":
+        return MistniModel()
+    if backend == "gemini":
+        return GeminiModel()
+    if backend == "replay":
+        from replay import PrehravanyModel
+        if not LLM_REPLAY:
+            raise ValueError("LLM_BACKEND=replay potřebuje cestu k nahrávce v LLM_REPLAY")
+        return PrehravanyModel(LLM_REPLAY)
+    raise ValueError(f"Neznámý LLM_BACKEND '{backend}' (použij 'gemini', 'local' nebo 'replay')")
+
+
+def vytvor_klienta(backend=LLM_BACKEND, nahravka=LLM_RECORD):
+    """
+    Model obalený OdolnyKlient (se zálohou MistniModel, pokud není LLM_FALLBACK=0)
+
+    Lokální a přehrávaný model jsou deterministické a obal nepotřebují.
+    S nahravka (LLM_RECORD) se volání modelu zapisují do souboru.
+    """
+    model = vytvor_model(backend)
+    if nahravka:
+        from replay import NahravajiciModel
+        model = NahravajiciModel(model, nahravka)
+    if backend in ("local", "replay"):
+        return model
+    return OdolnyKlient(model, zalozni=MistniModel() if LLM_FALLBACK else None)
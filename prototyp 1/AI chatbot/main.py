@@ -1,30 +1,61 @@
 #!/usr/bin/env python3
 """
 Hlavní entry point pro chatbot
+
+Výzva se zobrazí hned: připojení k databázi a příprava klienta LLM
+(import SDK Gemini) běží souběžně na pozadí a čeká se na ně až u první
+zprávy. Čas startu měří mereni_startu.py.
 """
+import json
+import threading
+from concurrent.futures import Future
+
+from config import STORAGE_BACKEND
 from database import Database
 from chat import ChatBot
+from llm import priprav, vytvor_klienta
+from telemetry import snapshot
+
+
+def na_pozadi(funkce, *args):
+    """Spustí funkci v daemon vlákně (nezdrží ukončení), výsledek je ve Future"""
+    future = Future()
+
+    def spust():
+        try:
+            future.set_result(funkce(*args))
+        except BaseException as e:  # i sys.exit() z Database
+            future.set_exception(e)
+
+    threading.Thread(target=spust, name=f"start-{funkce.__name__}", daemon=True).start()
+    return future
+
+
+def spust_chatbota(databaze, llm):
+    """Počká na připojení k databázi a vytvoří chatbota"""
+    db = databaze.result()
+    print(f"✓ Připojeno k databázi s {db.count_documents()} místy\n")
+    return ChatBot(db.get_collection(), llm=llm)
 
 
 def main():
     """Hlavní funkce aplikace"""
     
-    # Inicializace databáze
-    db = Database()
+    # Připojení k databázi a klient LLM se připravují na pozadí
+    databaze = na_pozadi(Database, STORAGE_BACKEND, False)
+    llm = vytvor_klienta()
+    na_pozadi(priprav, llm)
+    chatbot = None
     
     # Úvodní zpráva
     print("="*60)
     print("🌹 ASISTENT PRO RANDE V KRÁLOVÉHRADECKÉM KRAJI 🌹")
     print("="*60)
-    print(f"\n✓ Připojeno k databázi s {db.count_documents()} místy")
     print("\nPomůžu vám najít perfektní místa na rande, výlety pro dva")
     print("nebo romantické zážitky v Královéhradeckém kraji!")
-    print("\nNapište 'konec' pro ukončení\n")
+    print("\nNapište 'konec' pro ukončení, 'metriky' pro časy a statistiky\n")
     print("="*60)
     
-    # Inicializace chatbota
-    chatbot = ChatBot(db.get_collection())
-    
     # Příklady dotazů
     print("\n💡 Příklady konverzace:")
     print("  - Ahoj, chci naplánovat rande")
@@ -44,17 +75,26 @@ def main():
                     print("👋 Přeji hezké rande! Nashledanou!")
                     break
                 
+                if vstup_uzivatele.lower() == 'metriky':
+                    print(json.dumps(snapshot(), indent=2, ensure_ascii=False))
+                    continue
+                
                 if vstup_uzivatele:
+                    if chatbot is None:
+                        chatbot = spust_chatbota(databaze, llm)
                     chatbot.send_message(vstup_uzivatele)
                     
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n👋 Přeji hezké rande! Nashledanou!")
                 break
             except Exception as e:
                 print(f"❌ Chyba: {e}")
     finally:
-        # Uzavření databázového připojení
-        db.close()
+        # Uzavření databázového připojení (pokud už vzniklo)
+        if chatbot is not None:
+            chatbot.close()
+        if databaze.done() and databaze.exception() is None:
+            databaze.result().close()
 
 
 if __name__ == "__main__":
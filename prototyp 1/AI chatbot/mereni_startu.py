@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Měření startu chatbota: čas importů a čas do první výzvy
+
+- importy: 'python -X importtime -c "import main"' - celkový čas a moduly
+  s největším vlastním časem (bez podmodulů)
+- čas do výzvy: spustí main.py a měří, za jak dlouho vypíše 'Vy:'
+  (pak zavře vstup, takže se chatbot ukončí)
+
+    python mereni_startu.py
+    python mereni_startu.py --opakovani 5 --top 20 --output start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+CHATBOT_DIR = Path(__file__).parent
+VYZVA = b"Vy:"
+
+
+def importy(modul="main", top=15):
+    """Report -X importtime pro import modulu"""
+    proces = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modul}"],
+                            cwd=CHATBOT_DIR, capture_output=True, text=True)
+    zaznamy = []
+    for radek in proces.stderr.splitlines():
+        if not radek.startswith("import time:") or "self [us]" in radek:
+            continue
+        vlastni, kumulativni, nazev = radek[len("import time:"):].split("|")
+        zaznamy.append((int(vlastni), int(kumulativni), nazev.rstrip()))
+
+    celkem = next((k for _, k, nazev in zaznamy if nazev.strip() == modul), None)
+    nejdrazsi = sorted(zaznamy, reverse=True)[:top]
+    return {
+        "module": modul,
+        "total_ms": round(celkem / 1000, 1) if celkem is not None else None,
+        "modules": len(zaznamy),
+        "top_self_ms": [{"module": n.strip(), "self_ms": round(v / 1000, 1), "cumulative_ms": round(k / 1000, 1)}
+                        for v, k, n in nejdrazsi],
+        "error": proces.stderr.strip().splitlines()[-1] if proces.returncode else None,
+    }
+
+
+def cas_do_vyzvy(timeout_s=60):
+    """Sekundy od spuštění main.py do vypsání výzvy"""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    zacatek = time.perf_counter()
+    proces = subprocess.Popen([sys.executable, "main.py"], cwd=CHATBOT_DIR, env=env,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    vystup = b""
+    try:
+        while VYZVA not in vystup:
+            kus = proces.stdout.read1(4096)
+            if not kus or time.perf_counter() - zacatek > timeout_s:
+                return None
+            vystup += kus
+        return time.perf_counter() - zacatek
+    finally:
+        proces.stdin.close()  # EOF -> main.py se ukončí
+        try:
+            proces.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proces.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--opakovani", type=int, default=3, help="Počet měření času do výzvy")
+    parser.add_argument("--top", type=int, default=15, help="Počet nejdražších importů v reportu")
+    parser.add_argument("--output", help="Zapsat JSON report do souboru")
+    args = parser.parse_args()
+
+    casy = [cas_do_vyzvy() for _ in range(args.opakovani)]
+    namerene = [c for c in casy if c is not None]
+    report = {
+        "imports": importy(top=args.top),
+        "first_prompt_s": {
+            "runs": [round(c, 3) if c is not None else None for c in casy],
+            "median": round(statistics.median(namerene), 3) if namerene else None,
+        },
+    }
+
+    vystup = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(vystup + "\n")
+        print(f"✓ Report zapsán do {args.output}", file=sys.stderr)
+    else:
+        print(vystup)
+
+
+if __name__ == "__main__":
+    main()
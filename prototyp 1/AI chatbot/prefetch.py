@@ -0,0 +1,190 @@
+"""
+Spekulativní předběžné načítání (prefetch) pravděpodobných dalších dotazů
+
+Po každém výsledku hledej_mista_na_rande se na pozadí (zatímco LLM píše
+odpověď) spustí dotazy, které uživatel typicky položí jako další -
+"něco v okolí", nejbližší restaurace, pivovary a rozhledny kolem prvního
+výsledku. Výsledky se drží v krátkodobé cache pro danou konverzaci.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config import PREFETCH_TTL, PREFETCH_WORKERS, PREFETCH_KATEGORIE
+from database import hledej_mista_na_rande, je_atlas
+from telemetry import metrics, span
+from throttle import upstream
+
+MAX_VYSLEDKU = 20
+VYCHOZI_VZDALENOST_KM = 20
+
+
+def klic_dotazu(function_args):
+    """
+    Normalizovaný klíč dotazu pro cache
+
+    Počet výsledků se do klíče nezapočítává - předem se načítá maximum
+    a při výdeji se výsledky oříznou. Souřadnice se zaokrouhlují (~100 m),
+    aby stejné místo z různých odpovědí LLM dalo stejný klíč.
+    """
+    args = dict(function_args)
+    args.pop("pocet_vysledku", None)
+
+    if args.get("typ_dotazu") == "geospatial":
+        args["max_vzdalenost_km"] = args.get("max_vzdalenost_km") or VYCHOZI_VZDALENOST_KM
+
+    klic = []
+    for nazev, hodnota in sorted(args.items()):
+        # Výchozí hodnoty nemění výsledek dotazu
+        if hodnota is None or hodnota is False or hodnota == "":
+            continue
+        if isinstance(hodnota, str):
+            hodnota = hodnota.strip().lower()
+        elif nazev in ("sirka", "delka", "cil_sirka", "cil_delka"):
+            hodnota = round(float(hodnota), 3)
+        elif nazev == "trasa":
+            hodnota = tuple(tuple(round(float(x), 3) for x in bod) for bod in hodnota)
+        elif isinstance(hodnota, (int, float)) and not isinstance(hodnota, bool):
+            hodnota = float(hodnota)
+        klic.append((nazev, hodnota))
+    return tuple(klic)
+
+
+def _orizni(vysledek, pocet_vysledku):
+    """Kopie výsledku omezená na požadovaný počet míst"""
+    pocet = int(min(pocet_vysledku or 5, MAX_VYSLEDKU))
+    mista = vysledek.get("mista", [])[:pocet]
+    return {**vysledek, "pocet": len(mista), "mista": mista}
+
+
+class PrefetchCache:
+    """Krátkodobá cache výsledků (i rozběhnutých dotazů) pro jednu konverzaci"""
+
+    def __init__(self, ttl=PREFETCH_TTL):
+        self.ttl = ttl
+        self._polozky = {}
+        self._lock = threading.Lock()
+
+    def _platne(self, klic):
+        polozka = self._polozky.get(klic)
+        if polozka and time.monotonic() - polozka[0] > self.ttl:
+            del self._polozky[klic]
+            return None
+        return polozka
+
+    def obsahuje(self, klic):
+        with self._lock:
+            return self._platne(klic) is not None
+
+    def vloz(self, klic, future):
+        """Uloží future s výsledkem (hotový nebo teprve běžící dotaz)"""
+        with self._lock:
+            self._polozky[klic] = (time.monotonic(), future)
+
+    def ziskej(self, klic):
+        """Vrací future pro klíč nebo None"""
+        with self._lock:
+            polozka = self._platne(klic)
+        return polozka[1] if polozka else None
+
+    def vycisti(self):
+        with self._lock:
+            self._polozky.clear()
+
+
+class Prefetcher:
+    """Plánuje dotazy na pozadí a vydává jejich výsledky z cache"""
+
+    def __init__(self, places_collection, kategorie=None):
+        self.places_collection = places_collection
+        self.kategorie = kategorie or PREFETCH_KATEGORIE
+        self.cache = PrefetchCache()
+        self.executor = ThreadPoolExecutor(
+            max_workers=PREFETCH_WORKERS,
+            thread_name_prefix="prefetch"
+        )
+
+    def vyhledej(self, function_args):
+        """
+        Vrátí výsledek z cache, pokud byl dotaz předem načten
+
+        Pokud dotaz ještě běží na pozadí, počká se na něj místo spouštění
+        duplicitního dotazu do databáze.
+        """
+        future = self.cache.ziskej(klic_dotazu(function_args))
+        vysledek = None
+        if future is not None and not future.cancelled():
+            try:
+                vysledek = future.result()
+            except Exception:
+                vysledek = None
+
+        if not vysledek or not vysledek.get("uspech"):
+            metrics.increment("prefetch.miss")
+            return None
+        metrics.increment("prefetch.hit")
+        return _orizni(vysledek, function_args.get("pocet_vysledku"))
+
+    def uloz(self, function_args, vysledek):
+        """Uloží právě provedený dotaz (opakovaný dotaz půjde z paměti)"""
+        # Uložit lze jen úplný výsledek, jinak by ořezával větší dotazy
+        pozadovano = int(min(function_args.get("pocet_vysledku") or 5, MAX_VYSLEDKU))
+        if pozadovano >= MAX_VYSLEDKU or vysledek.get("pocet", 0) < pozadovano:
+            future = Future()
+            future.set_result(vysledek)
+            self.cache.vloz(klic_dotazu(function_args), future)
+
+    def naplanuj(self, function_args, vysledek):
+        """Spustí na pozadí pravděpodobné navazující dotazy k výsledku"""
+        if not vysledek.get("uspech"):
+            return
+
+        self.uloz(function_args, vysledek)
+
+        for dalsi_args in self._navazujici_dotazy(vysledek):
+            klic = klic_dotazu(dalsi_args)
+            if klic == klic_dotazu(function_args) or self.cache.obsahuje(klic):
+                continue
+            future = self.executor.submit(self._nacti, dalsi_args)
+            self.cache.vloz(klic, future)
+
+    def _nacti(self, function_args):
+        """Dotaz na pozadí (vlastní trace 'prefetch.query')"""
+        # Spekulativní dotazy nečekají na limit Atlasu - při vytížení se vynechají
+        if je_atlas(self.places_collection) and not upstream("atlas").try_acquire():
+            return {"uspech": False, "chyba": "Vynecháno (limit Atlasu)", "mista": []}
+        with span("prefetch.query", typ_dotazu=function_args.get("typ_dotazu")):
+            return hledej_mista_na_rande(self.places_collection, **function_args)
+
+    def _navazujici_dotazy(self, vysledek):
+        """Odhad dalších dotazů podle prvního místa s platnými souřadnicemi"""
+        for misto in vysledek.get("mista", []):
+            souradnice = misto.get("souradnice") or []
+            if len(souradnice) == 2 and all(isinstance(c, (int, float)) for c in souradnice):
+                break
+        else:
+            return []
+
+        delka, sirka = souradnice
+        dotazy = [{
+            "typ_dotazu": "geospatial",
+            "sirka": sirka,
+            "delka": delka,
+            "pocet_vysledku": MAX_VYSLEDKU
+        }]
+
+        # Nejbližší místa z doplňkových kategorií (poloha + kategorie v jednom dotazu)
+        for kategorie in self.kategorie:
+            dotazy.append({
+                "typ_dotazu": "geospatial",
+                "kategorie": kategorie,
+                "sirka": sirka,
+                "delka": delka,
+                "pocet_vysledku": MAX_VYSLEDKU
+            })
+        return dotazy
+
+    def close(self):
+        """Zastaví běžící dotazy a uvolní vlákna"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.vycisti()
@@ -47,6 +47,14 @@ PRAVIDLA PRO VOLÁNÍ FUNKCE:
    - Řekne: hrady, zámky, pivovary, muzea, lázně, koupaliště, zoo, divadla, kina, restaurace, rozhledny, atd.
    - Žádá konkrétní místa ("ukaž mi", "najdi", "kde jsou", "chci vidět", "jaké", "kam")
    - Můžeš použít parametr 'region' pokud víš kde se uživatel nachází
+   - Cesta z jednoho místa do druhého ("zastávky cestou z Hradce do Trutnova") → typ_dotazu 'route'
+     se souřadnicemi startu (sirka, delka) a cíle (cil_sirka, cil_delka); místa jsou seřazená od startu
+   - Když uživatel potřebuje bezbariérový přístup (vozíček, kočárek), použij 'bezbarierove'
+     - nefiltruj přístupnost sám z výsledků; 'min_kapacita' pro větší sál
+
+🔗 Navazující dotaz na KONKRÉTNÍ místo z výsledků ("něco podobného", "kde se tam najíst",
+   "je poblíž pivovar / rozhledna?") → funkce souvisejici_mista s jeho 'id'
+   (typ 'podobna', 'restaurace', 'pivovary' nebo 'rozhledny'), nehledej znovu
 
 DŮLEŽITÉ - NEODKLADNÉ HLEDÁNÍ:
 - Pokud uživatel řekne NÁZEV KATEGORIE → OKAMŽITĚ VYHLEDEJ
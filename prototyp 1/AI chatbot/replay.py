@@ -0,0 +1,117 @@
+"""
+Nahrávání a přehrávání konverzací s LLM
+
+NahravajiciModel obalí skutečný model a každé volání zapíše jako jeden JSON
+řádek (poslední zpráva požadavku včetně výsledků nástrojů, odpověď modelu
+s voláními nástrojů, tokeny a doba volání):
+
+    {"klic": "...", "zprava": {...}, "odpoved": {...}, "ms": 812.4}
+
+PrehravanyModel ty samé odpovědi vrací bez sítě - deterministicky podle
+průběhu konverzace (texty uživatele a volání nástrojů, ne obsah výsledků
+z databáze), takže nahrávka platí i po změně dat. Se zpozdeni=True čeká
+nahranou dobu volání, aby časy odpovídaly živému Gemini.
+
+    LLM_RECORD=nahravka.jsonl python main.py               # nahrávání
+    LLM_BACKEND=replay LLM_REPLAY=nahravka.jsonl python main.py
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+
+from llm import odpoved, priprav
+
+
+class ChybiNahravka(KeyError):
+    """Pro daný průběh konverzace není nahraná odpověď"""
+
+
+def klic_historie(historie):
+    """Otisk konverzace: texty uživatele, volání nástrojů a jména nástrojů ve výsledcích"""
+    kostra = []
+    for zprava in historie:
+        if zprava.get("vysledky"):
+            kostra.append(["vysledky", [v["nazev"] for v in zprava["vysledky"]]])
+        elif zprava["role"] == "model":
+            kostra.append(["model", [[v["nazev"], v["args"]] for v in zprava.get("volani") or []]])
+        else:
+            kostra.append(["user", zprava.get("text")])
+    data = json.dumps(kostra, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+class NahravajiciModel:
+    """Obal modelu, který každé volání připíše do JSONL souboru"""
+
+    def __init__(self, model, cesta):
+        self.model = model
+        self.cesta = cesta
+        self._lock = threading.Lock()
+
+    @property
+    def nazev(self):
+        return self.model.nazev
+
+    def priprav(self):
+        priprav(self.model)
+
+    def generuj(self, historie, timeout=None):
+        zacatek = time.perf_counter()
+        vysledek = self.model.generuj(historie, timeout=timeout)
+        zaznam = {
+            "klic": klic_historie(historie),
+            "model": self.model.nazev,
+            "zprava": historie[-1] if historie else None,
+            "odpoved": vysledek,
+            "ms": round((time.perf_counter() - zacatek) * 1000, 1),
+        }
+        radek = json.dumps(zaznam, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.cesta, "a", encoding="utf-8") as f:
+                f.write(radek + "\n")
+        return vysledek
+
+
+def nacti_nahravku(cesta):
+    """Klíč -> nahraný záznam (u opakovaného klíče platí první záznam)"""
+    zaznamy = {}
+    with open(cesta, encoding="utf-8") as f:
+        for radek in f:
+            if radek.strip():
+                zaznam = json.loads(radek)
+                zaznamy.setdefault(zaznam["klic"], zaznam)
+    return zaznamy
+
+
+class PrehravanyModel:
+    """Deterministický stub, který vrací nahrané odpovědi"""
+
+    nazev = "replay"
+
+    def __init__(self, cesta, zpozdeni=False, zalozni=None):
+        """
+        Args:
+            cesta: JSONL soubor z NahravajiciModel
+            zpozdeni: Čekat nahranou dobu volání
+            zalozni: Model pro průběhy, které nahrávka nepokrývá (jinak ChybiNahravka)
+        """
+        self.zaznamy = nacti_nahravku(cesta)
+        self.zpozdeni = zpozdeni
+        self.zalozni = zalozni
+
+    def generuj(self, historie, timeout=None):
+        zaznam = self.zaznamy.get(klic_historie(historie))
+        if zaznam is None:
+            if self.zalozni is not None:
+                return self.zalozni.generuj(historie)
+            posledni = historie[-1] if historie else {}
+            raise ChybiNahravka(f"Chybí nahraná odpověď na {posledni.get('text') or 'výsledky nástrojů'!r}")
+
+        if self.zpozdeni:
+            time.sleep(zaznam.get("ms", 0) / 1000)
+        nahrana = zaznam["odpoved"]
+        tokeny = nahrana.get("tokeny") or {}
+        return odpoved(nahrana.get("text"), copy.deepcopy(nahrana.get("volani")),
+                       tokeny.get("vstup", 0), tokeny.get("vystup", 0), tokeny.get("z_cache", 0))
@@ -0,0 +1,125 @@
+"""
+Rozmanitý výběr výsledků - maximal marginal relevance (MMR)
+
+Dotaz bez řazení ($in přes kategorie + $limit) vrací místa v pořadí, jak
+leží v databázi, takže pět výsledků bývá stejného druhu ve stejné obci.
+Z většího počtu kandidátů se proto vybírá postupně: další místo je to
+s nejvyšším
+
+    lambda * relevance - (1 - lambda) * max(podobnost s už vybranými)
+
+Relevance je pořadí z databáze (vzdálenost u $geoNear, shoda u $text),
+u tematických dotazů zprůměrované se shodou štítků. Podobnost dvou míst je
+průměr podobnosti druhu (Jaccard nad zdrojovými soubory a štítky, bitové
+masky) a polohy (stejná obec = 1, jinak exp(-vzdálenost / 5 km)).
+
+Výběr je hladový, takže prvních k míst z výběru n je totéž jako výběr k
+(prefetch může načíst víc a výsledek oříznout).
+"""
+import math
+
+# Vzdálenost, na které podobnost polohy klesne na 1/e
+POLOMER_PODOBNOSTI_KM = 5.0
+KM_NA_STUPEN = 111.2
+
+# Váha druhu a polohy v podobnosti
+VAHA_DRUHU = 0.5
+
+
+def _druhy(misto):
+    """Druh místa - zdrojové soubory (Hrady, Pivovary, ...) a AI štítky"""
+    soubory = misto.get("source_files") or [misto.get("source_file") or ""]
+    druhy = {f.split("/")[-1].replace(".geojson", "") for f in soubory if f}
+    druhy.update(misto.get("kategorie") or [])
+    return druhy
+
+
+def _popcount(bity):
+    return bin(bity).count("1")
+
+
+class _Kandidat:
+    __slots__ = ("misto", "relevance", "maska", "pocet_druhu", "x", "y", "obec")
+
+    def __init__(self, misto, relevance, maska, cos_sirky):
+        self.misto = misto
+        self.relevance = relevance
+        self.maska = maska
+        self.pocet_druhu = _popcount(maska)
+        souradnice = misto.get("souradnice") or []
+        if len(souradnice) == 2 and all(isinstance(c, (int, float)) for c in souradnice):
+            self.x = souradnice[0] * KM_NA_STUPEN * cos_sirky
+            self.y = souradnice[1] * KM_NA_STUPEN
+        else:
+            self.x = self.y = None
+        self.obec = misto.get("nazev_obce")
+
+    def podobnost(self, jiny):
+        spolecne = _popcount(self.maska & jiny.maska)
+        sjednoceni = self.pocet_druhu + jiny.pocet_druhu - spolecne
+        druh = spolecne / sjednoceni if sjednoceni else 0.0
+
+        if self.obec and self.obec == jiny.obec:
+            poloha = 1.0
+        elif self.x is None or jiny.x is None:
+            poloha = 0.0
+        else:
+            poloha = math.exp(-math.hypot(self.x - jiny.x, self.y - jiny.y) / POLOMER_PODOBNOSTI_KM)
+        return VAHA_DRUHU * druh + (1 - VAHA_DRUHU) * poloha
+
+
+def vyber_rozmanite(mista, pocet, lambda_=0.6, hledane_stitky=None):
+    """
+    Rozmanitý výběr pocet míst z kandidátů (seřazených podle relevance)
+
+    Args:
+        mista: Kandidáti v pořadí z databáze
+        pocet: Kolik míst vybrat
+        lambda_: Váha relevance proti rozmanitosti (1 = původní pořadí)
+        hledane_stitky: Štítky tematického dotazu - zvyšují relevanci míst,
+            která jich mají víc
+
+    Returns:
+        Vybraná místa v pořadí výběru
+    """
+    if pocet <= 0 or not mista:
+        return []
+    if lambda_ >= 1 or len(mista) <= pocet:
+        return list(mista[:pocet])
+
+    # Každý druh jeden bit - Jaccard je pak AND/OR a popcount
+    bity = {}
+    for misto in mista:
+        for druh in _druhy(misto):
+            bity.setdefault(druh, 1 << len(bity))
+
+    hledane = set(hledane_stitky or [])
+    sirky = [m["souradnice"][1] for m in mista if len(m.get("souradnice") or []) == 2]
+    cos_sirky = math.cos(math.radians(sum(sirky) / len(sirky))) if sirky else 1.0
+
+    kandidati = []
+    for poradi, misto in enumerate(mista):
+        druhy = _druhy(misto)
+        relevance = 1 - poradi / len(mista)
+        if hledane:
+            relevance = (relevance + min(1.0, len(druhy & hledane) / 2)) / 2
+        maska = 0
+        for druh in druhy:
+            maska |= bity[druh]
+        kandidati.append(_Kandidat(misto, relevance, maska, cos_sirky))
+
+    # Nejvyšší podobnost každého kandidáta s už vybranými (aktualizuje se po každém výběru)
+    nejpodobnejsi = [0.0] * len(kandidati)
+    zbyvajici = list(range(len(kandidati)))
+    vybrane = []
+    while zbyvajici and len(vybrane) < pocet:
+        nejlepsi = max(zbyvajici, key=lambda i: (
+            lambda_ * kandidati[i].relevance - (1 - lambda_) * nejpodobnejsi[i], -i))
+        zbyvajici.remove(nejlepsi)
+        vybrany = kandidati[nejlepsi]
+        vybrane.append(vybrany.misto)
+        for i in zbyvajici:
+            podobnost = vybrany.podobnost(kandidati[i])
+            if podobnost > nejpodobnejsi[i]:
+                nejpodobnejsi[i] = podobnost
+    return vybrane
@@ -25,7 +25,7 @@ funkce_hledani_mist = genai.protos.FunctionDeclaration(
             "typ_dotazu": genai.protos.Schema(
                 type=genai.protos.Type.STRING,
                 description="Typ dotazu k provedení - VŽDY použij 'category' pokud hledáš podle kategorie (např. Hrady, Lázně, Muzea)",
-                enum=["text_search", "category", "geospatial", "romantic", "specific_place", "all"]
+                enum=["text_search", "category", "geospatial", "route", "romantic", "specific_place", "all"]
             ),
             "hledany_text": genai.protos.Schema(
                 type=genai.protos.Type.STRING,
@@ -33,7 +33,7 @@ funkce_hledani_mist = genai.protos.FunctionDeclaration(
             ),
             "kategorie": genai.protos.Schema(
                 type=genai.protos.Type.STRING,
-                description="JEDNA kategorie (ne seznam!): hrady, zámky, muzea, pivovary, restaurace, zoo, divadla, kina, lázně, koupaliště, příroda, rozhledny, galerie, atd. NEPOUŽÍVEJ čárky!"
+                description="JEDNA kategorie (ne seznam!): hrady, zámky, muzea, pivovary, restaurace, zoo, divadla, kina, lázně, koupaliště, příroda, rozhledny, galerie, atd. NEPOUŽÍVEJ čárky! Lze kombinovat se souřadnicemi (např. restaurace poblíž hradu)."
             ),
             "region": genai.protos.Schema(
                 type=genai.protos.Type.STRING,
@@ -41,15 +41,23 @@ funkce_hledani_mist = genai.protos.FunctionDeclaration(
             ),
             "sirka": genai.protos.Schema(
                 type=genai.protos.Type.NUMBER,
-                description="Zeměpisná šířka pro vyhledávání podle polohy (Hradec Králové ~50.2)"
+                description="Zeměpisná šířka pro vyhledávání podle polohy (Hradec Králové ~50.2). Výsledky jsou seřazené podle vzdálenosti. U typ_dotazu='route' začátek trasy."
             ),
             "delka": genai.protos.Schema(
                 type=genai.protos.Type.NUMBER,
-                description="Zeměpisná délka pro vyhledávání podle polohy (Hradec Králové ~15.8)"
+                description="Zeměpisná délka pro vyhledávání podle polohy (Hradec Králové ~15.8). U typ_dotazu='route' začátek trasy."
+            ),
+            "cil_sirka": genai.protos.Schema(
+                type=genai.protos.Type.NUMBER,
+                description="Zeměpisná šířka cíle trasy pro typ_dotazu='route' (např. Trutnov ~50.56)"
+            ),
+            "cil_delka": genai.protos.Schema(
+                type=genai.protos.Type.NUMBER,
+                description="Zeměpisná délka cíle trasy pro typ_dotazu='route' (např. Trutnov ~15.91)"
             ),
             "max_vzdalenost_km": genai.protos.Schema(
                 type=genai.protos.Type.NUMBER,
-                description="Maximální vzdálenost v kilometrech (výchozí 20km)"
+                description="Maximální vzdálenost v kilometrech (výchozí 20km, u trasy vzdálenost od trasy - výchozí 5km)"
             ),
             "pocet_vysledku": genai.protos.Schema(
                 type=genai.protos.Type.INTEGER,
@@ -70,14 +78,49 @@ funkce_hledani_mist = genai.protos.FunctionDeclaration(
             "wellness": genai.protos.Schema(
                 type=genai.protos.Type.BOOLEAN,
                 description="Hledat wellness a relaxaci (lázně, solné jeskyně, koupaliště)"
+            ),
+            "bezbarierove": genai.protos.Schema(
+                type=genai.protos.Type.BOOLEAN,
+                description="Jen místa s bezbariérovým přístupem (vozíček, kočárek). S částečně_bezbarierove=true i částečně bezbariérová."
+            ),
+            "castecne_bezbarierove": genai.protos.Schema(
+                type=genai.protos.Type.BOOLEAN,
+                description="Spolu s bezbarierove=true připustit i částečně bezbariérová místa"
+            ),
+            "min_kapacita": genai.protos.Schema(
+                type=genai.protos.Type.INTEGER,
+                description="Minimální kapacita (počet míst v sále) - divadla, kina, kluby"
             )
         },
         required=["typ_dotazu"]
     )
 )
 
+# Navazující dotaz na místo z výsledků - předpočítané seznamy, jedno čtení
+funkce_souvisejici_mista = genai.protos.FunctionDeclaration(
+    name="souvisejici_mista",
+    description="""Vrací místa související s místem z předchozích výsledků: podobná místa
+    a nejbližší restaurace, pivovary a rozhledny (se vzdáleností). Použij, když se uživatel
+    ptá na "něco podobného" nebo "kde se tam najíst / napít / kam na výhled" u konkrétního místa.""",
+    parameters=genai.protos.Schema(
+        type=genai.protos.Type.OBJECT,
+        properties={
+            "id_mista": genai.protos.Schema(
+                type=genai.protos.Type.STRING,
+                description="id místa z předchozích výsledků (pole 'id')"
+            ),
+            "typ": genai.protos.Schema(
+                type=genai.protos.Type.STRING,
+                description="Jen jeden seznam; bez něj vrátí všechny",
+                enum=["podobna", "restaurace", "pivovary", "rozhledny"]
+            )
+        },
+        required=["id_mista"]
+    )
+)
+
 # Vytvoření nástroje
-nastroj = genai.protos.Tool(function_declarations=[funkce_hledani_mist])
+nastroj = genai.protos.Tool(function_declarations=[funkce_hledani_mist, funkce_souvisejici_mista])
 
 
 def get_tool():
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark of the search and the API endpoints on local data
+
+Loads the bundled 'data HK - rande geojson' files into an in-memory SQLite
+store (no Atlas needed), optionally scaled up with shifted copies of every
+feature, and measures:
+
+- hledej_mista_na_rande latency/throughput for each typ_dotazu
+- /api/search, /api/place, /api/places and /api/suggest of both API
+  servers under concurrent load with the Flask test client, once with the
+  response cache ('cached') and once with a unique query string per
+  request ('uncached'), which measures the handlers themselves
+
+Results are written as JSON so runs can be compared across commits.
+
+Usage:
+    python benchmark.py                           # x1, print JSON
+    python benchmark.py --scale 10 --scale 100 --output bench.json
+    python benchmark.py --requests 500 --concurrency 8 --seed 7
+    python benchmark.py --data "data synthetic" --no-api   # generate_catalogue.py output
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from geojson_loader import DATA_DIRECTORY, load_directory
+from http_cache import bump_catalogue_version
+from sqlite_store import SQLiteCollection
+from telemetry import Histogram
+
+DATABAZE_DIR = Path(__file__).parent
+CHATBOT_DIR = DATABAZE_DIR.parent / 'AI chatbot'
+FRONTEND_DIR = DATABAZE_DIR / 'frontend'
+
+# Copies of a scaled data set are shifted by up to this many degrees
+SCALE_SHIFT_DEG = 0.3
+
+TEXT_TERMS = ['hrad', 'zámek', 'pivovar', 'muzeum', 'rozhledna', 'koupaliště', 'kino', 'galerie']
+CATEGORIES = ['hrady', 'zámky', 'pivovary', 'muzea', 'restaurace', 'rozhledny', 'lázně', 'zoo']
+REGIONS = ['Hradec Králové', 'Trutnov', 'Náchod', 'Jičín', 'Rychnov nad Kněžnou']
+SEARCH_TYPES = ['text_search', 'category', 'geospatial', 'route', 'romantic', 'specific_place', 'all']
+API_ENDPOINTS = ['/api/search', '/api/place', '/api/places', '/api/suggest']
+SUGGEST_PREFIXES = ['hra', 'zám', 'pivo', 'trut', 'nách', 'jič', 'rozhl', 'muz']
+
+
+def _shift_coordinates(coordinates, dx, dy):
+    if isinstance(coordinates, list) and coordinates and isinstance(coordinates[0], (int, float)):
+        return [coordinates[0] + dx, coordinates[1] + dy] + coordinates[2:]
+    if isinstance(coordinates, list):
+        return [_shift_coordinates(c, dx, dy) for c in coordinates]
+    return coordinates
+
+
+def scale_documents(documents, factor, seed=0):
+    """
+    Data set factor times larger: the original plus shifted copies
+
+    Copy n of a document gets dp_id '<dp_id>-S<n>' and all of its
+    coordinates (location, bbox, geometry) moved by the same random offset.
+    """
+    rng = random.Random(seed)
+    scaled = list(documents)
+    for n in range(1, factor):
+        dx = rng.uniform(-SCALE_SHIFT_DEG, SCALE_SHIFT_DEG)
+        dy = rng.uniform(-SCALE_SHIFT_DEG, SCALE_SHIFT_DEG) / 2
+        for document in documents:
+            clone = copy.deepcopy(document)
+            if clone.get('dp_id'):
+                clone['dp_id'] = f"{clone['dp_id']}-S{n}"
+            clone.pop('merged_ids', None)
+            for field in ('location', 'geometry'):
+                if isinstance(clone.get(field), dict):
+                    clone[field]['coordinates'] = _shift_coordinates(clone[field].get('coordinates'), dx, dy)
+            if clone.get('bbox'):
+                min_x, min_y, max_x, max_y = clone['bbox']
+                clone['bbox'] = [min_x + dx, min_y + dy, max_x + dx, max_y + dy]
+            scaled.append(clone)
+    return scaled
+
+
+def build_store(documents):
+    """In-memory SQLite collection with the given documents"""
+    collection = SQLiteCollection(':memory:')
+    collection.insert_many(copy.deepcopy(documents))
+    return collection
+
+
+def _points(documents):
+    return [d['location']['coordinates'] for d in documents if d.get('location')]
+
+
+def search_arguments(typ_dotazu, rng, documents, points):
+    """Random but seeded arguments for one hledej_mista_na_rande call"""
+    args = {'typ_dotazu': typ_dotazu, 'pocet_vysledku': rng.choice([5, 10, 20])}
+    if typ_dotazu == 'text_search':
+        args['hledany_text'] = rng.choice(TEXT_TERMS)
+    elif typ_dotazu == 'category':
+        args['kategorie'] = rng.choice(CATEGORIES)
+        if rng.random() < 0.3:
+            args['region'] = rng.choice(REGIONS)
+    elif typ_dotazu == 'geospatial':
+        delka, sirka = rng.choice(points)
+        args.update(sirka=sirka, delka=delka, max_vzdalenost_km=rng.choice([5, 10, 20]))
+        if rng.random() < 0.5:
+            args['kategorie'] = rng.choice(CATEGORIES)
+    elif typ_dotazu == 'route':
+        (delka, sirka), (cil_delka, cil_sirka) = rng.sample(points, 2)
+        args.update(sirka=sirka, delka=delka, cil_sirka=cil_sirka, cil_delka=cil_delka,
+                    max_vzdalenost_km=rng.choice([2, 5]))
+    elif typ_dotazu == 'specific_place':
+        document = rng.choice(documents)
+        args['hledany_text'] = document.get('nazev') or document.get('dp_id')
+    return args
+
+
+def summarize(latencies_ms, wall_s, errors=0):
+    histogram = Histogram(size=max(len(latencies_ms), 1))
+    for value in latencies_ms:
+        histogram.observe(value)
+    summary = histogram.snapshot()
+    summary['errors'] = errors
+    summary['throughput_per_s'] = round(len(latencies_ms) / wall_s, 1) if wall_s else 0.0
+    return summary
+
+
+def _timed(function):
+    started = time.perf_counter()
+    result = function()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def bench_search(collection, documents, requests, seed):
+    """Latency per typ_dotazu of hledej_mista_na_rande (sequential)"""
+    sys.path.insert(0, str(CHATBOT_DIR))
+    from database import hledej_mista_na_rande
+
+    points = _points(documents)
+    results = {}
+    for typ_dotazu in SEARCH_TYPES:
+        rng = random.Random(f"{seed}-{typ_dotazu}")
+        calls = [search_arguments(typ_dotazu, rng, documents, points) for _ in range(requests)]
+        # Warm-up (decoded document cache, compiled regexes)
+        hledej_mista_na_rande(collection, **calls[0])
+
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for args in calls:
+            elapsed, result = _timed(lambda: hledej_mista_na_rande(collection, **args))
+            latencies.append(elapsed)
+            errors += 0 if result.get('uspech') else 1
+        results[typ_dotazu] = summarize(latencies, time.perf_counter() - started, errors)
+    return results
+
+
+def _api_paths(endpoint, rng, documents, count):
+    paths = []
+    for _ in range(count):
+        document = rng.choice(documents)
+        if endpoint == '/api/search':
+            paths.append(f"/api/search?q={rng.choice(TEXT_TERMS)}")
+        elif endpoint == '/api/place':
+            paths.append(f"/api/place/{document.get('dp_id')}")
+        elif endpoint == '/api/places':
+            paths.append(f"/api/places?limit={rng.choice([100, 500, 1000])}")
+        elif endpoint == '/api/suggest':
+            paths.append(f"/api/suggest?q={rng.choice(SUGGEST_PREFIXES)}")
+    return paths
+
+
+def _uncached(paths):
+    """Same requests with a unique query string each - every one misses the response cache"""
+    return [f"{path}{'&' if '?' in path else '?'}_bench={n}" for n, path in enumerate(paths)]
+
+
+def _has_route(app, endpoint):
+    return any(rule.rule.startswith(endpoint) for rule in app.url_map.iter_rules())
+
+
+def _load(app, paths, concurrency):
+    """Run the paths from concurrency test clients, summarised"""
+    chunks = [paths[i::concurrency] for i in range(concurrency)]
+
+    def worker(chunk):
+        client = app.test_client()
+        latencies, errors = [], 0
+        for path in chunk:
+            elapsed, response = _timed(lambda: client.get(path))
+            latencies.append(elapsed)
+            errors += 1 if response.status_code >= 500 else 0
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(worker, chunks))
+    wall = time.perf_counter() - started
+
+    latencies = [value for chunk_latencies, _ in outcomes for value in chunk_latencies]
+    return summarize(latencies, wall, sum(errors for _, errors in outcomes))
+
+
+def bench_app(app, documents, requests, concurrency, seed):
+    """Concurrent load on the endpoints of one Flask app, with and without the response cache"""
+    # Both servers share the response store - start without the other server's bodies
+    bump_catalogue_version()
+    results = {}
+    for endpoint in API_ENDPOINTS:
+        if not _has_route(app, endpoint):
+            results[endpoint] = {'skipped': 'endpoint not implemented'}
+            continue
+
+        rng = random.Random(f"{seed}-{endpoint}")
+        paths = _api_paths(endpoint, rng, documents, requests)
+        app.test_client().get(paths[0])  # warm-up
+
+        results[endpoint] = {
+            'cached': _load(app, paths, concurrency),
+            'uncached': _load(app, _uncached(paths), concurrency),
+        }
+    return results
+
+
+def bench_api(collection, documents, requests, concurrency, seed):
+    """Both API servers: api_server (storage collection) and api_server_local (in-memory dict)"""
+    try:
+        import flask  # noqa: F401
+    except ImportError:
+        return {'skipped': 'Flask is not installed'}
+
+    # api_server connects on import - point it at an in-memory SQLite store
+    os.environ['STORAGE_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = ':memory:'
+    # All test clients share one address - the per-client limit would measure itself
+    os.environ['API_RATE_LIMIT'] = '0'
+    sys.path.insert(0, str(FRONTEND_DIR))
+    import api_server
+    import api_server_local
+
+    api_server.collection = collection
+    # New catalogue snapshot; set_catalogue also bumps the catalogue version shared by
+    # both servers, so cached responses of the previous scale are not reused
+    api_server_local.set_catalogue(api_server_local.Catalogue(copy.deepcopy(documents)))
+
+    return {
+        'api_server': bench_app(api_server.app, documents, requests, concurrency, seed),
+        'api_server_local': bench_app(api_server_local.app, documents, requests, concurrency, seed),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DATABAZE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales=(1,), requests=200, concurrency=4, seed=42, api=True, data=DATA_DIRECTORY):
+    """
+    Run the benchmark for every scale factor
+
+    Args:
+        data: GeoJSON directory (relative to the project root or absolute),
+              e.g. a catalogue written by generate_catalogue.py
+
+    Returns:
+        JSON-serialisable dict with metadata and one entry per scale
+    """
+    base = load_directory(data, with_kategorie=True)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'data': str(data),
+            'seed': seed,
+            'requests': requests,
+            'concurrency': concurrency,
+            'base_documents': len(base),
+        },
+        'scales': {},
+    }
+
+    for factor in scales:
+        print(f"⏱  Scale x{factor}...", file=sys.stderr)
+        documents = scale_documents(base, factor, seed)
+        load_s, collection = _timed(lambda: build_store(documents))
+        entry = {
+            'documents': len(documents),
+            'load_ms': round(load_s, 1),
+            'search': bench_search(collection, documents, requests, seed),
+        }
+        if api:
+            entry['api'] = bench_api(collection, documents, requests, concurrency, seed)
+        report['scales'][f"x{factor}"] = entry
+        collection.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, action='append',
+                        help='Data set multiplier, repeatable (default: 1)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per query type / endpoint')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent API clients')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data', default=DATA_DIRECTORY,
+                        help='GeoJSON directory, e.g. output of generate_catalogue.py')
+    parser.add_argument('--no-api', action='store_true', help='Benchmark only the search function')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = run(args.scale or [1], args.requests, args.concurrency, args.seed, not args.no_api,
+                 args.data)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"✓ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
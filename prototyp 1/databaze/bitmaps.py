@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+In-memory bitmap index over the typed attributes ('atributy', schema.py)
+
+    bitmaps = AttributeBitmaps(documents)             # row id -> document
+    bitmaps.candidate_ids({'atributy.bezbarierovost': 'ano',
+                           'atributy.kapacita': {'$gte': 200}})
+    # -> {3, 17, ...} (None when the query has no attribute condition)
+
+A bitmap is a Python int with bit i set for row id i. Row ids are dense
+(1..n), so a plain bitset is as small as compressed containers would be
+and AND / OR / NOT run over machine words in C.
+
+- bool / enum / tag values: one bitmap per (attribute, value)
+- numbers: the distinct values sorted, with the bitmap of rows whose value
+  is >= each of them; any $gt/$gte/$lt/$lte range is one or two lookups
+
+Conditions the index cannot answer are left to the document matcher, the
+index only narrows the candidates.
+"""
+from bisect import bisect_left, bisect_right
+
+from schema import ATTRIBUTE_TYPES
+
+FIELD_PREFIX = 'atributy.'
+
+
+def bitmap_ids(bitmap):
+    """Set of the row ids in a bitmap"""
+    ids = set()
+    while bitmap:
+        low = bitmap & -bitmap
+        ids.add(low.bit_length() - 1)
+        bitmap ^= low
+    return ids
+
+
+class AttributeBitmaps:
+    """Bitmaps of the typed attributes of one set of documents"""
+
+    def __init__(self, documents):
+        self.values = {name: {} for name in ATTRIBUTE_TYPES}
+        numbers = {name: {} for name, (_, kind) in ATTRIBUTE_TYPES.items() if kind == 'int'}
+
+        for row_id, document in documents.items():
+            bit = 1 << row_id
+            for name, value in (document.get('atributy') or {}).items():
+                if name in numbers:
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        numbers[name][value] = numbers[name].get(value, 0) | bit
+                    continue
+                bitmaps = self.values.get(name)
+                if bitmaps is None:
+                    continue
+                for item in (value if isinstance(value, list) else [value]):
+                    bitmaps[item] = bitmaps.get(item, 0) | bit
+
+        # Sorted distinct values and bitmaps of 'value >= distinct[i]' (suffix ORs)
+        self.ranges = {}
+        for name, by_value in numbers.items():
+            distinct = sorted(by_value)
+            at_least = [0] * (len(distinct) + 1)
+            for i in range(len(distinct) - 1, -1, -1):
+                at_least[i] = at_least[i + 1] | by_value[distinct[i]]
+            self.ranges[name] = (distinct, at_least)
+            self.values[name] = by_value
+
+    def _equal(self, name, value):
+        return self.values[name].get(value, 0)
+
+    def _range(self, name, operator, bound):
+        distinct, at_least = self.ranges[name]
+        present = at_least[0]
+        if operator == '$gte':
+            return at_least[bisect_left(distinct, bound)]
+        if operator == '$gt':
+            return at_least[bisect_right(distinct, bound)]
+        if operator == '$lt':
+            return present & ~at_least[bisect_left(distinct, bound)]
+        return present & ~at_least[bisect_right(distinct, bound)]  # $lte
+
+    def bitmap(self, name, condition):
+        """Bitmap of one condition on an attribute (None = not answerable here)"""
+        if name not in self.values:
+            return None
+        if not isinstance(condition, dict):
+            return self._equal(name, condition)
+        if not condition or not all(key.startswith('$') for key in condition):
+            return None
+
+        result = None
+        for operator, argument in condition.items():
+            if operator == '$eq':
+                bits = self._equal(name, argument)
+            elif operator == '$in' and isinstance(argument, list):
+                bits = 0
+                for value in argument:
+                    bits |= self._equal(name, value)
+            elif operator in ('$gt', '$gte', '$lt', '$lte') and name in self.ranges \
+                    and isinstance(argument, (int, float)) and not isinstance(argument, bool):
+                bits = self._range(name, operator, argument)
+            else:
+                return None
+            result = bits if result is None else result & bits
+        return result
+
+    def candidate_ids(self, query):
+        """Row ids allowed by the attribute conditions of a query (None = no such condition)"""
+        result = None
+        parts = [query] + [sub for sub in query.get('$and', []) if isinstance(sub, dict)]
+        for part in parts:
+            for key, condition in part.items():
+                if not key.startswith(FIELD_PREFIX):
+                    continue
+                bits = self.bitmap(key[len(FIELD_PREFIX):], condition)
+                if bits is not None:
+                    result = bits if result is None else result & bits
+        return None if result is None else bitmap_ids(result)
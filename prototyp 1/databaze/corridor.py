@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Corridor search: places within a distance of a route
+
+    route = [[15.83, 50.21], [15.91, 50.56]]          # [lon, lat], Hradec -> Trutnov
+    query = corridor_query(route, 5000)              # $geoWithin per segment
+    corridor_position(route, [15.87, 50.38])         # -> (80.3, 19135.8): off route, along route (m)
+
+A route is a polyline of [lon, lat] points (two points = one segment).
+Each segment is buffered into a "stadium" polygon - a rectangle with
+half-circle caps - that slightly overlaps the true corridor, so one
+$geoWithin per segment finds every candidate:
+
+- MongoDB answers each $geoWithin from the 2dsphere index,
+- the SQLite backend prunes with the R*Tree box of each segment
+  (not of the whole route) before the point-in-polygon test.
+
+The exact distance from the route and the position along it are computed
+afterwards (corridor_position) to drop the corners the polygons add and to
+order the places from start to finish.
+
+Distances use a local equirectangular projection around the route, which
+differs from the great-circle distance by well under 1 % at the scale of
+a region (tens of kilometres).
+"""
+import math
+
+# Same sphere as MongoDB 2dsphere distances
+EARTH_RADIUS_M = 6378100
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# Vertices of each half-circle cap of a buffered segment
+CAP_VERTICES = 8
+
+
+def _projection(route):
+    """Functions [lon, lat] -> (x, y) metres and back, around the route's mean latitude"""
+    lat0 = sum(point[1] for point in route) / len(route)
+    scale = math.cos(math.radians(lat0)) * METERS_PER_DEGREE
+
+    def forward(point):
+        return point[0] * scale, point[1] * METERS_PER_DEGREE
+
+    def backward(x, y):
+        return [x / scale, y / METERS_PER_DEGREE]
+
+    return forward, backward
+
+
+def normalize_route(route):
+    """Route as a list of [lon, lat] without repeated consecutive points"""
+    points = []
+    for point in route or []:
+        point = [float(point[0]), float(point[1])]
+        if not points or point != points[-1]:
+            points.append(point)
+    return points
+
+
+def route_length_m(route):
+    forward, _ = _projection(route)
+    xy = [forward(point) for point in route]
+    return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(xy, xy[1:]))
+
+
+def corridor_position(route, point):
+    """
+    Distance of a point from the route and its position along it
+
+    Returns:
+        (off_route_m, along_route_m) - along is measured to the closest
+        point of the route, from its start
+    """
+    forward, _ = _projection(route)
+    px, py = forward(point)
+    best = (math.inf, 0.0)
+    travelled = 0.0
+    xy = [forward(p) for p in route]
+    if len(xy) == 1:
+        return math.hypot(px - xy[0][0], py - xy[0][1]), 0.0
+    for (ax, ay), (bx, by) in zip(xy, xy[1:]):
+        dx, dy = bx - ax, by - ay
+        length = math.hypot(dx, dy)
+        t = 0.0 if length == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length ** 2))
+        off = math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+        if off < best[0]:
+            best = (off, travelled + t * length)
+        travelled += length
+    return best
+
+
+def _stadium(a, b, width_m, backward):
+    """Closed ring around segment a-b (projected) containing every point within width_m"""
+    # Vertices on a circle of radius r / cos(half the step angle) keep the whole circle inside
+    radius = width_m / math.cos(math.pi / (2 * CAP_VERTICES))
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    heading = math.atan2(dy, dx) if (dx or dy) else 0.0
+    ring = []
+    for center, start in ((b, heading - math.pi / 2), (a, heading + math.pi / 2)):
+        for i in range(CAP_VERTICES + 1):
+            angle = start + math.pi * i / CAP_VERTICES
+            ring.append(backward(center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle)))
+    ring.append(ring[0])
+    return ring
+
+
+def corridor_polygons(route, width_m):
+    """GeoJSON Polygon coordinates, one per route segment, covering the corridor"""
+    forward, backward = _projection(route)
+    xy = [forward(point) for point in route]
+    if len(xy) == 1:
+        xy = xy * 2
+    return [[_stadium(a, b, width_m, backward)] for a, b in zip(xy, xy[1:])]
+
+
+def corridor_query(route, width_m, field='location'):
+    """Query condition for places whose point lies in the buffered corridor"""
+    conditions = [{field: {'$geoWithin': {'$geometry': {'type': 'Polygon', 'coordinates': polygon}}}}
+                  for polygon in corridor_polygons(route, width_m)]
+    return conditions[0] if len(conditions) == 1 else {'$or': conditions}
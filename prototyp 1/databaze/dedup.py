@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Cross-file deduplication (entity resolution) of place documents
+
+The same real place often appears in several source files - a castle in
+Hrady and Národní kulturní památky, a brewery in Pivovary and restaurace.
+Before storing, such documents are merged into one canonical place:
+
+    source_files  all files the place came from (canonical file first)
+    kategorie     union of the category tags
+    merged_ids    dp_id values of the merged duplicates
+
+Blocking: documents are put into a spatial grid (cells larger than the
+match distance) and compared only with documents in the neighbouring
+cells, so the pass stays near-linear. Matching: distance of the location
+points plus similarity of the diacritics-folded names.
+
+Usage:
+    python dedup.py    # list duplicate groups of the bundled GeoJSON files
+"""
+import math
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+from schema import CONTACT_FIELDS, CORE_FIELDS, is_empty
+
+# Names (almost) identical - the source files place the points up to a few hundred meters apart
+MAX_DISTANCE_M = 400
+STRONG_SIMILARITY = 0.95
+
+# Names similar or one contained in the other (Pivovar Beránek / Pivovar Beránek, Stěžery)
+NEAR_DISTANCE_M = 150
+NEAR_SIMILARITY = 0.85
+
+# Grid cell in degrees; must not be smaller than MAX_DISTANCE_M
+CELL_LAT = 0.004
+CELL_LON = 0.006
+
+R_EARTH_M = 6378100
+
+
+def normalize_name(name):
+    """Lowercase, diacritics-free tokens of a name ('Zámek Opočno' -> 'zamek opocno')"""
+    if not isinstance(name, str):
+        return ''
+    folded = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return ' '.join(re.findall(r'[a-z0-9]+', folded.lower()))
+
+
+def name_similarity(a, b):
+    """Similarity 0..1 of two normalised names (spaces ignored: ZOOPARK = ZOO park)"""
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a.replace(' ', ''), b.replace(' ', '')).ratio()
+
+
+def _contained(a, b):
+    """
+    All tokens of the shorter name appear in the longer one
+
+    The shorter name needs two tokens and half of the longer one, so that
+    'Kostel sv. Jana Nepomuckého, vrch Zvičina' does not match 'Vrch Zvičina'.
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    shorter, longer = sorted((tokens_a, tokens_b), key=len)
+    return len(shorter) >= 2 and 2 * len(shorter) >= len(longer) and shorter <= longer
+
+
+def _distance_m(a, b):
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * R_EARTH_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def is_duplicate(a, b):
+    """
+    Decide whether two prepared entries describe the same place
+
+    Args:
+        a, b: (point, normalised name, source_file) tuples
+    """
+    point_a, name_a, source_a = a
+    point_b, name_b, source_b = b
+    if source_a == source_b or not name_a or not name_b:
+        return False
+
+    distance = _distance_m(point_a, point_b)
+    if distance > MAX_DISTANCE_M:
+        return False
+    similarity = name_similarity(name_a, name_b)
+    if similarity >= STRONG_SIMILARITY:
+        return True
+    return distance <= NEAR_DISTANCE_M and (similarity >= NEAR_SIMILARITY or _contained(name_a, name_b))
+
+
+def _point(document):
+    location = document.get('location') or {}
+    coordinates = location.get('coordinates')
+    if isinstance(coordinates, list) and len(coordinates) >= 2:
+        return coordinates[0], coordinates[1]
+    return None
+
+
+def _cell(point):
+    return int(math.floor(point[0] / CELL_LON)), int(math.floor(point[1] / CELL_LAT))
+
+
+def find_duplicate_groups(documents):
+    """
+    Groups of indexes into documents that describe the same place
+
+    Returns:
+        List of index lists (only groups with two or more documents)
+    """
+    parent = list(range(len(documents)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    grid = {}
+    entries = {}
+    for index, document in enumerate(documents):
+        point = _point(document)
+        if point is None:
+            continue
+        entry = (point, normalize_name(document.get('nazev')), document.get('source_file'))
+        entries[index] = entry
+        cell_x, cell_y = _cell(point)
+
+        # Compare with what is already in this and the neighbouring cells
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other in grid.get((cell_x + dx, cell_y + dy), ()):
+                    if is_duplicate(entry, entries[other]):
+                        root_a, root_b = find(index), find(other)
+                        if root_a != root_b:
+                            parent[max(root_a, root_b)] = min(root_a, root_b)
+        grid.setdefault((cell_x, cell_y), []).append(index)
+
+    groups = {}
+    for index in range(len(documents)):
+        groups.setdefault(find(index), []).append(index)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def _richness(document):
+    """Number of filled fields - the richest document becomes the canonical one"""
+    filled = sum(1 for field in CORE_FIELDS if not is_empty(document.get(field)))
+    filled += sum(len(values) for values in (document.get('kontakt') or {}).values())
+    filled += len(document.get('detail') or {})
+    is_point = (document.get('geometry') or {}).get('type') == 'Point'
+    return filled, is_point
+
+
+def _unique(values):
+    result = []
+    for value in values:
+        if value not in result:
+            result.append(value)
+    return result
+
+
+def merge_group(documents):
+    """
+    Merge duplicates into one canonical document
+
+    Args:
+        documents: Documents of one duplicate group
+
+    Returns:
+        New canonical document (inputs are not modified)
+    """
+    ordered = sorted(documents, key=_richness, reverse=True)
+    canonical = dict(ordered[0])
+    others = ordered[1:]
+
+    # Missing core fields (www, popis, address, ...) come from the duplicates
+    for field in CORE_FIELDS:
+        if is_empty(canonical.get(field)):
+            for other in others:
+                if not is_empty(other.get(field)):
+                    canonical[field] = other[field]
+                    break
+
+    canonical['source_files'] = _unique(
+        source for document in ordered
+        for source in (document.get('source_files') or [document.get('source_file')]) if source)
+
+    if any(document.get('kategorie') for document in ordered):
+        canonical['kategorie'] = _unique(
+            tag for document in ordered for tag in (document.get('kategorie') or []))
+
+    kontakt = {}
+    for kind in CONTACT_FIELDS:
+        values = _unique(value for document in ordered
+                         for value in (document.get('kontakt') or {}).get(kind, []))
+        if values:
+            kontakt[kind] = values
+    if kontakt:
+        canonical['kontakt'] = kontakt
+
+    canonical['merged_ids'] = _unique(
+        dp_id for document in others
+        for dp_id in [document.get('dp_id')] + list(document.get('merged_ids') or [])
+        if dp_id and dp_id != canonical.get('dp_id'))
+    return canonical
+
+
+def deduplicate(documents):
+    """
+    Merge cross-file duplicates
+
+    Args:
+        documents: Slim place documents (schema.slim_document)
+
+    Returns:
+        (documents, merged_groups) - merged_groups is the number of merged places
+    """
+    groups = find_duplicate_groups(documents)
+    merged = {}
+    for group in groups:
+        merged[min(group)] = merge_group([documents[i] for i in group])
+    dropped = {i for group in groups for i in group if i != min(group)}
+
+    result = []
+    for index, document in enumerate(documents):
+        if index in dropped:
+            continue
+        result.append(merged.get(index, document))
+    return result, len(groups)
+
+
+def main():
+    from geojson_loader import load_directory
+
+    documents = load_directory(dedupe=False)
+    groups = find_duplicate_groups(documents)
+    print(f"Documents: {len(documents)}")
+    print(f"Duplicate groups: {len(groups)} ({sum(len(g) - 1 for g in groups)} documents merged away)")
+    for group in groups:
+        print()
+        for index in group:
+            document = documents[index]
+            print(f"  {document.get('dp_id')}  {document.get('nazev')}  ({document.get('source_file')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Facet counts (category, district, municipality, accessibility) for a filter
+
+    index = FacetIndex(documents)
+    index.counts({'okres': ['Trutnov'], 'kategorie': ['hrad', 'zámek']})
+    # -> {'total': 6, 'facets': {'kategorie': [{'value': 'historické', 'count': 6}, ...], ...}}
+
+Values of one facet are alternatives (OR), different facets all apply (AND).
+The total uses the whole filter; each facet is counted under the other
+facets' filters only, so ?okres=Trutnov still lists every district with
+the count it would add (the usual multi-select facet UI).
+
+Two precomputed forms, the same result:
+
+- FacetIndex (local data): one bitset per facet value, a Python int with
+  bit i set for the i-th document. A filter is the AND of the ORed value
+  bitsets, every count is a popcount of (filter & value bitset) - no
+  document is looked at per request.
+- summary cells (MongoDB): documents grouped by their combination of facet
+  values into a small collection ({'okres', 'obec', 'bezbarierovost',
+  'kategorie': [...], 'count'}), rewritten on import (refresh_summary).
+  A filter is an ordinary find() over the cells and count_cells() adds
+  them up (summary_counts: one find() for the total and one per filtered
+  facet), so the places collection is not scanned.
+"""
+from collections import Counter
+
+from geojson_loader import default_kategorie
+from schema import accessibility as normalize_accessibility
+
+# Facet name -> document field
+FACET_FIELDS = {
+    'kategorie': 'kategorie',
+    'okres': 'nazev_okresu',
+    'obec': 'nazev_obce',
+    'bezbarierovost': 'bezbarierovost',
+}
+
+# Read projection for building facets (source files for the baseline categories)
+FACET_PROJECTION = dict({'_id': 0, 'source_file': 1, 'source_files': 1},
+                        **{field: 1 for field in FACET_FIELDS.values()})
+
+# Accessibility that is not ano / částečně / ne (NEZJIŠTĚNO or nothing in the source files)
+ACCESSIBILITY_UNKNOWN = 'nezjištěno'
+
+# Summary collection name in MongoDB (next to the places collection)
+SUMMARY_COLLECTION = 'places_facets'
+
+
+def accessibility(value):
+    """Normalised accessibility: 'ano', 'částečně', 'ne' or 'nezjištěno'"""
+    return normalize_accessibility(value) or ACCESSIBILITY_UNKNOWN
+
+
+def facet_values(document):
+    """Facet name -> list of the document's values"""
+    # Without AI categorisation the same baseline tags as the chatbot's local data,
+    # from every source file of a merged place (Hrady and Zámky -> hrad and zámek)
+    kategorie = document.get('kategorie')
+    if not kategorie:
+        source_files = document.get('source_files') or [document.get('source_file') or '']
+        kategorie = [tag for source_file in source_files for tag in default_kategorie(source_file)]
+    values = {'kategorie': sorted(set(kategorie if isinstance(kategorie, list) else [kategorie]))}
+    for facet in ('okres', 'obec'):
+        value = document.get(FACET_FIELDS[facet])
+        values[facet] = [value] if value else []
+    values['bezbarierovost'] = [accessibility(document.get('bezbarierovost'))]
+    return values
+
+
+def filters_from_args(args):
+    """
+    Filter from query parameters (?kategorie=hrad&kategorie=zámek&okres=Trutnov)
+
+    Args:
+        args: Mapping with getlist() (Flask request.args)
+
+    Returns:
+        Facet name -> list of values, only facets that were given
+    """
+    filters = {}
+    for facet in FACET_FIELDS:
+        values = [value for value in args.getlist(facet) if value]
+        if facet == 'bezbarierovost':
+            values = [accessibility(value) for value in values]
+        if values:
+            filters[facet] = values
+    return filters
+
+
+def _result(total, counters):
+    return {
+        'total': total,
+        'facets': {
+            facet: [{'value': value, 'count': count}
+                    for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+                    if count]
+            for facet, counter in counters.items()
+        },
+    }
+
+
+def _popcount(bits):
+    return bits.bit_count() if hasattr(bits, 'bit_count') else bin(bits).count('1')
+
+
+class FacetIndex:
+    """Bitset per facet value over a fixed list of documents"""
+
+    def __init__(self, documents):
+        self.bitsets = {facet: {} for facet in FACET_FIELDS}
+        size = 0
+        for position, document in enumerate(documents):
+            bit = 1 << position
+            for facet, values in facet_values(document).items():
+                bitsets = self.bitsets[facet]
+                for value in values:
+                    bitsets[value] = bitsets.get(value, 0) | bit
+            size = position + 1
+        self.size = size
+        self.all = (1 << size) - 1
+        self._unfiltered = self._count({})
+
+    def _allowed(self, filters):
+        """Facet -> bitset of the documents with one of its filtered values"""
+        allowed = {}
+        for facet, values in filters.items():
+            bitsets = self.bitsets.get(facet, {})
+            bits = 0
+            for value in values:
+                bits |= bitsets.get(value, 0)
+            allowed[facet] = bits
+        return allowed
+
+    def mask(self, filters):
+        """Bitset of the documents matching the filter"""
+        mask = self.all
+        for bits in self._allowed(filters).values():
+            mask &= bits
+        return mask
+
+    def _count(self, filters):
+        allowed = self._allowed(filters)
+        counters = {}
+        for facet, bitsets in self.bitsets.items():
+            # A facet's own filter does not narrow its counts
+            mask = self.all
+            for other, bits in allowed.items():
+                if other != facet:
+                    mask &= bits
+            counters[facet] = {value: _popcount(mask & bits) for value, bits in bitsets.items()}
+        total = self.all
+        for bits in allowed.values():
+            total &= bits
+        return _result(_popcount(total), counters)
+
+    def counts(self, filters=None):
+        """Total matching the filter, per-value counts under the other facets' filters"""
+        if not filters:
+            return self._unfiltered
+        return self._count(filters)
+
+    def __len__(self):
+        return self.size
+
+
+def summary_cells(documents):
+    """Documents grouped by their combination of facet values (with counts)"""
+    cells = Counter()
+    for document in documents:
+        values = facet_values(document)
+        key = (values['okres'][0] if values['okres'] else None,
+               values['obec'][0] if values['obec'] else None,
+               values['bezbarierovost'][0],
+               tuple(values['kategorie']))
+        cells[key] += 1
+    return [
+        {'okres': okres, 'obec': obec, 'bezbarierovost': bezbarierovost,
+         'kategorie': list(kategorie), 'count': count}
+        for (okres, obec, bezbarierovost, kategorie), count in cells.items()
+    ]
+
+
+def summary_query(filters):
+    """find() filter over the summary cells for a facet filter"""
+    return {'$and': [{facet: {'$in': values}} for facet, values in filters.items()]} if filters else {}
+
+
+def count_cells(cells):
+    """Total and per-value counts of the given summary cells"""
+    total = 0
+    counters = {facet: Counter() for facet in FACET_FIELDS}
+    for cell in cells:
+        count = cell['count']
+        total += count
+        for facet in ('okres', 'obec', 'bezbarierovost'):
+            if cell.get(facet):
+                counters[facet][cell[facet]] += count
+        for value in cell.get('kategorie') or []:
+            counters['kategorie'][value] += count
+    return _result(total, counters)
+
+
+def summary_counts(find, filters):
+    """
+    Same result as FacetIndex.counts() from the summary cells
+
+    Args:
+        find: Callable query -> matching summary cells
+        filters: Facet name -> list of values
+
+    Returns:
+        Total of the whole filter; a filtered facet counted with a query
+        without its own values, the other facets from the whole filter
+    """
+    result = count_cells(find(summary_query(filters)))
+    for facet in filters:
+        others = {other: values for other, values in filters.items() if other != facet}
+        result['facets'][facet] = count_cells(find(summary_query(others)))['facets'][facet]
+    return result
+
+
+def refresh_summary(places, summary):
+    """
+    Rewrite the summary collection from the places collection
+
+    Returns:
+        Number of summary cells
+    """
+    cells = summary_cells(places.find({}, FACET_PROJECTION))
+    summary.delete_many({})
+    if cells:
+        summary.insert_many(cells)
+    for facet in ('okres', 'obec', 'kategorie'):
+        summary.create_index(facet)
+    return len(cells)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Polling watcher of a data directory
+
+    watcher = DirectoryWatcher(directory, on_change, interval=5)
+    watcher.start()
+
+    # Baseline of the data already loaded - a change made before the
+    # watcher started is reported too
+    DirectoryWatcher(directory, on_change, signature=loaded_signature).start()
+
+A daemon thread compares the (name, mtime, size) signature of the matching
+files every interval seconds. A change is reported only once the directory
+has been stable for a whole interval, so a download that is still writing
+files triggers a single callback at the end. Polling needs no extra
+dependency and works the same on every platform.
+"""
+import threading
+from pathlib import Path
+
+
+def directory_signature(directory, pattern='*.geojson'):
+    """Sorted (name, mtime_ns, size) of the matching files"""
+    signature = []
+    for path in sorted(Path(directory).glob(pattern)):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue  # deleted between glob and stat
+        signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class DirectoryWatcher:
+    """Calls on_change() from a background thread when the directory content changes"""
+
+    def __init__(self, directory, on_change, interval=5.0, pattern='*.geojson', signature=None):
+        """
+        Args:
+            signature: Signature of the data the caller has loaded (default: the directory now)
+        """
+        self.directory = directory
+        self.on_change = on_change
+        self.interval = interval
+        self.pattern = pattern
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = directory_signature(directory, pattern) if signature is None else signature
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='directory-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self, pending=None):
+        """
+        One poll
+
+        Args:
+            pending: Signature seen changed in the previous poll
+
+        Returns:
+            New pending signature (None when nothing is waiting)
+        """
+        current = directory_signature(self.directory, self.pattern)
+        if current == self._signature:
+            return None
+        if current != pending:
+            return current  # still changing - wait one more interval
+
+        self._signature = current
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"⚠️  Reload after change in {self.directory} failed: {e}")
+        return None
+
+    def _run(self):
+        pending = None
+        while not self._stop.wait(self.interval):
+            pending = self.check(pending)
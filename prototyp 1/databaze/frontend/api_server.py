@@ -1,42 +1,147 @@
 #!/usr/bin/env python3
 """
 Flask API Server pro Hackathon HK
-Poskytuje REST API pro přístup k MongoDB databázi míst
+Poskytuje REST API pro přístup k databázi míst (MongoDB Atlas nebo lokální SQLite)
 """
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+import sys
+import threading
+import time
+
+# Sdílená vrstva úložiště (databaze/storage.py)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from storage import StorageError, connect, get_backend  # noqa: E402
+from schema import DETAIL_PROJECTION, LIST_PROJECTION, RELATED_PROJECTION  # noqa: E402
+from telemetry import instrument_flask  # noqa: E402
+from throttle import limit_clients, upstream  # noqa: E402
+from http_cache import cached_response, set_catalogue_version  # noqa: E402
+from serialization import json_response  # noqa: E402
+from suggest import DEFAULT_LIMIT, SuggestIndex  # noqa: E402
+from versions import META_COLLECTION, TOMBSTONE_COLLECTION, current_version  # noqa: E402
+from facets import (  # noqa: E402
+    FACET_PROJECTION, SUMMARY_COLLECTION, FacetIndex, filters_from_args, refresh_summary, summary_counts
+)
 
 # Načti environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Povol CORS pro frontend
+instrument_flask(app)  # Časování požadavků + GET /metrics
+limit_clients(app)  # Limit požadavků na klienta (API_RATE_LIMIT), 429 při přetížení
 
-# MongoDB připojení
-MONGODB_URI = os.getenv('MONGODB_URI')
+# Připojení k úložišti (STORAGE_BACKEND=mongo|sqlite)
+STORAGE_BACKEND = get_backend()
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'hackathon_hk')
 COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'places')
 
-if not MONGODB_URI:
-    print("ERROR: MONGODB_URI not found in .env file!")
-    exit(1)
-
 try:
-    client = MongoClient(MONGODB_URI)
-    db = client[DATABASE_NAME]
-    collection = db[COLLECTION_NAME]
-    # Test připojení
-    client.server_info()
-    print(f"✓ Připojeno k MongoDB: {DATABASE_NAME}.{COLLECTION_NAME}")
-except Exception as e:
-    print(f"✗ Chyba připojení k MongoDB: {e}")
+    client, collection = connect(STORAGE_BACKEND)
+    print(f"✓ Připojeno k {STORAGE_BACKEND}: {DATABASE_NAME}.{COLLECTION_NAME}")
+except StorageError as e:
+    print(f"✗ Chyba připojení k databázi: {e}")
     exit(1)
 
 
+def _atlas():
+    """Limit dotazů do Atlasu (RATE_LIMIT_ATLAS) - nárazy počkají, při zahlcení 503"""
+    if STORAGE_BACKEND == 'mongo':
+        upstream('atlas').acquire()
+
+
+# Našeptávač se staví z názvů v databázi a po SUGGEST_TTL_S sekundách znovu (nová data z importu)
+SUGGEST_TTL_S = float(os.getenv('SUGGEST_TTL_S', '600'))
+SUGGEST_PROJECTION = {'_id': 0, 'dp_id': 1, 'nazev': 1, 'nazev_obce': 1, 'nazev_okresu': 1}
+_suggest_lock = threading.Lock()
+_suggest_index = None
+_suggest_built_at = 0.0
+
+
+def get_suggest_index():
+    """SuggestIndex nad aktuální kolekcí (jeden dotaz na všechny názvy, pak z paměti)"""
+    global _suggest_index, _suggest_built_at
+    with _suggest_lock:
+        if _suggest_index is None or time.monotonic() - _suggest_built_at > SUGGEST_TTL_S:
+            _atlas()
+            _suggest_index = SuggestIndex(collection.find({}, SUGGEST_PROJECTION))
+            _suggest_built_at = time.monotonic()
+        return _suggest_index
+
+
+# Počty pro filtry: v MongoDB z předpočítané souhrnné kolekce (přepisuje ji import),
+# v SQLite z bitsetů v paměti (obnova stejně jako našeptávač)
+FACETS_COLLECTION = os.getenv('FACETS_COLLECTION', SUMMARY_COLLECTION)
+_facets_lock = threading.Lock()
+_facets_ready = False
+_facet_index = None
+_facets_built_at = 0.0
+
+
+def facet_counts(filters):
+    """Celkový počet a počty podle kategorie, okresu, obce a bezbariérovosti"""
+    global _facets_ready, _facet_index, _facets_built_at
+    if STORAGE_BACKEND == 'mongo':
+        summary = client[DATABASE_NAME][FACETS_COLLECTION]
+        with _facets_lock:
+            if not _facets_ready:
+                # Databáze importovaná starší verzí importu souhrn ještě nemá
+                if summary.estimated_document_count() == 0:
+                    _atlas()
+                    refresh_summary(collection, summary)
+                _facets_ready = True
+
+        def find(query):
+            _atlas()
+            return summary.find(query, {'_id': 0})
+        # Jeden dotaz na celkový počet a jeden na každý zadaný filtr (bez jeho vlastních hodnot)
+        return summary_counts(find, filters)
+
+    with _facets_lock:
+        if _facet_index is None or time.monotonic() - _facets_built_at > SUGGEST_TTL_S:
+            _facet_index = FacetIndex(collection.find({}, FACET_PROJECTION))
+            _facets_built_at = time.monotonic()
+    return _facet_index.counts(filters)
+
+
+# Verze katalogu z importu (versions.py) - po novém importu se zneplatní ETagy a cache odpovědí.
+# Kontroluje se nejvýš jednou za VERSION_CHECK_S sekund.
+VERSION_CHECK_S = float(os.getenv('VERSION_CHECK_S', '5'))
+_version_lock = threading.Lock()
+_version = None
+_version_checked_at = 0.0
+
+
+def catalogue_version():
+    """Aktuální verze katalogu (0 = importováno bez verzí)"""
+    global _version, _version_checked_at
+    with _version_lock:
+        if _version is None or time.monotonic() - _version_checked_at > VERSION_CHECK_S:
+            if STORAGE_BACKEND == 'mongo':
+                _atlas()
+                version = current_version(client[DATABASE_NAME][META_COLLECTION])
+            else:
+                # SQLite se vždy staví celá znovu - všechna místa mají verzi sestavení
+                place = collection.find_one({}, {'_id': 0, 'version': 1})
+                version = (place or {}).get('version', 0)
+            if version:
+                # ETag = verze z importu, stejná ve všech workerech; nová verze vyprázdní cache
+                set_catalogue_version(f"c{version}")
+            _version = version
+            _version_checked_at = time.monotonic()
+        return _version
+
+
+@app.before_request
+def sync_catalogue_version():
+    """Nový import se projeví i v odpovědích z HTTP cache"""
+    if request.path.startswith('/api/') and request.path != '/api/health':
+        catalogue_version()
+
+
 @app.route('/')
 def index():
     """Základní info o API"""
@@ -45,8 +150,13 @@ def index():
         'message': 'Hackathon HK - Map API',
         'endpoints': {
             '/api/place/<dp_id>': 'Získat místo podle dp_id',
+            '/api/place/<dp_id>/related': 'Podobná místa a nejbližší restaurace, pivovary a rozhledny',
             '/api/places': 'Získat všechna místa',
-            '/api/health': 'Health check'
+            '/api/suggest?q=text': 'Našeptávač názvů míst, obcí a okresů (i s překlepy)',
+            '/api/facets?okres=...&kategorie=...': 'Počty míst podle kategorie, okresu, obce a bezbariérovosti',
+            '/api/changes?since=<verze>': 'Změněná a smazaná místa od verze katalogu (synchronizace kopie)',
+            '/api/health': 'Health check',
+            '/metrics': 'Latence (p50/p95/p99), počítadla a cache hit rate'
         }
     })
 
@@ -56,13 +166,14 @@ def health():
     """Health check endpoint"""
     try:
         # Otestuj databázové připojení
-        collection.find_one()
+        collection.find_one({}, {'_id': 1})
         return jsonify({'status': 'healthy', 'database': 'connected'})
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
 
 @app.route('/api/place/<dp_id>')
+@cached_response(max_age=300)  # ETag/304 + předkomprimované tělo
 def get_place(dp_id):
     """
     Získá místo podle dp_id
@@ -73,8 +184,47 @@ def get_place(dp_id):
     Returns:
         JSON s detaily místa nebo 404 pokud neexistuje
     """
+    _atlas()
+    try:
+        place = collection.find_one({'dp_id': dp_id}, DETAIL_PROJECTION)
+        if not place:
+            # dp_id duplicity sloučené do jiného místa
+            place = collection.find_one({'merged_ids': dp_id}, DETAIL_PROJECTION)
+
+        if not place:
+            return jsonify({
+                'error': 'Place not found',
+                'dp_id': dp_id
+            }), 404
+
+        return json_response(place)
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Database error',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/place/<dp_id>/related')
+@cached_response(max_age=300)
+def get_related(dp_id):
+    """
+    Podobná místa a nejbližší restaurace, pivovary a rozhledny k místu
+
+    Seznamy jsou uložené u dokumentu (předpočítá je import, related.py).
+
+    Example:
+        GET /api/place/ZAMKY13/related
+
+    Returns:
+        JSON se seznamy souvisejících míst nebo 404 pokud místo neexistuje
+    """
+    _atlas()
     try:
-        place = collection.find_one({'dp_id': dp_id}, {'_id': 0})
+        place = collection.find_one({'dp_id': dp_id}, RELATED_PROJECTION)
+        if not place:
+            place = collection.find_one({'merged_ids': dp_id}, RELATED_PROJECTION)
 
         if not place:
             return jsonify({
@@ -82,7 +232,11 @@ def get_place(dp_id):
                 'dp_id': dp_id
             }), 404
 
-        return jsonify(place)
+        return json_response({
+            'dp_id': place['dp_id'],
+            'nazev': place.get('nazev'),
+            'related': place.get('related') or {}
+        })
 
     except Exception as e:
         return jsonify({
@@ -92,6 +246,7 @@ def get_place(dp_id):
 
 
 @app.route('/api/places')
+@cached_response()
 def get_all_places():
     """
     Získá všechna místa (s limitem 100)
@@ -102,13 +257,14 @@ def get_all_places():
     Returns:
         JSON array s místy
     """
+    _atlas()
     try:
         limit = request.args.get('limit', default=100, type=int)
         limit = min(limit, 1000)  # Max 1000
 
-        places = list(collection.find({}, {'_id': 0}).limit(limit))
+        places = list(collection.find({}, LIST_PROJECTION).limit(limit))
 
-        return jsonify({
+        return json_response({
             'count': len(places),
             'places': places
         })
@@ -121,6 +277,7 @@ def get_all_places():
 
 
 @app.route('/api/search')
+@cached_response()
 def search_places():
     """
     Vyhledá místa podle názvu
@@ -134,6 +291,7 @@ def search_places():
     Returns:
         JSON array s nalezenými místy
     """
+    _atlas()
     try:
         query = request.args.get('q', '')
 
@@ -146,10 +304,10 @@ def search_places():
         # Case-insensitive regex search
         places = list(collection.find(
             {'nazev': {'$regex': query, '$options': 'i'}},
-            {'_id': 0}
+            LIST_PROJECTION
         ).limit(50))
 
-        return jsonify({
+        return json_response({
             'query': query,
             'count': len(places),
             'places': places
@@ -162,18 +320,139 @@ def search_places():
         }), 500
 
 
+@app.route('/api/suggest')
+@cached_response(max_age=300)
+def suggest_names():
+    """
+    Našeptávač pro vyhledávací pole - volá se při každém stisku klávesy
+
+    Query parameters:
+        ?q=text - Rozepsaný název (bez diakritiky, s překlepy)
+        ?limit=N - Počet návrhů (default 8, max 20)
+
+    Example:
+        GET /api/suggest?q=trutnvo
+
+    Returns:
+        JSON s návrhy (okres / obec / místo) a opraveným dotazem
+    """
+    index = get_suggest_index()  # mimo try: vytížený Atlas -> 503 z limit_clients
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', default=DEFAULT_LIMIT, type=int)
+
+        if not query.strip():
+            return jsonify({
+                'error': 'Missing query parameter',
+                'message': 'Use ?q=search_term'
+            }), 400
+
+        suggestions, corrected = index.suggest(query, limit)
+
+        return jsonify({
+            'query': query,
+            'corrected': corrected,
+            'count': len(suggestions),
+            'suggestions': suggestions
+        })
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Database error',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/facets')
+@cached_response(max_age=300)
+def get_facets():
+    """
+    Počty míst pro filtrovací UI - podle kategorie, okresu, obce a bezbariérovosti
+
+    Query parameters (opakovatelné, hodnoty jednoho filtru = NEBO, různé filtry = A):
+        ?kategorie=hrad - AI kategorie
+        ?okres=Trutnov - Název okresu
+        ?obec=Jičín - Název obce
+        ?bezbarierovost=ano - ano / částečně / ne / nezjištěno
+
+    Example:
+        GET /api/facets?okres=Trutnov&kategorie=hrad&kategorie=zámek
+
+    Returns:
+        JSON s počtem vyhovujících míst a počty pro každou hodnotu filtrů
+    """
+    filters = filters_from_args(request.args)
+    counts = facet_counts(filters)  # mimo try: vytížený Atlas -> 503 z limit_clients
+    return json_response(dict({'filters': filters}, **counts))
+
+
+@app.route('/api/changes')
+@cached_response()
+def get_changes():
+    """
+    Změny katalogu od verze, kterou má klient v lokální kopii
+
+    Query parameters:
+        ?since=N - Verze z poslední synchronizace (bez ní nebo 0 = celý katalog)
+
+    Example:
+        GET /api/changes?since=12
+
+    Returns:
+        JSON s aktuální verzí, změněnými místy (jako /api/places) a dp_id smazaných míst;
+        'full': true znamená nahradit celou kopii
+    """
+    since = request.args.get('since', default=0, type=int)
+    version = catalogue_version()  # mimo try: vytížený Atlas -> 503 z limit_clients
+    _atlas()
+    try:
+        # Neznámá verze (jiné sestavení, katalog bez verzí) -> celý katalog
+        tombstones = client[DATABASE_NAME][TOMBSTONE_COLLECTION] if STORAGE_BACKEND == 'mongo' else None
+        full = not version or since <= 0 or since > version or (tombstones is None and since != version)
+
+        if full:
+            places = list(collection.find({}, LIST_PROJECTION))
+            deleted = []
+        elif since == version:
+            places, deleted = [], []
+        else:
+            places = list(collection.find({'version': {'$gt': since}}, LIST_PROJECTION))
+            deleted = [t['dp_id'] for t in tombstones.find({'version': {'$gt': since}}, {'_id': 0, 'dp_id': 1})]
+
+        return json_response({
+            'version': version,
+            'since': since,
+            'full': full,
+            'count': len(places),
+            'upserted': places,
+            'deleted': deleted
+        })
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Database error',
+            'message': str(e)
+        }), 500
+
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🚀 Spouštím API server...")
     print("="*50)
     print(f"📍 URL: http://localhost:5000")
-    print(f"📊 Database: {DATABASE_NAME}.{COLLECTION_NAME}")
+    print(f"📊 Database: {DATABASE_NAME}.{COLLECTION_NAME} ({STORAGE_BACKEND})")
     print("\nDostupné endpointy:")
     print("  • GET /")
     print("  • GET /api/health")
     print("  • GET /api/place/<dp_id>")
+    print("  • GET /api/place/<dp_id>/related")
     print("  • GET /api/places")
     print("  • GET /api/search?q=text")
+    print("  • GET /api/suggest?q=text")
+    print("  • GET /api/facets?okres=...&kategorie=...")
+    print("  • GET /api/changes?since=<verze>")
+    print("  • GET /metrics")
     print("\n" + "="*50 + "\n")
 
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Vývojový server; v produkci: API_MODE=mongo gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
@@ -6,58 +6,232 @@ Načítá data z lokálních GeoJSON souborů
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import json
 import os
-import glob
+import sys
+import threading
+from itertools import islice
+from types import MappingProxyType
+
+# Sdílené načítání GeoJSON a schéma dokumentů (databaze/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from geojson_loader import (  # noqa: E402
+    BASE_PATH, DATA_DIRECTORY, SOURCE_PREFIX, extract_features, geojson_files, read_geojson_file
+)
+from schema import list_view, slim_document  # noqa: E402
+from dedup import deduplicate  # noqa: E402
+from telemetry import instrument_flask  # noqa: E402
+from throttle import limit_clients  # noqa: E402
+from http_cache import (  # noqa: E402
+    bump_catalogue_version, cached_response, catalogue_version, set_catalogue_version
+)
+from file_watcher import DirectoryWatcher, directory_signature  # noqa: E402
+from serialization import FragmentCache, dumps_with_raw, join_fragments, json_response  # noqa: E402
+from suggest import DEFAULT_LIMIT, SuggestIndex  # noqa: E402
+from facets import FacetIndex, filters_from_args  # noqa: E402
+from related import read_related  # noqa: E402
+from versions import shared_versions  # noqa: E402
 
 app = Flask(__name__)
 CORS(app)  # Povol CORS pro frontend
+instrument_flask(app)  # Časování požadavků + GET /metrics
+limit_clients(app)  # Limit požadavků na klienta (API_RATE_LIMIT), 429 při přetížení
 
-# Cesta k GeoJSON souborům
-GEOJSON_DIR = "../../data HK - rande geojson"
+class Catalogue:
+    """
+    Neměnný snímek načtených míst
 
-# Globální cache pro načtená data
-places_cache = {}
+    Sestaví se celý najednou a pak se už nemění, takže ho vlákna čtou bez
+    zámků a workery forknuté z předem načteného procesu (wsgi.py) ho
+    sdílí copy-on-write.
+    """
 
-def load_all_places():
-    """Načte všechna místa z GeoJSON souborů"""
-    global places_cache
+    def __init__(self, documents, files=0, merged=0, errors=0, signature=None, related=None):
+        """
+        Args:
+            signature: Podpis složky s daty při načtení (file_watcher.directory_signature);
+                bez něj se verze pro /api/changes nesdílí s ostatními procesy
+            related: Předpočítané seznamy souvisejících míst (related.read_related)
+        """
+        places = {}
+        aliases = {}  # dp_id sloučených duplicit -> dp_id kanonického místa
+        for place_data in documents:
+            dp_id = place_data.get('dp_id')
+            if dp_id:
+                places[dp_id] = place_data
+                for merged_id in place_data.get('merged_ids', []):
+                    aliases[merged_id] = dp_id
+
+        self.places = MappingProxyType(places)
+        self.aliases = MappingProxyType(aliases)
+        self.files = files
+        self.merged = merged
+        self.errors = errors  # soubory, které se nepodařilo načíst
+        self.signature = signature  # podle něj worker pozná, že se data od načtení změnila
+
+        # Předserializovaný JSON každého místa - odpovědi se jen skládají z hotových bajtů
+        self.detail_fragments = FragmentCache()
+        self.list_fragments = FragmentCache(list_view)
+        self.detail_fragments.prime(places)
+        self.list_fragments.prime(places)
+
+        # Našeptávač názvů míst, obcí a okresů (odolný vůči překlepům)
+        self.suggest_index = SuggestIndex(places.values())
+
+        # Bitset každé hodnoty filtru (kategorie, okres, obec, bezbariérovost) pro /api/facets
+        self.facets = FacetIndex(places.values())
+
+        # Podobná místa a nejbližší restaurace / pivovary / rozhledny pro /api/place/<dp_id>/related,
+        # spočítané předem (python related.py) - server je jen čte
+        self.related = MappingProxyType(related or {})
+
+        # Verze pro /api/changes (versions.py): místo má verzi katalogu, ve kterém se naposledy změnilo.
+        # Sdílí se souborem, takže všechny workery (i recyklované) hlásí pro stejná data stejná čísla.
+        state = shared_versions(places.values(), signature)
+        self.version = state['version']
+        self.base_version = state['base_version']  # starší verze neznáme
+        self.versions = MappingProxyType(state['versions'])
+        self.tombstones = MappingProxyType(state['tombstones'])
+
+    def get(self, dp_id):
+        """Místo podle dp_id (i dp_id sloučené duplicity)"""
+        return self.places.get(dp_id) or self.places.get(self.aliases.get(dp_id))
+
+    def changes(self, since):
+        """
+        Změny od verze since
+
+        Returns:
+            (full, dp_id změněných míst, dp_id smazaných míst) - full = klient má neznámou
+            verzi (0, z doby před spuštěním serveru, novější) a dostane celý katalog
+        """
+        if since < self.base_version or since > self.version:
+            return True, list(self.places), []
+        upserted = [dp_id for dp_id, (_, version) in self.versions.items() if version > since]
+        deleted = [dp_id for dp_id, version in self.tombstones.items() if version > since]
+        return False, upserted, deleted
+
+
+def read_catalogue(directory_path=DATA_DIRECTORY):
+    """Načte všechna místa z GeoJSON souborů (ve stejném schématu jako MongoDB)"""
+    # Podpis před čtením - soubor změněný během načítání se projeví jako další změna
+    signature = directory_signature(BASE_PATH / directory_path)
+    files = geojson_files(directory_path)
+
+    documents = []
+    errors = 0
+    for filepath in files:
+        try:
+            source_file = f"{SOURCE_PREFIX}/{filepath.name}"
 
-    if places_cache:
-        return places_cache
+            for feature in extract_features(read_geojson_file(filepath), source_file):
+                documents.append(slim_document(feature))
 
-    print("📂 Načítám GeoJSON soubory...")
+        except Exception as e:
+            errors += 1
+            print(f"⚠️  Chyba při načítání {filepath}: {e}")
 
-    geojson_path = os.path.join(os.path.dirname(__file__), GEOJSON_DIR)
-    files = glob.glob(os.path.join(geojson_path, "*.geojson"))
+    # Místa uvedená ve více souborech se sloučí do jednoho
+    documents, sloucenych = deduplicate(documents)
+    return Catalogue(documents, files=len(files), merged=sloucenych, errors=errors, signature=signature,
+                     related=read_related(directory_path, signature))
 
-    total = 0
-    for filepath in files:
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
 
-            source_file = os.path.basename(filepath)
+# Aktuální snímek katalogu (None = ještě nenačten)
+_catalogue = None
+_catalogue_lock = threading.Lock()
 
-            for feature in data.get('features', []):
-                props = feature.get('properties', {})
-                dp_id = props.get('dp_id')
 
-                if dp_id:
-                    # Přidej geometry do properties pro jednodušší práci
-                    place_data = {
-                        **props,
-                        'geometry': feature.get('geometry'),
-                        'source_file': source_file
-                    }
-                    places_cache[dp_id] = place_data
-                    total += 1
+def get_catalogue():
+    """Aktuální katalog; první volání ho načte (jen jednou i při souběžných požadavcích)"""
+    global _catalogue
 
-        except Exception as e:
-            print(f"⚠️  Chyba při načítání {filepath}: {e}")
+    catalogue = _catalogue
+    if catalogue is not None:
+        return catalogue
+
+    with _catalogue_lock:
+        if _catalogue is None:
+            print("📂 Načítám GeoJSON soubory...")
+            catalogue = read_catalogue()
+            print(f"✅ Načteno {len(catalogue.places)} míst z {catalogue.files} souborů "
+                  f"({catalogue.merged} sloučeno z více souborů)")
+            _catalogue = catalogue
+            _use_etag_version(catalogue)
+        return _catalogue
+
+
+def _use_etag_version(catalogue):
+    """ETag podle verze katalogu - stejná data mají ve všech workerech stejný ETag"""
+    if catalogue.signature is None:
+        bump_catalogue_version()  # katalog sestavený z dokumentů (benchmark) - verze se nesdílí
+    else:
+        set_catalogue_version(f"c{catalogue.version}")
+
+
+def set_catalogue(catalogue):
+    """Nahradí katalog jedním přiřazením - běžící požadavky dočtou ten starý"""
+    global _catalogue
 
-    print(f"✅ Načteno {total} míst z {len(files)} souborů")
-    return places_cache
+    with _catalogue_lock:
+        _catalogue = catalogue
+    _use_etag_version(catalogue)
+
+
+def reload_catalogue():
+    """
+    Znovu načte GeoJSON soubory a vymění katalog
+
+    Nový katalog (včetně předserializovaných fragmentů) se staví na pozadí,
+    server mezitím odpovídá ze starého. Když se některý soubor nepodaří
+    načíst (např. je stažený jen napůl), starý katalog zůstane.
+    """
+    print("🔄 Změna dat - načítám katalog znovu...")
+    catalogue = read_catalogue()
+    if catalogue.errors:
+        print(f"⚠️  {catalogue.errors} soubor(ů) se nepodařilo načíst, ponechávám původní katalog")
+        return None
+
+    set_catalogue(catalogue)
+    print(f"✅ Katalog vyměněn: {len(catalogue.places)} míst, verze {catalogue.version} "
+          f"({sum(1 for _, v in catalogue.versions.values() if v == catalogue.version)} změněno, "
+          f"{sum(1 for v in catalogue.tombstones.values() if v == catalogue.version)} smazáno)")
+    return catalogue
+
+
+# Sledování složky s daty (CATALOGUE_WATCH_INTERVAL sekund, 0 = vypnuto)
+WATCH_INTERVAL = float(os.getenv('CATALOGUE_WATCH_INTERVAL', '5'))
+_watcher = None
+
+
+def start_catalogue_watcher(interval=WATCH_INTERVAL):
+    """
+    Spustí hlídání GeoJSON souborů - po změně se katalog načte znovu bez restartu
+
+    Výchozí stav je podpis dat, ze kterých je katalog načtený, ne složka při
+    spuštění hlídání. Worker forknutý z mastera s katalogem z doby startu
+    (recyklace po max_requests) data změněná mezitím načte hned.
+    """
+    global _watcher
+
+    if _watcher is None and interval > 0:
+        catalogue = get_catalogue()
+        directory = BASE_PATH / DATA_DIRECTORY
+        if catalogue.signature is not None and catalogue.signature != directory_signature(directory):
+            catalogue = reload_catalogue() or catalogue
+        _watcher = DirectoryWatcher(directory, reload_catalogue, interval, signature=catalogue.signature).start()
+    return _watcher
+
+
+def load_all_places():
+    """Všechna místa aktuálního katalogu (dp_id -> dokument)"""
+    return get_catalogue().places
+
+
+@app.before_request
+def load_catalogue():
+    """Katalog se načte dřív, než cached_response přečte verzi - i první odpověď má platný ETag"""
+    if request.path.startswith('/api/') and request.path != '/api/health':
+        get_catalogue()
 
 
 @app.route('/')
@@ -70,8 +244,13 @@ def index():
         'total_places': len(places),
         'endpoints': {
             '/api/place/<dp_id>': 'Získat místo podle dp_id',
+            '/api/place/<dp_id>/related': 'Podobná místa a nejbližší restaurace, pivovary a rozhledny',
             '/api/places': 'Získat všechna místa',
-            '/api/health': 'Health check'
+            '/api/suggest?q=text': 'Našeptávač názvů míst, obcí a okresů (i s překlepy)',
+            '/api/facets?okres=...&kategorie=...': 'Počty míst podle kategorie, okresu, obce a bezbariérovosti',
+            '/api/changes?since=<verze>': 'Změněná a smazaná místa od verze katalogu (synchronizace kopie)',
+            '/api/health': 'Health check',
+            '/metrics': 'Latence (p50/p95/p99), počítadla a cache hit rate'
         }
     })
 
@@ -83,11 +262,13 @@ def health():
     return jsonify({
         'status': 'healthy',
         'source': 'local_geojson',
-        'places_loaded': len(places)
+        'places_loaded': len(places),
+        'catalogue_version': catalogue_version.value
     })
 
 
 @app.route('/api/place/<dp_id>')
+@cached_response(max_age=300)  # ETag/304 + předkomprimované tělo
 def get_place(dp_id):
     """
     Získá místo podle dp_id
@@ -99,9 +280,43 @@ def get_place(dp_id):
         JSON s detaily místa nebo 404 pokud neexistuje
     """
     try:
-        places = load_all_places()
+        catalogue = get_catalogue()
+
+        place = catalogue.get(dp_id)
+
+        if not place:
+            return jsonify({
+                'error': 'Place not found',
+                'dp_id': dp_id
+            }), 404
+
+        return json_response(catalogue.detail_fragments.get(place['dp_id'], place))
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Server error',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/place/<dp_id>/related')
+@cached_response(max_age=300)
+def get_related(dp_id):
+    """
+    Podobná místa a nejbližší restaurace, pivovary a rozhledny k místu
+
+    Seznamy jsou předpočítané v souboru vedle dat (python related.py).
+
+    Example:
+        GET /api/place/ZAMKY13/related
+
+    Returns:
+        JSON se seznamy souvisejících míst nebo 404 pokud místo neexistuje
+    """
+    try:
+        catalogue = get_catalogue()
 
-        place = places.get(dp_id)
+        place = catalogue.get(dp_id)
 
         if not place:
             return jsonify({
@@ -109,7 +324,11 @@ def get_place(dp_id):
                 'dp_id': dp_id
             }), 404
 
-        return jsonify(place)
+        return json_response({
+            'dp_id': place['dp_id'],
+            'nazev': place.get('nazev'),
+            'related': catalogue.related.get(place['dp_id'], {})
+        })
 
     except Exception as e:
         return jsonify({
@@ -119,6 +338,7 @@ def get_place(dp_id):
 
 
 @app.route('/api/places')
+@cached_response()
 def get_all_places():
     """
     Získá všechna místa (s limitem)
@@ -133,14 +353,15 @@ def get_all_places():
         limit = request.args.get('limit', default=100, type=int)
         limit = min(limit, 1000)  # Max 1000
 
-        places = load_all_places()
-        places_list = list(places.values())[:limit]
+        catalogue = get_catalogue()
+        places = catalogue.places
+        fragments = [catalogue.list_fragments.get(dp_id, place)
+                     for dp_id, place in islice(places.items(), max(limit, 0))]
 
-        return jsonify({
-            'count': len(places_list),
-            'total': len(places),
-            'places': places_list
-        })
+        return json_response(dumps_with_raw({
+            'count': len(fragments),
+            'total': len(places)
+        }, places=join_fragments(fragments)))
 
     except Exception as e:
         return jsonify({
@@ -150,6 +371,7 @@ def get_all_places():
 
 
 @app.route('/api/search')
+@cached_response()
 def search_places():
     """
     Vyhledá místa podle názvu
@@ -172,18 +394,59 @@ def search_places():
                 'message': 'Use ?q=search_term'
             }), 400
 
-        places = load_all_places()
+        catalogue = get_catalogue()
 
         # Vyhledej v názvech
         results = [
-            place for place in places.values()
-            if query in place.get('nazev', '').lower()
+            catalogue.list_fragments.get(dp_id, place) for dp_id, place in catalogue.places.items()
+            if query in (place.get('nazev') or '').lower()
         ][:50]
 
+        return json_response(dumps_with_raw({
+            'query': query,
+            'count': len(results)
+        }, places=join_fragments(results)))
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Server error',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/suggest')
+@cached_response(max_age=300)
+def suggest_names():
+    """
+    Našeptávač pro vyhledávací pole - volá se při každém stisku klávesy
+
+    Query parameters:
+        ?q=text - Rozepsaný název (bez diakritiky, s překlepy)
+        ?limit=N - Počet návrhů (default 8, max 20)
+
+    Example:
+        GET /api/suggest?q=trutnvo
+
+    Returns:
+        JSON s návrhy (okres / obec / místo) a opraveným dotazem
+    """
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', default=DEFAULT_LIMIT, type=int)
+
+        if not query.strip():
+            return jsonify({
+                'error': 'Missing query parameter',
+                'message': 'Use ?q=search_term'
+            }), 400
+
+        suggestions, corrected = get_catalogue().suggest_index.suggest(query, limit)
+
         return jsonify({
             'query': query,
-            'count': len(results),
-            'places': results
+            'corrected': corrected,
+            'count': len(suggestions),
+            'suggestions': suggestions
         })
 
     except Exception as e:
@@ -193,13 +456,82 @@ def search_places():
         }), 500
 
 
+@app.route('/api/facets')
+@cached_response(max_age=300)
+def get_facets():
+    """
+    Počty míst pro filtrovací UI - podle kategorie, okresu, obce a bezbariérovosti
+
+    Query parameters (opakovatelné, hodnoty jednoho filtru = NEBO, různé filtry = A):
+        ?kategorie=hrad - AI kategorie
+        ?okres=Trutnov - Název okresu
+        ?obec=Jičín - Název obce
+        ?bezbarierovost=ano - ano / částečně / ne / nezjištěno
+
+    Example:
+        GET /api/facets?okres=Trutnov&kategorie=hrad&kategorie=zámek
+
+    Returns:
+        JSON s počtem vyhovujících míst a počty pro každou hodnotu filtrů
+    """
+    try:
+        filters = filters_from_args(request.args)
+        counts = get_catalogue().facets.counts(filters)
+        return json_response(dict({'filters': filters}, **counts))
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Server error',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/changes')
+@cached_response()
+def get_changes():
+    """
+    Změny katalogu od verze, kterou má klient v lokální kopii
+
+    Query parameters:
+        ?since=N - Verze z poslední synchronizace (bez ní nebo 0 = celý katalog)
+
+    Example:
+        GET /api/changes?since=1760870000
+
+    Returns:
+        JSON s aktuální verzí, změněnými místy (jako /api/places) a dp_id smazaných míst;
+        'full': true znamená nahradit celou kopii
+    """
+    try:
+        since = request.args.get('since', default=0, type=int)
+
+        catalogue = get_catalogue()
+        full, upserted, deleted = catalogue.changes(since)
+        fragments = [catalogue.list_fragments.get(dp_id, catalogue.places[dp_id]) for dp_id in upserted]
+
+        return json_response(dumps_with_raw({
+            'version': catalogue.version,
+            'since': since,
+            'full': full,
+            'count': len(fragments),
+            'deleted': deleted
+        }, upserted=join_fragments(fragments)))
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Server error',
+            'message': str(e)
+        }), 500
+
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🚀 Spouštím API server (Local GeoJSON)...")
     print("="*50)
 
-    # Načti data při startu
+    # Načti data při startu a hlídej změny souborů
     places = load_all_places()
+    start_catalogue_watcher()
 
     print(f"📍 URL: http://localhost:5000")
     print(f"📊 Načteno míst: {len(places)}")
@@ -207,8 +539,14 @@ if __name__ == '__main__':
     print("  • GET /")
     print("  • GET /api/health")
     print("  • GET /api/place/<dp_id>")
+    print("  • GET /api/place/<dp_id>/related")
     print("  • GET /api/places")
     print("  • GET /api/search?q=text")
+    print("  • GET /api/suggest?q=text")
+    print("  • GET /api/facets?okres=...&kategorie=...")
+    print("  • GET /api/changes?since=<verze>")
+    print("  • GET /metrics")
     print("\n" + "="*50 + "\n")
 
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    # Vývojový server; v produkci: gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
@@ -79,8 +79,8 @@ function highlightPlace(place) {
         map.removeLayer(highlightedMarker);
     }
 
-    // Získej souřadnice z geometry
-    const coordinates = place.geometry?.coordinates || [15.8325, 50.2099];
+    // Získej souřadnice z bodové polohy
+    const coordinates = place.location?.coordinates || [15.8325, 50.2099];
     const latLng = [coordinates[1], coordinates[0]]; // [lat, lon]
 
     // Detekuj typ místa
@@ -121,19 +121,22 @@ function highlightPlace(place) {
 function showPlaceDetails(place) {
     const placeInfo = document.getElementById('place-info');
 
-    // Zpracuj data z MongoDB
+    // Zpracuj data z MongoDB (specifická pole kategorie jsou v place.detail)
+    const detail = place.detail || {};
     const name = place.nazev || place.dp_id || 'Bez názvu';
-    const description = place.popis || place.zamereni_muzea || 'Žádný popis není k dispozici.';
+    const description = place.popis || detail.zamereni_muzea || 'Žádný popis není k dispozici.';
     const website = place.www || null;
-    const openingHours = place.oteviraci_doba || place.pozn_oteviraci_doba || 'Informace nejsou k dispozici';
+    const openingHours = detail.oteviraci_doba || detail.pozn_oteviraci_doba || 'Informace nejsou k dispozici';
+    const phone = place.kontakt?.telefon?.join(', ');
+    const email = place.kontakt?.email?.join(', ');
 
     // Souřadnice
-    const coords = place.geometry?.coordinates || [0, 0];
+    const coords = place.location?.coordinates || [0, 0];
     const lat = coords[1];
     const lon = coords[0];
 
     // Kategorie/typ
-    const category = place.typ_muzea || place.typ || getPlaceType(place.source_file);
+    const category = detail.typ_muzea || detail.typ || getPlaceType(place.source_file);
 
     // Google Maps URL pro navigaci
     const navigateUrl = `https://www.google.com/maps/dir/?api=1&destination=${lat},${lon}`;
@@ -168,17 +171,17 @@ function showPlaceDetails(place) {
                 <span>${openingHours}</span>
             </div>
 
-            ${place.telefon ? `
+            ${phone ? `
                 <div class="detail-row">
                     <i class="fas fa-phone"></i>
-                    <span>${place.telefon}</span>
+                    <span>${phone}</span>
                 </div>
             ` : ''}
 
-            ${place.email ? `
+            ${email ? `
                 <div class="detail-row">
                     <i class="fas fa-envelope"></i>
-                    <span>${place.email}</span>
+                    <span>${email}</span>
                 </div>
             ` : ''}
 
@@ -0,0 +1,51 @@
+"""
+Konfigurace gunicornu pro API server
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Všechny hodnoty jde přepsat proměnnými prostředí.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# Procesy x vlákna - handlery jsou krátké a jen čtou sdílený katalog
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('THREADS', '4'))
+worker_class = 'gthread'
+
+# Mapa posílá řadu dotazů za sebou - spojení zůstane otevřené
+keepalive = int(os.getenv('KEEPALIVE', '5'))
+timeout = int(os.getenv('TIMEOUT', '30'))
+graceful_timeout = 30
+
+# Lokální katalog se načte jednou před forkem (sdílený copy-on-write).
+# MongoClient není fork-safe, v režimu mongo se proto připojuje každý worker sám.
+preload_app = os.getenv('API_MODE', 'local') != 'mongo'
+
+# Recyklace workerů proti pozvolnému růstu paměti
+max_requests = int(os.getenv('MAX_REQUESTS', '10000'))
+max_requests_jitter = 500
+
+# '-' = access log na stdout, bez nastavení vypnuto
+accesslog = os.getenv('ACCESS_LOG')
+
+# Limit na klienta (API_RATE_LIMIT, výchozí 0 = vypnuto) počítá podle adresy
+# spojení. Za reverzní proxy (nginx, load balancer) by to byla adresa proxy a
+# všichni klienti by sdíleli jeden limit - zapínejte ho proto spolu
+# s TRUSTED_PROXY_HOPS=N, které bere adresu klienta z X-Forwarded-For, jak ji
+# zapsala N-tá proxy od serveru. Bez proxy nechte 0, jinak si klient hlavičkou
+# vybere libovolnou adresu.
+
+
+def post_fork(server, worker):
+    """
+    Vlákna se forkem nepřenáší - hlídání dat spouští každý worker sám
+
+    Master drží katalog z doby startu; worker, který nahradil recyklovaný,
+    si data změněná od té doby načte před prvním požadavkem.
+    """
+    if os.getenv('API_MODE', 'local') != 'mongo':
+        from api_server_local import start_catalogue_watcher
+        start_catalogue_watcher()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+WSGI vstupní bod pro produkční běh API serveru
+
+    gunicorn -c gunicorn.conf.py wsgi:app                  # lokální GeoJSON (API_MODE=local)
+    API_MODE=mongo gunicorn -c gunicorn.conf.py wsgi:app   # api_server.py (MongoDB / SQLite)
+
+V lokálním režimu se katalog načte hned při importu. S preload_app
+(gunicorn.conf.py) se to stane jednou v master procesu před forkem a workery
+ho sdílí copy-on-write; gc.freeze() vyjme načtené objekty z garbage
+collectoru, aby jejich stránky při úklidu nekopíroval.
+"""
+import gc
+import os
+
+API_MODE = os.getenv('API_MODE', 'local')
+
+if API_MODE == 'mongo':
+    from api_server import app  # noqa: F401
+else:
+    from api_server_local import app, get_catalogue  # noqa: F401
+
+    get_catalogue()
+    gc.freeze()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Synthetic national-scale catalogue for load testing
+
+Writes one GeoJSON file per category (same file names and property schema
+as 'data HK - rande geojson') with any number of features, e.g. 100k-10M.
+Schemas, fill rates, value pools and name templates are learned from the
+bundled files; locations come from a model of Czech municipalities:
+
+- 14 regions (kraje) with their districts and PSČ ranges
+- real large cities and the real municipalities of the bundled data
+- thousands of generated villages ('Horní Lhota', 'Kostelec nad Orlicí')
+  with Zipf-distributed population
+- urban categories (restaurants, cinemas, ...) cluster tightly in large
+  towns, nature categories spread wider and more evenly
+
+Features are streamed to disk one by one, and the same seed always produces
+the same files. The output directory works with geojson_loader /
+import_to_mongodb / benchmark.py --data.
+
+Usage:
+    python generate_catalogue.py --features 100000
+    python generate_catalogue.py --features 10000000 --seed 7 --output "/tmp/catalogue 10M"
+"""
+import argparse
+import bisect
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+from dedup import normalize_name
+from geojson_loader import BASE_PATH, DATA_DIRECTORY, geojson_files, read_geojson_file
+
+DEFAULT_OUTPUT = 'data synthetic'
+
+# Czech Republic (lon/lat bounds)
+CZ_BOUNDS = (12.09, 48.55, 18.86, 51.06)
+
+# (code, name, centre, spread in degrees, PSČ prefix, districts)
+KRAJE = [
+    ('CZ010', 'Hlavní město Praha', (14.44, 50.07), 0.08, '1', ['Praha']),
+    ('CZ020', 'Středočeský kraj', (14.55, 49.95), 0.45, '2',
+     ['Benešov', 'Beroun', 'Kladno', 'Kolín', 'Kutná Hora', 'Mělník', 'Mladá Boleslav',
+      'Nymburk', 'Praha-východ', 'Praha-západ', 'Příbram', 'Rakovník']),
+    ('CZ031', 'Jihočeský kraj', (14.45, 49.10), 0.40, '3',
+     ['České Budějovice', 'Český Krumlov', 'Jindřichův Hradec', 'Písek', 'Prachatice',
+      'Strakonice', 'Tábor']),
+    ('CZ032', 'Plzeňský kraj', (13.35, 49.60), 0.35, '3',
+     ['Domažlice', 'Klatovy', 'Plzeň-město', 'Plzeň-jih', 'Plzeň-sever', 'Rokycany', 'Tachov']),
+    ('CZ041', 'Karlovarský kraj', (12.80, 50.20), 0.20, '3', ['Cheb', 'Karlovy Vary', 'Sokolov']),
+    ('CZ042', 'Ústecký kraj', (13.90, 50.55), 0.30, '4',
+     ['Děčín', 'Chomutov', 'Litoměřice', 'Louny', 'Most', 'Teplice', 'Ústí nad Labem']),
+    ('CZ051', 'Liberecký kraj', (15.00, 50.72), 0.20, '4',
+     ['Česká Lípa', 'Jablonec nad Nisou', 'Liberec', 'Semily']),
+    ('CZ052', 'Královéhradecký kraj', (15.80, 50.40), 0.25, '5',
+     ['Hradec Králové', 'Jičín', 'Náchod', 'Rychnov nad Kněžnou', 'Trutnov']),
+    ('CZ053', 'Pardubický kraj', (16.05, 49.90), 0.25, '5',
+     ['Chrudim', 'Pardubice', 'Svitavy', 'Ústí nad Orlicí']),
+    ('CZ063', 'Kraj Vysočina', (15.60, 49.40), 0.30, '5',
+     ['Havlíčkův Brod', 'Jihlava', 'Pelhřimov', 'Třebíč', 'Žďár nad Sázavou']),
+    ('CZ064', 'Jihomoravský kraj', (16.60, 49.05), 0.35, '6',
+     ['Blansko', 'Brno-město', 'Brno-venkov', 'Břeclav', 'Hodonín', 'Vyškov', 'Znojmo']),
+    ('CZ071', 'Olomoucký kraj', (17.20, 49.75), 0.30, '7',
+     ['Jeseník', 'Olomouc', 'Prostějov', 'Přerov', 'Šumperk']),
+    ('CZ072', 'Zlínský kraj', (17.70, 49.15), 0.25, '7',
+     ['Kroměříž', 'Uherské Hradiště', 'Vsetín', 'Zlín']),
+    ('CZ080', 'Moravskoslezský kraj', (18.10, 49.80), 0.30, '7',
+     ['Bruntál', 'Frýdek-Místek', 'Karviná', 'Nový Jičín', 'Opava', 'Ostrava-město']),
+]
+
+# (name, lon, lat, population, region code, district)
+CITIES = [
+    ('Praha', 14.4205, 50.0880, 1300000, 'CZ010', 'Praha'),
+    ('Brno', 16.6068, 49.1951, 380000, 'CZ064', 'Brno-město'),
+    ('Ostrava', 18.2625, 49.8209, 285000, 'CZ080', 'Ostrava-město'),
+    ('Plzeň', 13.3776, 49.7384, 170000, 'CZ032', 'Plzeň-město'),
+    ('Liberec', 15.0543, 50.7663, 104000, 'CZ051', 'Liberec'),
+    ('Olomouc', 17.2509, 49.5938, 100000, 'CZ071', 'Olomouc'),
+    ('České Budějovice', 14.4747, 48.9745, 94000, 'CZ031', 'České Budějovice'),
+    ('Hradec Králové', 15.8327, 50.2104, 92000, 'CZ052', 'Hradec Králové'),
+    ('Ústí nad Labem', 14.0323, 50.6607, 92000, 'CZ042', 'Ústí nad Labem'),
+    ('Pardubice', 15.7812, 50.0343, 91000, 'CZ053', 'Pardubice'),
+    ('Zlín', 17.6667, 49.2265, 74000, 'CZ072', 'Zlín'),
+    ('Havířov', 18.4370, 49.7798, 70000, 'CZ080', 'Karviná'),
+    ('Kladno', 14.1030, 50.1473, 69000, 'CZ020', 'Kladno'),
+    ('Most', 13.6363, 50.5030, 65000, 'CZ042', 'Most'),
+    ('Opava', 17.9027, 49.9387, 56000, 'CZ080', 'Opava'),
+    ('Jihlava', 15.5908, 49.3961, 51000, 'CZ063', 'Jihlava'),
+    ('Karlovy Vary', 12.8712, 50.2319, 48000, 'CZ041', 'Karlovy Vary'),
+    ('Teplice', 13.8245, 50.6404, 49000, 'CZ042', 'Teplice'),
+]
+
+# Village names: (root, gender) combined with adjectives, or standalone names
+NAME_ROOTS = [
+    ('Lhota', 'f'), ('Ves', 'f'), ('Lhotka', 'f'), ('Bystřice', 'f'), ('Lipová', 'f'),
+    ('Březina', 'f'), ('Olešnice', 'f'), ('Horka', 'f'), ('Zahrádka', 'f'), ('Lomnice', 'f'),
+    ('Skalice', 'f'), ('Studnice', 'f'), ('Újezd', 'm'), ('Dvůr', 'm'), ('Mlýn', 'm'),
+    ('Kostelec', 'm'), ('Chlum', 'm'), ('Dub', 'm'), ('Týnec', 'm'), ('Hrádek', 'm'),
+    ('Rybník', 'm'), ('Lom', 'm'), ('Hradiště', 'n'), ('Poříčí', 'n'), ('Podhradí', 'n'),
+    ('Městečko', 'n'), ('Záhoří', 'n'), ('Údolí', 'n'),
+]
+ADJECTIVES = {
+    'f': ['Horní', 'Dolní', 'Nová', 'Stará', 'Velká', 'Malá', 'Česká', 'Zadní'],
+    'm': ['Horní', 'Dolní', 'Nový', 'Starý', 'Velký', 'Malý', 'Český', 'Zadní'],
+    'n': ['Horní', 'Dolní', 'Nové', 'Staré', 'Velké', 'Malé', 'České', 'Zadní'],
+}
+STANDALONE_NAMES = [
+    'Petrovice', 'Radošov', 'Habry', 'Lazce', 'Bukovina', 'Dobrovice', 'Kunratice', 'Vojice',
+    'Sedlec', 'Milovice', 'Bohuslavice', 'Libčany', 'Třebovice', 'Ostrov', 'Lukavice',
+    'Kamenice', 'Vrchovina', 'Černilov', 'Hořiněves', 'Slatina', 'Jablonec', 'Rokytnice',
+    'Mokrovousy', 'Šonov', 'Všestary', 'Pohoří', 'Borovnice', 'Doubravice', 'Smržov', 'Chotěboř',
+]
+SUFFIXES = [
+    'nad Labem', 'nad Orlicí', 'nad Metují', 'nad Sázavou', 'nad Vltavou', 'nad Jizerou',
+    'nad Úpou', 'nad Otavou', 'nad Ohří', 'nad Moravou', 'nad Odrou', 'pod Sněžkou',
+    'u Jičína', 'u Brna', 'u Prahy', 'u Plzně', 'u Tábora', 'u Trutnova', 'u Kolína',
+]
+STREETS = [
+    'Masarykova', 'Husova', 'Palackého', 'Komenského', 'Nádražní', 'Školní', 'Zahradní',
+    'Krátká', 'Polní', 'Tyršova', 'Smetanova', 'Jiráskova', 'Sokolská', 'Havlíčkova',
+    'Nerudova', 'Revoluční', 'Na Výsluní', 'Lesní', 'Luční', 'Příčná', 'Za Kostelem',
+    'náměstí Míru', 'Riegrova', 'Dvořákova', 'Žižkova', 'Svatopluka Čecha', 'Mánesova',
+    'Bezručova', 'Pražská', 'Brněnská', 'Husovo náměstí', 'Masarykovo náměstí',
+]
+TAVERN_NAMES = [
+    'U Nováků', 'U Svobodů', 'U Dvořáků', 'U Černých', 'U Procházků', 'U Kučerů',
+    'U Veselých', 'U Horáků', 'U Němců', 'U Marků', 'U Pokorných', 'U Pospíšilů',
+    'U Zlatého lva', 'U Černého orla', 'U Bílého koníčka', 'U Tří lip', 'U Modré hvězdy',
+    'U Kohouta', 'U Zeleného stromu', 'U Jelena', 'U Fiala', 'U Sedláčků',
+]
+
+# Categories that concentrate in towns; the rest (nature, castles, ...) spread out
+URBAN_CATEGORIES = {
+    'restaurace', 'Kina', 'Divadla a filharmonie', 'Muzea a galerie', 'Hudební kluby a festival parky',
+    'Solné jeskyně', 'Zábavní centra', 'Církevní památky', 'Letní sporty',
+    'Trvalé záštity Rady Královehradeckého kraje (Festivaly)',
+}
+URBAN_SPREAD_DEG = 0.008
+RURAL_SPREAD_DEG = 0.05
+
+DEFAULT_VILLAGES = 6000
+
+# Fields generated from the location / id instead of sampled from the data
+ADMIN_FIELDS = {
+    'nazev_obce', 'kod_obce', 'psc', 'nazev_okresu', 'kod_okresu', 'nazev_orp', 'kod_orp',
+    'nazev_vusc', 'kod_vusc', 'nazev_kraje', 'kod_kraje', 'region',
+}
+TEXT_FIELDS = {'popis', 'popis_akce'}
+
+
+def _is_filled(value):
+    return value not in (None, '', '#N/A', 'N/A')
+
+
+class CategoryProfile:
+    """Schema, fill rates, value pools and name templates of one source file"""
+
+    def __init__(self, name, features):
+        self.name = name
+        self.count = len(features)
+        properties = [f.get('properties') or {} for f in features]
+
+        self.fields = []
+        for p in properties:
+            for key in p:
+                if key not in self.fields:
+                    self.fields.append(key)
+
+        self.fill_rate = {key: sum(1 for p in properties if _is_filled(p.get(key))) / max(len(properties), 1)
+                          for key in self.fields}
+        self.pools = {key: [p[key] for p in properties if _is_filled(p.get(key))] for key in self.fields}
+
+        ids = [str(p.get('dp_id', '')) for p in properties]
+        prefixes = Counter(re.sub(r'\d+$', '', i) for i in ids if i)
+        self.id_prefix = prefixes.most_common(1)[0][0] if prefixes else 'SYN'
+
+        self.sentences = [s.strip() for key in TEXT_FIELDS for text in self.pools.get(key, [])
+                          for s in re.split(r'(?<=[.!?])\s+', str(text)) if len(s.strip()) > 20]
+
+        geometry_types = Counter((f.get('geometry') or {}).get('type', 'Point') for f in features)
+        self.line_share = sum(n for t, n in geometry_types.items() if 'Line' in t) / max(self.count, 1)
+
+        # Name templates: the municipality in a name becomes {obec}, otherwise the leading word is kept
+        self.templates, self.leading_words = [], []
+        for p in properties:
+            nazev, obec = p.get('nazev'), p.get('nazev_obce')
+            if not _is_filled(nazev):
+                continue
+            nazev = str(nazev).strip()
+            if _is_filled(obec) and obec in nazev:
+                self.templates.append(nazev.replace(obec, '{obec}'))
+            else:
+                self.leading_words.append(nazev.split()[0])
+
+    @property
+    def urban(self):
+        return self.name in URBAN_CATEGORIES
+
+
+def load_profiles(directory_path=DATA_DIRECTORY):
+    profiles = []
+    for filepath in geojson_files(directory_path):
+        features = read_geojson_file(filepath).get('features', [])
+        if features:
+            profiles.append(CategoryProfile(filepath.stem, features))
+    return profiles
+
+
+def village_name(rng):
+    roll = rng.random()
+    if roll < 0.4:
+        root, gender = rng.choice(NAME_ROOTS)
+        name = f"{rng.choice(ADJECTIVES[gender])} {root}"
+    elif roll < 0.55:
+        name = rng.choice(NAME_ROOTS)[0]
+    else:
+        name = rng.choice(STANDALONE_NAMES)
+    if rng.random() < 0.15:
+        name = f"{name} {rng.choice(SUFFIXES)}"
+    return name
+
+
+class TownModel:
+    """Municipalities with position, administrative codes and population weight"""
+
+    def __init__(self, seed, villages=DEFAULT_VILLAGES, bundled_features=()):
+        rng = random.Random(f"{seed}-towns")
+        self.kraje = {code: (code, name, centre, spread, psc, okresy)
+                      for code, name, centre, spread, psc, okresy in KRAJE}
+        self.towns = []
+
+        for name, lon, lat, population, kraj, okres in CITIES:
+            self._add(rng, name, lon, lat, population, kraj, okres)
+
+        # Real municipalities of the bundled data (Královéhradecký kraj)
+        positions = defaultdict(list)
+        for feature in bundled_features:
+            p = feature.get('properties') or {}
+            coordinates = (feature.get('geometry') or {}).get('coordinates')
+            if _is_filled(p.get('nazev_obce')) and isinstance(coordinates, list) \
+                    and coordinates and isinstance(coordinates[0], (int, float)):
+                positions[(p['nazev_obce'], p.get('nazev_okresu'))].append(coordinates)
+        known = {town['nazev_obce'] for town in self.towns}
+        for (name, okres), points in sorted(positions.items(), key=lambda item: str(item[0])):
+            if name in known:
+                continue
+            lon = sum(c[0] for c in points) / len(points)
+            lat = sum(c[1] for c in points) / len(points)
+            self._add(rng, name, lon, lat, 500 * len(points), 'CZ052', okres or 'Hradec Králové')
+
+        # Generated villages, Zipf-distributed population
+        weights = [kraj[3] for kraj in KRAJE]
+        for rank in range(1, villages + 1):
+            code, _, (lon, lat), spread, _, okresy = rng.choices(KRAJE, weights=weights)[0]
+            lon = min(max(rng.gauss(lon, spread), CZ_BOUNDS[0]), CZ_BOUNDS[2])
+            lat = min(max(rng.gauss(lat, spread * 0.6), CZ_BOUNDS[1]), CZ_BOUNDS[3])
+            population = max(80, int(40000 / rank ** 0.9))
+            self._add(rng, village_name(rng), lon, lat, population, code, rng.choice(okresy))
+
+        self._cumulative = {}
+
+    def _add(self, rng, name, lon, lat, population, kraj_code, okres):
+        code, kraj_name, _, _, psc_prefix, okresy = self.kraje[kraj_code]
+        okres_index = okresy.index(okres) + 1 if okres in okresy else 1
+        self.towns.append({
+            'nazev_obce': name,
+            'lon': lon,
+            'lat': lat,
+            'population': population,
+            'kod_obce': str(rng.randint(500000, 599999)),
+            'psc': f"{psc_prefix}{rng.randint(0, 9999):04d}",
+            'nazev_okresu': okres,
+            'kod_okresu': f"{code}{okres_index}",
+            'nazev_orp': okres,
+            'kod_orp': f"{code[2:4]}{okres_index:02d}",
+            'nazev_vusc': kraj_name,
+            'kod_vusc': code,
+        })
+
+    def sample(self, rng, exponent):
+        """Town drawn with probability ~ population ** exponent"""
+        cumulative = self._cumulative.get(exponent)
+        if cumulative is None:
+            cumulative, total = [], 0.0
+            for town in self.towns:
+                total += town['population'] ** exponent
+                cumulative.append(total)
+            self._cumulative[exponent] = cumulative
+        return self.towns[bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+
+
+def _slug(text):
+    return normalize_name(text).replace(' ', '-')[:40] or 'misto'
+
+
+def _phone(rng):
+    return f"+420 {rng.randint(200, 799)} {rng.randint(0, 999):03d} {rng.randint(0, 999):03d}"
+
+
+class FeatureGenerator:
+    """Features of one category"""
+
+    def __init__(self, profile, towns, seed):
+        self.profile = profile
+        self.towns = towns
+        self.rng = random.Random(f"{seed}-{profile.name}")
+        self.spread = URBAN_SPREAD_DEG if profile.urban else RURAL_SPREAD_DEG
+        self.exponent = 1.0 if profile.urban else 0.3
+
+    def _name(self, town):
+        profile, rng = self.profile, self.rng
+        obec = town['nazev_obce']
+        use_template = profile.templates and (
+            not profile.leading_words
+            or rng.random() < len(profile.templates) / (len(profile.templates) + len(profile.leading_words)))
+        if use_template:
+            return rng.choice(profile.templates).replace('{obec}', obec)
+        if profile.leading_words:
+            word = rng.choice(profile.leading_words)
+            if profile.name in ('restaurace', 'Pivovary') and rng.random() < 0.4:
+                return f"{rng.choice(['Restaurace', 'Hostinec', 'Pivnice'])} {rng.choice(TAVERN_NAMES)}"
+            return f"{word} {obec}"
+        return None
+
+    def _geometry(self, lon, lat):
+        rng = self.rng
+        if rng.random() < self.profile.line_share:
+            points = [[lon, lat]]
+            for _ in range(rng.randint(2, 8)):
+                points.append([points[-1][0] + rng.uniform(-0.0008, 0.0008),
+                               points[-1][1] + rng.uniform(-0.0005, 0.0005)])
+            return {'type': 'LineString', 'coordinates': points}
+        return {'type': 'Point', 'coordinates': [lon, lat]}
+
+    def _text(self):
+        sentences = self.profile.sentences
+        if not sentences:
+            return None
+        return ' '.join(self.rng.choice(sentences) for _ in range(self.rng.randint(1, 3)))
+
+    def feature(self, n):
+        """n-th feature of the category (1-based)"""
+        profile, rng = self.profile, self.rng
+        town = self.towns.sample(rng, self.exponent)
+        lon = min(max(rng.gauss(town['lon'], self.spread), CZ_BOUNDS[0]), CZ_BOUNDS[2])
+        lat = min(max(rng.gauss(town['lat'], self.spread * 0.6), CZ_BOUNDS[1]), CZ_BOUNDS[3])
+
+        nazev = self._name(town)
+        slug = _slug(nazev or town['nazev_obce'])
+        properties = {}
+        for key in profile.fields:
+            if key not in ('dp_id', 'nazev', 'OBJECTID', 'OBJECTID_1') and key not in ADMIN_FIELDS \
+                    and rng.random() >= profile.fill_rate[key]:
+                properties[key] = None
+                continue
+
+            if key in ('OBJECTID', 'OBJECTID_1'):
+                value = n
+            elif key == 'dp_id':
+                value = f"{profile.id_prefix}{n}"
+            elif key == 'nazev':
+                value = nazev
+            elif key in ADMIN_FIELDS:
+                value = town.get(key)
+                if key == 'nazev_kraje':
+                    value = town['nazev_vusc']
+                elif key in ('kod_kraje', 'region'):
+                    value = town['kod_vusc'] if key == 'kod_kraje' else town['nazev_vusc']
+            elif key == 'ds_id':
+                value = str(rng.randint(100000, 999999))
+            elif key in ('ico', 'ico_poradatele'):
+                value = f"{rng.randint(0, 99999999):08d}"
+            elif key == 'nazev_ulice':
+                value = rng.choice(STREETS)
+            elif key in ('cislo_domovni', 'cislo_popisne', 'cislo_orientacni'):
+                value = str(rng.randint(1, 2500 if key != 'cislo_orientacni' else 80))
+            elif key == 'x':
+                value = round(lon, 7)
+            elif key == 'y':
+                value = round(lat, 7)
+            elif key == 'wkt':
+                value = f"POINT({lat:.7f} {lon:.7f})"
+            elif key.startswith(('telefon', 'mobil', 'fax')):
+                value = _phone(rng)
+            elif key.startswith('email'):
+                value = f"{rng.choice(['info', 'rezervace', 'kontakt', 'pokladna'])}@{slug}.cz"
+            elif key == 'www':
+                value = f"https://www.{slug}.cz"
+            elif key in TEXT_FIELDS:
+                value = self._text()
+            else:
+                pool = profile.pools.get(key)
+                value = rng.choice(pool) if pool else None
+            properties[key] = value
+
+        return {
+            'type': 'Feature',
+            'id': n,
+            'geometry': self._geometry(lon, lat),
+            'properties': properties,
+        }
+
+
+def category_counts(profiles, total):
+    """Features per category in the proportions of the bundled data"""
+    bundled = sum(p.count for p in profiles)
+    counts = {p.name: int(total * p.count / bundled) for p in profiles}
+    largest = max(profiles, key=lambda p: p.count).name
+    counts[largest] += total - sum(counts.values())
+    return counts
+
+
+def write_category(path, generator, count):
+    """Stream a FeatureCollection to disk one feature at a time"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for n in range(1, count + 1):
+            if n > 1:
+                f.write(',\n')
+            f.write(json.dumps(generator.feature(n), ensure_ascii=False, separators=(',', ':')))
+        f.write('\n]}\n')
+
+
+def generate(total, output=DEFAULT_OUTPUT, seed=42, villages=DEFAULT_VILLAGES):
+    """
+    Generate a synthetic catalogue
+
+    Args:
+        total: Number of features over all categories
+        output: Output directory (relative to the project root or absolute)
+        seed: Random seed - the same seed gives the same files
+        villages: Number of generated municipalities
+
+    Returns:
+        Manifest dict (also written as manifest.json)
+    """
+    bundled_features = []
+    for filepath in geojson_files():
+        bundled_features.extend(read_geojson_file(filepath).get('features', []))
+
+    profiles = load_profiles()
+    towns = TownModel(seed, villages, bundled_features)
+    counts = category_counts(profiles, total)
+
+    directory = BASE_PATH / output
+    directory.mkdir(parents=True, exist_ok=True)
+
+    started = time.time()
+    for profile in profiles:
+        count = counts[profile.name]
+        print(f"  {profile.name}: {count} features...", file=sys.stderr)
+        write_category(directory / f"{profile.name}.geojson", FeatureGenerator(profile, towns, seed), count)
+
+    manifest = {
+        'seed': seed,
+        'features': total,
+        'municipalities': len(towns.towns),
+        'categories': counts,
+        'seconds': round(time.time() - started, 1),
+    }
+    with open(directory / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic GeoJSON catalogue')
+    parser.add_argument('--features', type=int, default=100000, help='Total number of features')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--villages', type=int, default=DEFAULT_VILLAGES, help='Generated municipalities')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Output directory (relative to the project root or absolute)')
+    args = parser.parse_args()
+
+    print(f"Generating {args.features} features (seed {args.seed}) into {args.output}...", file=sys.stderr)
+    manifest = generate(args.features, args.output, args.seed, args.villages)
+    print(f"✓ {manifest['features']} features in {manifest['seconds']} s "
+          f"({manifest['municipalities']} municipalities)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
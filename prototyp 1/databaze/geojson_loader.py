@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Read GeoJSON files and turn their features into place documents
+
+Shared by the MongoDB importer and the local SQLite backend so that both
+stores hold the same documents.
+"""
+import json
+from pathlib import Path
+
+from dedup import deduplicate
+from schema import slim_document
+
+# Data directory relative to the project root (one level up from databaze)
+BASE_PATH = Path(__file__).resolve().parent.parent
+DATA_DIRECTORY = 'data HK - rande geojson'
+SOURCE_PREFIX = 'data_hk_rande'
+
+# Baseline category tags per source file. MongoDB Atlas gets richer tags
+# from the AI categorisation; local stores fall back to these so that
+# category searches behave the same on every backend.
+DEFAULT_KATEGORIE = {
+    'Botanické zahrady a arboreta': ['zahrada', 'park', 'příroda', 'klidné', 'romantické'],
+    'Církevní památky': ['církevní', 'památka', 'historické', 'kulturní'],
+    'Divadla a filharmonie': ['divadlo', 'kulturní'],
+    'Golfové hřiště': ['golf', 'sport', 'venkovní', 'aktivní'],
+    'Hrady': ['hrad', 'historické', 'památka', 'kulturní', 'turistika', 'romantické'],
+    'Hudební kluby a festival parky': ['hudba', 'festival', 'kulturní'],
+    'Kina': ['kino', 'kulturní'],
+    'Letní koupání': ['koupání', 'aquapark', 'bazén', 'venkovní', 'sport'],
+    'Letní sporty': ['sport', 'aktivní', 'venkovní'],
+    'Lázně': ['lázně', 'wellness', 'relaxace', 'klidné'],
+    'Muzea a galerie': ['museum', 'galerie', 'kulturní'],
+    'Národní kulturní památky': ['památka', 'historické', 'kulturní'],
+    'Pivovary': ['pivovar', 'restaurace'],
+    'Přírodní zajímavosti': ['příroda', 'venkovní', 'turistika', 'klidné'],
+    'Rozhledny a výhlídky': ['rozhledna', 'výhled', 'venkovní', 'turistika', 'romantické'],
+    'Rybaření': ['rybaření', 'příroda', 'venkovní', 'klidné'],
+    'Solné jeskyně': ['wellness', 'relaxace', 'klidné'],
+    'Technické památky': ['památka', 'historické', 'technické'],
+    'Trvalé záštity Rady Královehradeckého kraje (Festivaly)': ['festival', 'hudba', 'kulturní'],
+    'Zoo a zooparky': ['zoo', 'rodinné', 'venkovní'],
+    'Zábavní centra': ['zábava', 'aktivní', 'rodinné'],
+    'Zámky': ['zámek', 'historické', 'památka', 'kulturní', 'romantické'],
+    'restaurace': ['restaurace'],
+}
+
+
+def read_geojson_file(filepath):
+    """Read and parse a GeoJSON file"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data
+
+
+def extract_features(geojson_data, source_file):
+    """Extract features from GeoJSON and add metadata"""
+    features = []
+
+    if geojson_data.get('type') == 'FeatureCollection':
+        for feature in geojson_data.get('features', []):
+            # Combine geometry and properties into a single document
+            document = {
+                'geometry': feature.get('geometry'),
+                'source_file': source_file,
+                'type': feature.get('type'),
+            }
+
+            # Add all properties to the document
+            properties = feature.get('properties', {})
+            document.update(properties)
+
+            features.append(document)
+
+    return features
+
+
+def category_name(source_file):
+    """Category name from a source_file value ('data_hk_rande/Hrady.geojson' -> 'Hrady')"""
+    return source_file.split('/')[-1].replace('.geojson', '')
+
+
+def default_kategorie(source_file):
+    """Baseline category tags for documents that have no AI categorisation"""
+    return list(DEFAULT_KATEGORIE.get(category_name(source_file), []))
+
+
+def geojson_files(directory_path=DATA_DIRECTORY):
+    """Sorted GeoJSON files of a data directory (relative to the project root)"""
+    directory = BASE_PATH / directory_path
+    if not directory.exists():
+        return []
+    return sorted(directory.glob('*.geojson'))
+
+
+def load_directory(directory_path=DATA_DIRECTORY, source_prefix=SOURCE_PREFIX, with_kategorie=False,
+                   dedupe=True):
+    """
+    Load all documents of a GeoJSON directory in the slim schema
+
+    Args:
+        directory_path: Directory relative to the project root
+        source_prefix: Prefix for the source_file field
+        with_kategorie: Fill in baseline 'kategorie' tags where missing
+        dedupe: Merge places that appear in several files (dedup.py)
+
+    Returns:
+        List of place documents
+    """
+    documents = []
+    for filepath in geojson_files(directory_path):
+        source_file = f"{source_prefix}/{filepath.name}"
+        features = [slim_document(feature) for feature in
+                    extract_features(read_geojson_file(filepath), source_file)]
+        if with_kategorie:
+            for document in features:
+                document.setdefault('kategorie', default_kategorie(source_file))
+        documents.extend(features)
+
+    if dedupe:
+        documents, _ = deduplicate(documents)
+    return documents
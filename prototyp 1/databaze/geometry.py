@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Geometry normalisation stage of the import
+
+Every feature gets:
+- location: representative Point (the point itself, the middle of a line
+  measured along its length, the centroid of a polygon)
+- bbox: [min_lon, min_lat, max_lon, max_lat]
+- geometry: the original geometry simplified for display (Douglas-Peucker)
+
+Spatial indexes then only ever see points. The same module produces the
+geometry validation and statistics report that replaces the ad-hoc checks.
+
+Usage:
+    python geometry.py    # report for the bundled GeoJSON files
+"""
+import math
+from collections import Counter, defaultdict
+
+# ~10 m at the latitude of the Hradec Králové region
+SIMPLIFY_TOLERANCE = 0.0001
+
+# Sanity bounds for the data set (Czech Republic with margin)
+REGION_BOUNDS = (12.0, 48.5, 19.0, 51.1)
+
+GEOMETRY_TYPES = {
+    'Point', 'MultiPoint', 'LineString', 'MultiLineString', 'Polygon', 'MultiPolygon',
+}
+
+
+def _positions(coordinates):
+    """Flatten nested coordinate arrays to [(lon, lat), ...]"""
+    if not isinstance(coordinates, list) or not coordinates:
+        return []
+    if isinstance(coordinates[0], (int, float)):
+        return [(coordinates[0], coordinates[1])] if len(coordinates) >= 2 else []
+    positions = []
+    for item in coordinates:
+        positions.extend(_positions(item))
+    return positions
+
+
+def _lines(geometry):
+    """Coordinate sequences (lines or rings) of a geometry"""
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates') or []
+    if geometry_type == 'LineString':
+        return [coordinates]
+    if geometry_type in ('MultiLineString', 'Polygon'):
+        return list(coordinates)
+    if geometry_type == 'MultiPolygon':
+        return [ring for polygon in coordinates for ring in polygon]
+    return []
+
+
+def _segment_length(a, b):
+    """Planar length in degrees with the longitude scaled by cos(latitude)"""
+    scale = math.cos(math.radians((a[1] + b[1]) / 2))
+    return math.hypot((b[0] - a[0]) * scale, b[1] - a[1])
+
+
+def _line_midpoint(lines):
+    """Point halfway along the total length of the given lines"""
+    segments = [(a, b) for line in lines for a, b in zip(line, line[1:])]
+    total = sum(_segment_length(a, b) for a, b in segments)
+    if total == 0:
+        return list(lines[0][0][:2]) if lines and lines[0] else None
+
+    remaining = total / 2
+    for a, b in segments:
+        length = _segment_length(a, b)
+        if length >= remaining and length > 0:
+            t = remaining / length
+            return [a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t]
+        remaining -= length
+    return list(segments[-1][1][:2])
+
+
+def _ring_centroid(ring):
+    """(area, centroid) of a closed ring (shoelace formula)"""
+    area = cx = cy = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        cross = x1 * y2 - x2 * y1
+        area += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    area /= 2
+    if area == 0:
+        return 0.0, None
+    return area, [cx / (6 * area), cy / (6 * area)]
+
+
+def _polygon_centroid(polygons):
+    """Area-weighted centroid of the outer rings"""
+    weighted = [_ring_centroid([tuple(p[:2]) for p in polygon[0]])
+                for polygon in polygons if polygon and len(polygon[0]) >= 4]
+    weighted = [(abs(area), point) for area, point in weighted if point]
+    total = sum(area for area, _ in weighted)
+    if not total:
+        return None
+    return [sum(area * point[0] for area, point in weighted) / total,
+            sum(area * point[1] for area, point in weighted) / total]
+
+
+def representative_point(geometry):
+    """[lon, lat] representing a geometry or None"""
+    if not isinstance(geometry, dict):
+        return None
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates')
+
+    if geometry_type == 'Point':
+        positions = _positions(coordinates)
+        return list(positions[0]) if positions else None
+    if geometry_type in ('LineString', 'MultiLineString'):
+        lines = [line for line in _lines(geometry) if line]
+        return _line_midpoint(lines) if lines else None
+    if geometry_type in ('Polygon', 'MultiPolygon'):
+        polygons = [coordinates] if geometry_type == 'Polygon' else coordinates
+        point = _polygon_centroid(polygons or [])
+        if point:
+            return point
+
+    positions = _positions(coordinates)
+    if not positions:
+        return None
+    # MultiPoint and degenerate shapes: mean of the vertices
+    return [sum(p[0] for p in positions) / len(positions),
+            sum(p[1] for p in positions) / len(positions)]
+
+
+def bounding_box(geometry):
+    """GeoJSON bbox [min_lon, min_lat, max_lon, max_lat] or None"""
+    if not isinstance(geometry, dict):
+        return None
+    positions = _positions(geometry.get('coordinates'))
+    if not positions:
+        return None
+    xs = [p[0] for p in positions]
+    ys = [p[1] for p in positions]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _perpendicular_distance(point, start, end):
+    if start == end:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    return abs(dy * point[0] - dx * point[1] + end[0] * start[1] - end[1] * start[0]) / math.hypot(dx, dy)
+
+
+def _douglas_peucker(line, tolerance):
+    if len(line) < 3:
+        return list(line)
+    keep = [False] * len(line)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(line) - 1)]
+    while stack:
+        first, last = stack.pop()
+        index, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            distance = _perpendicular_distance(line[i], line[first], line[last])
+            if distance > max_distance:
+                index, max_distance = i, distance
+        if index is not None:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(line, keep) if k]
+
+
+def _simplify_ring(ring, tolerance):
+    simplified = _douglas_peucker(ring, tolerance)
+    # A ring needs at least four positions (closed triangle)
+    return simplified if len(simplified) >= 4 else list(ring)
+
+
+def simplify(geometry, tolerance=SIMPLIFY_TOLERANCE):
+    """Geometry with fewer vertices for display (points are returned unchanged)"""
+    if not isinstance(geometry, dict):
+        return geometry
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates')
+    try:
+        if geometry_type == 'LineString':
+            coordinates = _douglas_peucker(coordinates, tolerance)
+        elif geometry_type == 'MultiLineString':
+            coordinates = [_douglas_peucker(line, tolerance) for line in coordinates]
+        elif geometry_type == 'Polygon':
+            coordinates = [_simplify_ring(ring, tolerance) for ring in coordinates]
+        elif geometry_type == 'MultiPolygon':
+            coordinates = [[_simplify_ring(ring, tolerance) for ring in polygon]
+                           for polygon in coordinates]
+        else:
+            return geometry
+    except (TypeError, IndexError):
+        return geometry
+    return {'type': geometry_type, 'coordinates': coordinates}
+
+
+def validate(geometry):
+    """List of problems with a geometry (empty list = valid)"""
+    if geometry is None:
+        return ['missing geometry']
+    if not isinstance(geometry, dict):
+        return ['geometry is not an object']
+
+    geometry_type = geometry.get('type')
+    if geometry_type not in GEOMETRY_TYPES:
+        return [f'unsupported geometry type {geometry_type}']
+
+    positions = _positions(geometry.get('coordinates'))
+    if not positions:
+        return ['empty coordinates']
+
+    issues = []
+    if any(not (math.isfinite(x) and math.isfinite(y)) for x, y in positions):
+        issues.append('non-finite coordinate')
+    elif any(not (-180 <= x <= 180 and -90 <= y <= 90) for x, y in positions):
+        issues.append('coordinate outside WGS84 range')
+    else:
+        min_x, min_y, max_x, max_y = REGION_BOUNDS
+        if any(min_y <= x <= max_y and min_x <= y <= max_x for x, y in positions) \
+                and not all(min_x <= x <= max_x and min_y <= y <= max_y for x, y in positions):
+            issues.append('coordinates look swapped (lat, lon)')
+        elif not all(min_x <= x <= max_x and min_y <= y <= max_y for x, y in positions):
+            issues.append('coordinate outside the data region')
+
+    for line in _lines(geometry):
+        if len(line) < 2:
+            issues.append('line with fewer than 2 positions')
+            break
+    if geometry_type in ('Polygon', 'MultiPolygon'):
+        for ring in _lines(geometry):
+            if len(ring) < 4 or ring[0] != ring[-1]:
+                issues.append('polygon ring not closed')
+                break
+    return issues
+
+
+def vertex_count(geometry):
+    if not isinstance(geometry, dict):
+        return 0
+    return len(_positions(geometry.get('coordinates')))
+
+
+def normalize_geometry(geometry, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Normalised geometry fields of a place document
+
+    Returns:
+        Dict with 'location' (Point or missing), 'bbox' and 'geometry' (simplified)
+    """
+    normalized = {'geometry': simplify(geometry, tolerance)}
+    point = representative_point(geometry)
+    if point:
+        normalized['location'] = {'type': 'Point', 'coordinates': point}
+    bbox = bounding_box(geometry)
+    if bbox:
+        normalized['bbox'] = bbox
+    return normalized
+
+
+def geometry_report(documents, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Validation and statistics for raw feature documents
+
+    Args:
+        documents: Documents with 'geometry' and 'source_file'
+
+    Returns:
+        Dict with totals, per-type and per-file counts, vertex counts and issues
+    """
+    report = {
+        'total': 0,
+        'types': Counter(),
+        'files': defaultdict(Counter),
+        'vertices': 0,
+        'vertices_simplified': 0,
+        'without_location': 0,
+        'issues': [],
+    }
+    for document in documents:
+        geometry = document.get('geometry')
+        geometry_type = geometry.get('type') if isinstance(geometry, dict) else None
+        report['total'] += 1
+        report['types'][geometry_type] += 1
+        report['files'][document.get('source_file')][geometry_type] += 1
+        report['vertices'] += vertex_count(geometry)
+        report['vertices_simplified'] += vertex_count(simplify(geometry, tolerance))
+        if representative_point(geometry) is None:
+            report['without_location'] += 1
+        for issue in validate(geometry):
+            report['issues'].append((document.get('source_file'), document.get('dp_id'), issue))
+    return report
+
+
+def print_report(report):
+    """Print a geometry report"""
+    print("=" * 60)
+    print("GEOMETRY REPORT")
+    print("=" * 60)
+    print(f"\nFeatures: {report['total']}")
+    print("\nGeometry types:")
+    for geometry_type, count in report['types'].most_common():
+        print(f"  {count:5d} - {geometry_type}")
+
+    print("\nFiles with non-point geometries:")
+    mixed = {f: c for f, c in report['files'].items() if set(c) - {'Point'}}
+    for source_file, counts in sorted(mixed.items(), key=lambda item: str(item[0])):
+        types = ', '.join(f"{t}: {n}" for t, n in counts.most_common())
+        print(f"  - {source_file} ({types})")
+    if not mixed:
+        print("  (none)")
+
+    print(f"\nVertices: {report['vertices']} -> {report['vertices_simplified']} after simplification")
+    print(f"Features without a representative point: {report['without_location']}")
+
+    print(f"\nIssues: {len(report['issues'])}")
+    for source_file, dp_id, issue in report['issues']:
+        print(f"  ⚠ {source_file} {dp_id}: {issue}")
+    print("=" * 60)
+
+
+def main():
+    from geojson_loader import geojson_files, extract_features, read_geojson_file, SOURCE_PREFIX
+
+    documents = []
+    for filepath in geojson_files():
+        documents.extend(extract_features(read_geojson_file(filepath), f"{SOURCE_PREFIX}/{filepath.name}"))
+    print_report(geometry_report(documents))
+
+
+if __name__ == "__main__":
+    main()
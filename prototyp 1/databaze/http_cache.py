@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Response-level HTTP caching for the API servers
+
+    @app.route('/api/place/<dp_id>')
+    @cached_response(max_age=300)
+    def get_place(dp_id): ...
+
+- ETag is the catalogue version: the version of the served data when the
+  server knows one (set_catalogue_version(), same in every worker), else a
+  per-process counter bumped whenever the data changes
+  (bump_catalogue_version()). Each content coding has its own tag
+  ("v", "v-gzip", "v-br"). A request with a matching If-None-Match gets
+  304 without running the view at all.
+- 200 responses are kept in a bounded LRU store keyed by path + sorted
+  query arguments, with the body precompressed (gzip, and brotli when the
+  'brotli' package is installed). Repeat requests just pick the encoding
+  the client accepts.
+- Cache-Control: public, max-age=N; Vary: Accept-Encoding.
+- Concurrent misses of the same key are coalesced: one request renders
+  the view, the others wait for its body (throttle.SingleFlight).
+
+Hits, misses and 304s are counted in telemetry ('http_cache.*').
+"""
+import gzip
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from telemetry import metrics
+from throttle import SingleFlight
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Cached responses (place details and popular list queries)
+CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '2048'))
+
+# Smaller bodies are sent uncompressed
+MIN_COMPRESS_BYTES = 512
+
+DEFAULT_MAX_AGE = 60
+
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+class CatalogueVersion:
+    """
+    Version of the served data
+
+    Either set from the data (the same in every process), or a counter of
+    changes that the process start makes unique across restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boot = format(int(time.time()), 'x')
+        self._counter = 0
+        self._data_version = None
+
+    @property
+    def value(self):
+        if self._data_version is not None:
+            return self._data_version
+        return f"{self._boot}-{self._counter}"
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+            self._data_version = None
+            return self.value
+
+    def set(self, data_version):
+        """Use the version of the data; False when it did not change"""
+        with self._lock:
+            data_version = str(data_version)
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            return True
+
+
+class CachedResponse:
+    """Serialised 200 response with precompressed bodies"""
+
+    def __init__(self, body, mimetype, version):
+        self.mimetype = mimetype
+        self.version = version
+        self.bodies = {'identity': body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.bodies['br'] = brotli.compress(body, quality=5)
+
+    def encoding_for(self, accept_encoding):
+        """Best precomputed encoding the client accepts"""
+        accepted = {part.split(';')[0].strip() for part in (accept_encoding or '').lower().split(',')}
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return 'identity'
+
+
+class ResponseStore:
+    """Thread-safe LRU store of CachedResponse objects"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+catalogue_version = CatalogueVersion()
+response_store = ResponseStore()
+_in_flight = SingleFlight('http_cache.coalesced')
+
+
+def _etag(version, encoding='identity'):
+    """Strong ETag of a catalogue version in one content coding"""
+    return f'"{version}"' if encoding == 'identity' else f'"{version}-{encoding}"'
+
+
+def bump_catalogue_version():
+    """Invalidate all ETags and cached bodies (call after the served data changed)"""
+    version = catalogue_version.bump()
+    response_store.clear()
+    return version
+
+
+def set_catalogue_version(data_version):
+    """Take the ETags from the data version; a new version invalidates the cached bodies"""
+    if catalogue_version.set(data_version):
+        response_store.clear()
+    return catalogue_version.value
+
+
+def _cache_key(request):
+    arguments = '&'.join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    return f"{request.path}?{arguments}"
+
+
+def _matching_etag(if_none_match, version):
+    """The If-None-Match tag of this version (in any coding the client holds), or None"""
+    if not if_none_match:
+        return None
+    etags = {_etag(version, encoding) for encoding in ENCODINGS}
+    for tag in if_none_match.split(','):
+        tag = tag.strip().removeprefix('W/')
+        if tag == '*':
+            return _etag(version)
+        if tag in etags:
+            return tag
+    return None
+
+
+def cached_response(max_age=DEFAULT_MAX_AGE):
+    """Decorator for JSON GET views: ETag/304, Cache-Control and precompressed cached bodies"""
+    from flask import Response, current_app, request
+
+    def _finish(response, etag):
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = catalogue_version.value
+            matched = _matching_etag(request.headers.get('If-None-Match'), version)
+            if matched:
+                metrics.increment('http_cache.not_modified')
+                return _finish(Response(status=304), matched)
+
+            def render():
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = CachedResponse(response.get_data(), response.mimetype, version)
+                response_store.put(key, entry)
+                return entry
+
+            key = _cache_key(request)
+            entry = response_store.get(key)
+            if entry is None or entry.version != version:
+                metrics.increment('http_cache.miss')
+                # Identical concurrent misses wait for one rendering
+                entry, shared = _in_flight.do((key, version), render)
+                if shared and not isinstance(entry, CachedResponse):
+                    # Errors are not shared - the request renders its own response
+                    entry = render()
+                if not isinstance(entry, CachedResponse):
+                    return entry
+            else:
+                metrics.increment('http_cache.hit')
+
+            encoding = entry.encoding_for(request.headers.get('Accept-Encoding'))
+            response = Response(entry.bodies[encoding], mimetype=entry.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+            return _finish(response, _etag(version, encoding))
+        return wrapper
+    return decorator
@@ -2,44 +2,29 @@
 """
 Import all GeoJSON files into MongoDB Atlas
 """
-import json
 import os
 from pathlib import Path
 from pymongo import MongoClient, ASCENDING
 from dotenv import load_dotenv
 
+from geojson_loader import read_geojson_file, extract_features
+from schema import ATTRIBUTE_TYPES, slim_document
+from geometry import geometry_report, print_report
+from dedup import deduplicate
+from facets import SUMMARY_COLLECTION, refresh_summary
+from related import attach_related
+from versions import META_COLLECTION, assign_versions, current_version, record_import, stored_versions
+
 # Load environment variables
 load_dotenv()
 
-def read_geojson_file(filepath):
-    """Read and parse a GeoJSON file"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data
-
-def extract_features(geojson_data, source_file):
-    """Extract features from GeoJSON and add metadata"""
-    features = []
-    
-    if geojson_data.get('type') == 'FeatureCollection':
-        for feature in geojson_data.get('features', []):
-            # Combine geometry and properties into a single document
-            document = {
-                'geometry': feature.get('geometry'),
-                'source_file': source_file,
-                'type': feature.get('type'),
-            }
-            
-            # Add all properties to the document
-            properties = feature.get('properties', {})
-            document.update(properties)
-            
-            features.append(document)
-    
-    return features
+def import_geojson_directory(directory_path, collection, source_prefix, raw_features=None, versions=None):
+    """
+    Import all GeoJSON files from a directory (raw features are collected for the geometry report)
 
-def import_geojson_directory(directory_path, collection, source_prefix):
-    """Import all GeoJSON files from a directory"""
+    versions: (previous, version) - dp_id -> (content_hash, version) of the replaced
+    places and the version of this import; unchanged places keep their version
+    """
     # Adjust path to go up one directory from databaze folder
     base_path = Path(__file__).parent.parent
     directory = base_path / directory_path
@@ -48,7 +33,7 @@ def import_geojson_directory(directory_path, collection, source_prefix):
         print(f"Directory {directory_path} does not exist, skipping...")
         return 0
     
-    total_imported = 0
+    documents = []
     geojson_files = list(directory.glob('*.geojson'))
     
     print(f"\nProcessing {len(geojson_files)} files from {directory_path}...")
@@ -59,21 +44,39 @@ def import_geojson_directory(directory_path, collection, source_prefix):
             geojson_data = read_geojson_file(filepath)
             
             source_file = f"{source_prefix}/{filepath.name}"
-            features = extract_features(geojson_data, source_file)
+            raw = extract_features(geojson_data, source_file)
+            if raw_features is not None:
+                raw_features.extend(raw)
+            # Canonical slim documents (point location, bbox, simplified geometry, contacts, detail)
+            features = [slim_document(f) for f in raw]
             
             if features:
-                # Insert documents
-                result = collection.insert_many(features)
-                imported_count = len(result.inserted_ids)
-                total_imported += imported_count
-                print(f"    ✓ Imported {imported_count} documents")
+                documents.extend(features)
+                print(f"    ✓ Read {len(features)} documents")
             else:
                 print(f"    ⚠ No features found in {filepath.name}")
                 
         except Exception as e:
             print(f"    ✗ Error processing {filepath.name}: {e}")
     
-    return total_imported
+    # Places listed in several files become one document with several source_files
+    documents, merged_groups = deduplicate(documents)
+    print(f"\n  ✓ Merged {merged_groups} places found in several files")
+    
+    if not documents:
+        return 0
+    
+    # Similar places and nearby restaurants / breweries / lookout towers (/api/place/<dp_id>/related)
+    attach_related(documents)
+    print(f"  ✓ Computed related places of {len(documents)} documents")
+    
+    if versions is not None:
+        previous, version = versions
+        changed = assign_versions(documents, previous, version)
+        print(f"  ✓ {changed} new or changed places get catalogue version {version}")
+    
+    result = collection.insert_many(documents)
+    return len(result.inserted_ids)
 
 def main():
     # Get MongoDB connection details from environment
@@ -107,6 +110,10 @@ def main():
     db = client[database_name]
     collection = db[collection_name]
     
+    # Versions of the current places - unchanged places keep theirs (delta sync, /api/changes)
+    previous = stored_versions(collection)
+    version = current_version(db[META_COLLECTION]) + 1
+    
     # Clear existing data (optional - comment out if you want to keep existing data)
     print(f"\nClearing existing data from {database_name}.{collection_name}...")
     result = collection.delete_many({})
@@ -114,49 +121,86 @@ def main():
     
     # Import only from data HK - rande geojson directory
     total = 0
+    raw_features = []
     
     # Import from data HK - rande geojson directory
-    total += import_geojson_directory('data HK - rande geojson', collection, 'data_hk_rande')
+    total += import_geojson_directory('data HK - rande geojson', collection, 'data_hk_rande', raw_features,
+                                      versions=(previous, version))
     
     print("\n" + "=" * 60)
     print(f"TOTAL IMPORTED: {total} documents")
     print("=" * 60)
     
+    # Geometry validation of the source data
+    print()
+    print_report(geometry_report(raw_features))
+    
     # Create indexes for better query performance
     print("\nCreating indexes...")
     
     # Index on dp_id (unique identifier)
     if total > 0:
         # Check if dp_id exists in documents
-        sample_doc = collection.find_one({})
+        sample_doc = collection.find_one({}, {'dp_id': 1, 'ds_id': 1, 'nazev': 1})
         if sample_doc and 'dp_id' in sample_doc:
             collection.create_index([("dp_id", ASCENDING)], unique=False)
             print("✓ Created index on 'dp_id'")
+            # Old dp_id values of merged duplicates still resolve
+            collection.create_index([("merged_ids", ASCENDING)])
+            print("✓ Created index on 'merged_ids'")
         
         # Index on ds_id if it exists
         if sample_doc and 'ds_id' in sample_doc:
             collection.create_index([("ds_id", ASCENDING)])
             print("✓ Created index on 'ds_id'")
         
-        # Geospatial index for location queries
-        collection.create_index([("geometry", "2dsphere")])
-        print("✓ Created geospatial index on 'geometry'")
+        # Category searches: AI tags, or the exact source files of the category ($or of both)
+        collection.create_index([("kategorie", ASCENDING)])
+        collection.create_index([("source_files", ASCENDING)])
+        print("✓ Created indexes on 'kategorie' and 'source_files'")
+        
+        # Geospatial index for location queries (points only)
+        collection.create_index([("location", "2dsphere")])
+        print("✓ Created geospatial index on 'location'")
+        
+        # Changed places since a catalogue version (/api/changes)
+        collection.create_index([("version", ASCENDING)])
+        print("✓ Created index on 'version'")
+        
+        # Typed filter attributes (bezbariérovost, kapacita, ...) - equality and range filters
+        for name in ATTRIBUTE_TYPES:
+            collection.create_index([(f"atributy.{name}", ASCENDING)], sparse=True)
+        print(f"✓ Created indexes on {len(ATTRIBUTE_TYPES)} typed attributes")
         
         # Text index for searching by name
         if sample_doc and 'nazev' in sample_doc:
             collection.create_index([("nazev", "text"), ("popis", "text")])
             print("✓ Created text index on 'nazev' and 'popis'")
     
+    # Precomputed facet counts for /api/facets (the API never scans the places for them)
+    if total > 0:
+        facets_name = os.getenv('FACETS_COLLECTION', SUMMARY_COLLECTION)
+        cells = refresh_summary(collection, db[facets_name])
+        print(f"✓ Rebuilt facet summary {facets_name} ({cells} cells)")
+    
+    # Tombstones of removed places, then the new version (clients sync only after this)
+    if total > 0:
+        current_ids = set(collection.distinct('dp_id'))
+        deleted = set(previous) - current_ids
+        record_import(db, version, deleted, current_ids)
+        print(f"✓ Catalogue version {version} ({len(deleted)} places removed since the previous import)")
+    
     # Display sample query
     print("\n" + "=" * 60)
     print("Sample documents in database:")
     print("=" * 60)
     
-    for doc in collection.find().limit(3):
+    sample_fields = {'nazev': 1, 'dp_id': 1, 'source_file': 1, 'location': 1}
+    for doc in collection.find({}, sample_fields).limit(3):
         print(f"\n{doc.get('nazev', 'No name')}")
         print(f"  dp_id: {doc.get('dp_id', 'N/A')}")
         print(f"  Source: {doc.get('source_file', 'N/A')}")
-        print(f"  Location: {doc.get('geometry', {}).get('coordinates', 'N/A')}")
+        print(f"  Location: {doc.get('location', {}).get('coordinates', 'N/A')}")
     
     # Print connection info
     print("\n" + "=" * 60)
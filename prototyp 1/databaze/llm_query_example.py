@@ -10,6 +10,9 @@ import json
 
 load_dotenv()
 
+# Fields printed by the examples - whole documents are never fetched
+RESULT_FIELDS = {'_id': 0, 'nazev': 1, 'nazev_okresu': 1, 'location': 1, 'source_file': 1}
+
 class DatabaseQueryAgent:
     """Agent that can query the database based on natural language"""
     
@@ -56,13 +59,13 @@ class DatabaseQueryAgent:
     def _find_breweries(self):
         """Find all breweries"""
         query = {"$text": {"$search": "pivovar"}}
-        results = list(self.collection.find(query).limit(5))
+        results = list(self.collection.find(query, RESULT_FIELDS).limit(5))
         
         print("\nMongoDB Query:")
         print(json.dumps(query, indent=2))
         print(f"\nResults: {len(results)} breweries")
         for doc in results:
-            print(f"  - {doc.get('nazev')} ({doc.get('region', 'N/A')})")
+            print(f"  - {doc.get('nazev')} ({doc.get('nazev_okresu', 'N/A')})")
         
         return results
     
@@ -70,20 +73,20 @@ class DatabaseQueryAgent:
         """Find museums"""
         # Can search by source file or text
         query = {"source_file": {"$regex": "Muzea"}}
-        results = list(self.collection.find(query).limit(5))
+        results = list(self.collection.find(query, RESULT_FIELDS).limit(5))
         
         print("\nMongoDB Query:")
         print(json.dumps({"source_file": {"$regex": "Muzea"}}, indent=2))
         print(f"\nResults: {len(results)} museums")
         for doc in results:
-            print(f"  - {doc.get('nazev')} ({doc.get('region', 'N/A')})")
+            print(f"  - {doc.get('nazev')} ({doc.get('nazev_okresu', 'N/A')})")
         
         return results
     
     def _find_near_hradec_kralove(self):
         """Find places near Hradec Králové"""
         query = {
-            "geometry": {
+            "location": {
                 "$near": {
                     "$geometry": {
                         "type": "Point",
@@ -93,13 +96,13 @@ class DatabaseQueryAgent:
                 }
             }
         }
-        results = list(self.collection.find(query).limit(5))
+        results = list(self.collection.find(query, RESULT_FIELDS).limit(5))
         
         print("\nMongoDB Query:")
         print(json.dumps(query, indent=2))
         print(f"\nResults: {len(results)} places within 10km")
         for doc in results:
-            coords = doc.get('geometry', {}).get('coordinates', [])
+            coords = doc.get('location', {}).get('coordinates', [])
             print(f"  - {doc.get('nazev')} at {coords}")
         
         return results
@@ -107,39 +110,39 @@ class DatabaseQueryAgent:
     def _find_castles(self):
         """Find castles and fortresses"""
         query = {"source_file": {"$regex": "Hrady|Zámky"}}
-        results = list(self.collection.find(query).limit(5))
+        results = list(self.collection.find(query, RESULT_FIELDS).limit(5))
         
         print("\nMongoDB Query:")
         print(json.dumps({"source_file": {"$regex": "Hrady|Zámky"}}, indent=2))
         print(f"\nResults: {len(results)} castles")
         for doc in results:
-            print(f"  - {doc.get('nazev')} ({doc.get('region', 'N/A')})")
+            print(f"  - {doc.get('nazev')} ({doc.get('nazev_okresu', 'N/A')})")
         
         return results
     
     def _find_sports(self):
         """Find sports activities"""
         query = {"source_file": {"$regex": "sport|koupání"}}
-        results = list(self.collection.find(query).limit(5))
+        results = list(self.collection.find(query, RESULT_FIELDS).limit(5))
         
         print("\nMongoDB Query:")
         print(json.dumps({"source_file": {"$regex": "sport|koupání"}}, indent=2))
         print(f"\nResults: {len(results)} sports activities")
         for doc in results:
-            print(f"  - {doc.get('nazev')} ({doc.get('region', 'N/A')})")
+            print(f"  - {doc.get('nazev')} ({doc.get('nazev_okresu', 'N/A')})")
         
         return results
     
     def _text_search(self, query_text):
         """Generic text search"""
         query = {"$text": {"$search": query_text}}
-        results = list(self.collection.find(query).limit(5))
+        results = list(self.collection.find(query, RESULT_FIELDS).limit(5))
         
         print("\nMongoDB Query:")
         print(json.dumps(query, indent=2))
         print(f"\nResults: {len(results)} matches")
         for doc in results:
-            print(f"  - {doc.get('nazev')} ({doc.get('region', 'N/A')})")
+            print(f"  - {doc.get('nazev')} ({doc.get('nazev_okresu', 'N/A')})")
         
         return results
     
@@ -9,6 +9,10 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Only the fields printed below are fetched
+DETAIL_FIELDS = {'_id': 0, 'nazev': 1, 'popis': 1, 'location': 1, 'source_file': 1}
+LIST_FIELDS = {'_id': 0, 'nazev': 1, 'dp_id': 1, 'source_file': 1}
+
 def main():
     mongodb_uri = os.getenv('MONGODB_URI')
     database_name = os.getenv('DATABASE_NAME', 'hackathon_hk')
@@ -35,12 +39,12 @@ def main():
     
     dp_id = input("Enter dp_id to search (or press Enter to skip): ").strip()
     if dp_id:
-        result = collection.find_one({'dp_id': dp_id})
+        result = collection.find_one({'dp_id': dp_id}, DETAIL_FIELDS)
         if result:
             print(f"\nFound:")
             print(f"  Name: {result.get('nazev', 'N/A')}")
             print(f"  Description: {result.get('popis', 'N/A')}")
-            print(f"  Location: {result.get('geometry', {}).get('coordinates', 'N/A')}")
+            print(f"  Location: {result.get('location', {}).get('coordinates', 'N/A')}")
             print(f"  Source: {result.get('source_file', 'N/A')}")
         else:
             print(f"No document found with dp_id: {dp_id}")
@@ -52,7 +56,9 @@ def main():
     
     search_term = input("Enter search term (or press Enter to skip): ").strip()
     if search_term:
-        results = collection.find({'nazev': {'$regex': search_term, '$options': 'i'}}).limit(10)
+        results = collection.find(
+            {'nazev': {'$regex': search_term, '$options': 'i'}}, LIST_FIELDS
+        ).limit(10)
         count = 0
         for doc in results:
             count += 1
@@ -68,7 +74,7 @@ def main():
     print("Sample Documents (first 5):")
     print("="*60)
     
-    for i, doc in enumerate(collection.find().limit(5), 1):
+    for i, doc in enumerate(collection.find({}, LIST_FIELDS).limit(5), 1):
         print(f"\n{i}. {doc.get('nazev', 'N/A')}")
         print(f"   dp_id: {doc.get('dp_id', 'N/A')}")
         print(f"   Source: {doc.get('source_file', 'N/A')}")
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Precomputed related places: similar places and nearby complements
+
+    attach_related(documents)      # sets document['related'] in place
+    document['related'] == {
+        'podobna':    [{'dp_id', 'nazev', 'nazev_obce', 'druh', 'skore'}, ...],
+        'restaurace': [{'dp_id', 'nazev', 'nazev_obce', 'druh', 'vzdalenost_m'}, ...],
+        'pivovary':   [...],
+        'rozhledny':  [...],
+    }
+
+The lists are computed offline, so "something similar" and "where to eat
+nearby" after picking a place are a single lookup by dp_id instead of a
+new search:
+
+- MongoDB: the importer stores them in the documents ('related'),
+- local data: `python related.py` writes them to RELATED_FILE in the data
+  directory, keyed by the directory signature; the SQLite build and the
+  local API server only read that file (read_related) and never compute.
+
+- similar: cosine similarity of TF-IDF vectors over the folded words of
+  the name (weighted more) and description, the category tags and the
+  source category. Candidates come from an inverted index of the rarer
+  terms; the common ones (in more than MAX_POSTINGS places, mostly tags)
+  are added to the scores of the best SIMILAR_CANDIDATES only. A place
+  with only common terms takes its candidates from the rarest of them.
+- nearby complements: places tagged restaurace / pivovar / rozhledna in
+  a spatial grid, searched ring by ring outwards until the k nearest are
+  certain (or MAX_NEARBY_M is reached).
+
+Usage:
+    python related.py                          # lists of the bundled data + the configured store
+    python related.py "data synthetic"         # lists of another GeoJSON directory
+"""
+import heapq
+import json
+import math
+import os
+from collections import Counter
+
+from dedup import normalize_name
+from file_watcher import directory_signature
+from geojson_loader import BASE_PATH, DATA_DIRECTORY, category_name, default_kategorie, load_directory
+from versions import signature_key
+
+# Precomputed lists of a local data directory (next to its GeoJSON files)
+RELATED_FILE = 'related.json'
+
+# Places per list
+SIMILAR_COUNT = 5
+NEARBY_COUNT = 5
+
+# List name -> category tag of the complementary places
+COMPLEMENTS = {
+    'restaurace': 'restaurace',
+    'pivovary': 'pivovar',
+    'rozhledny': 'rozhledna',
+}
+SIMILAR = 'podobna'
+
+# Complements further away are not "nearby" (the chatbot's default search radius)
+MAX_NEARBY_M = 20000
+
+# Term weights and candidate generation
+NAME_WEIGHT = 2.0
+MIN_WORD_LENGTH = 3
+MAX_POSTINGS = 500
+SIMILAR_CANDIDATES = 50
+
+# Grid cell in degrees (about 5.5 km in the region)
+CELL_LAT = 0.05
+CELL_LON = 0.08
+
+R_EARTH_M = 6378100
+METERS_PER_DEGREE = math.pi * R_EARTH_M / 180
+
+
+def _point(document):
+    coordinates = (document.get('location') or {}).get('coordinates')
+    if isinstance(coordinates, list) and len(coordinates) >= 2:
+        return coordinates[0], coordinates[1]
+    return None
+
+
+def _distance_m(a, b):
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * R_EARTH_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _source_files(document):
+    return document.get('source_files') or ([document['source_file']] if document.get('source_file') else [])
+
+
+def _tags(document):
+    """Category tags (AI categorisation, or the baseline tags of the source files)"""
+    kategorie = document.get('kategorie')
+    if not kategorie:
+        kategorie = [tag for source_file in _source_files(document) for tag in default_kategorie(source_file)]
+    return set(kategorie if isinstance(kategorie, list) else [kategorie])
+
+
+def _entry(document):
+    source_files = _source_files(document)
+    entry = {'dp_id': document['dp_id'], 'nazev': document.get('nazev')}
+    if document.get('nazev_obce'):
+        entry['nazev_obce'] = document['nazev_obce']
+    if source_files:
+        entry['druh'] = category_name(source_files[0])
+    return entry
+
+
+def _terms(document):
+    """Term -> weight before IDF (words of name and description, tags, source categories)"""
+    # The municipality in the name (Zámek Dětenice) says where, not what kind of place
+    town = set(normalize_name(document.get('nazev_obce')).split())
+    terms = Counter()
+    for word in normalize_name(document.get('nazev')).split():
+        if len(word) >= MIN_WORD_LENGTH and word not in town:
+            terms[word] += NAME_WEIGHT
+    for word in normalize_name(document.get('popis')).split():
+        if len(word) >= MIN_WORD_LENGTH and word not in town:
+            terms[word] += 1
+    for tag in _tags(document):
+        terms['#' + normalize_name(tag)] += 1
+    for source_file in _source_files(document):
+        terms['@' + category_name(source_file)] += 1
+    return terms
+
+
+def _vectors(documents):
+    """L2-normalised TF-IDF vector (term -> weight) of each document"""
+    raw = [_terms(document) for document in documents]
+    df = Counter(term for terms in raw for term in terms)
+    n = len(documents)
+    vectors = []
+    for terms in raw:
+        vector = {term: (1 + math.log(weight)) * math.log(1 + n / df[term]) for term, weight in terms.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        vectors.append({term: w / norm for term, w in vector.items()})
+    return vectors
+
+
+def similar_places(documents, k=SIMILAR_COUNT):
+    """
+    k most similar places of each document
+
+    Returns:
+        List (parallel to documents) of [(index, score), ...] best first
+    """
+    vectors = _vectors(documents)
+    postings = {}
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            postings.setdefault(term, []).append((index, weight))
+
+    result = []
+    for index, vector in enumerate(vectors):
+        # Partial dot products over the rarer terms pick the candidates ...
+        partial = Counter()
+        common = []
+        for term, weight in vector.items():
+            posting = postings[term]
+            if len(posting) > MAX_POSTINGS:
+                common.append((term, weight))
+                continue
+            for other, other_weight in posting:
+                partial[other] += weight * other_weight
+        partial.pop(index, None)
+
+        if not partial and common:
+            # Only common terms (e.g. just the category tags) - the rarest one picks the candidates
+            common.sort(key=lambda item: len(postings[item[0]]))
+            (term, weight), common = common[0], common[1:]
+            for other, other_weight in postings[term]:
+                partial[other] += weight * other_weight
+            partial.pop(index, None)
+
+        # ... and the common terms complete their scores
+        scored = []
+        for other, score in partial.most_common(SIMILAR_CANDIDATES):
+            other_vector = vectors[other]
+            scored.append((score + sum(w * other_vector.get(term, 0.0) for term, w in common), other))
+        result.append([(other, score) for score, other in heapq.nlargest(k, scored, key=lambda s: (s[0], -s[1]))])
+    return result
+
+
+class _Grid:
+    """Points in grid cells, searched ring by ring for the nearest ones"""
+
+    def __init__(self, points):
+        self.cells = {}
+        for index, point in points:
+            self.cells.setdefault(self._cell(point), []).append((index, point))
+        latitudes = [abs(point[1]) for _, point in points] or [0.0]
+        # Smallest cell side - a ring r cells away is at least r * cell_m from the query
+        self.cell_m = min(CELL_LAT, CELL_LON * math.cos(math.radians(max(latitudes)))) * METERS_PER_DEGREE
+
+    @staticmethod
+    def _cell(point):
+        return int(math.floor(point[0] / CELL_LON)), int(math.floor(point[1] / CELL_LAT))
+
+    def _ring(self, cell, r):
+        x, y = cell
+        if r == 0:
+            yield cell
+            return
+        for dx in range(-r, r + 1):
+            yield x + dx, y - r
+            yield x + dx, y + r
+        for dy in range(-r + 1, r):
+            yield x - r, y + dy
+            yield x + r, y + dy
+
+    def nearest(self, point, k, max_m, exclude=None):
+        """[(distance_m, index), ...] of the k nearest points within max_m"""
+        if not self.cells:
+            return []
+        cell = self._cell(point)
+        found = []
+        r = 0
+        while True:
+            for key in self._ring(cell, r):
+                for index, other in self.cells.get(key, ()):
+                    if index != exclude:
+                        distance = _distance_m(point, other)
+                        if distance <= max_m:
+                            found.append((distance, index))
+            # Everything outside the scanned rings is further than r cells
+            reach = r * self.cell_m
+            found = heapq.nsmallest(k, found)
+            if reach >= max_m or (len(found) == k and found[-1][0] <= reach):
+                return found
+            r += 1
+
+
+def related_lists(documents, k=SIMILAR_COUNT, nearby=NEARBY_COUNT, max_nearby_m=MAX_NEARBY_M):
+    """
+    Related lists of every document with a dp_id
+
+    Returns:
+        dp_id -> {'podobna': [...], 'restaurace': [...], ...} (empty lists left out)
+    """
+    documents = [document for document in documents if document.get('dp_id')]
+    similar = similar_places(documents, k)
+
+    points = [_point(document) for document in documents]
+    tags = [_tags(document) for document in documents]
+    grids = {
+        name: _Grid([(i, points[i]) for i in range(len(documents)) if tag in tags[i] and points[i]])
+        for name, tag in COMPLEMENTS.items()
+    }
+
+    result = {}
+    for index, document in enumerate(documents):
+        related = {}
+        if similar[index]:
+            related[SIMILAR] = [dict(_entry(documents[other]), skore=round(score, 3))
+                                for other, score in similar[index]]
+        if points[index]:
+            for name, grid in grids.items():
+                closest = grid.nearest(points[index], nearby, max_nearby_m, exclude=index)
+                if closest:
+                    related[name] = [dict(_entry(documents[other]), vzdalenost_m=round(distance))
+                                     for distance, other in closest]
+        result[document['dp_id']] = related
+    return result
+
+
+def attach_related(documents):
+    """Store the related lists in the documents themselves (field 'related')"""
+    lists = related_lists(documents)
+    for document in documents:
+        if document.get('dp_id'):
+            document['related'] = lists[document['dp_id']]
+    return documents
+
+
+def related_path(directory_path=DATA_DIRECTORY):
+    return BASE_PATH / directory_path / RELATED_FILE
+
+
+def write_related(lists, directory_path=DATA_DIRECTORY, signature=None):
+    """Store the lists of a data directory (signature taken before its files were read)"""
+    path = related_path(directory_path)
+    if signature is None:
+        signature = directory_signature(BASE_PATH / directory_path)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump({'key': signature_key(signature), 'related': lists}, f, ensure_ascii=False)
+    os.replace(temporary, path)
+    return path
+
+
+def read_related(directory_path=DATA_DIRECTORY, signature=None):
+    """
+    Precomputed lists of a data directory
+
+    Returns:
+        dp_id -> lists ({} when the file is missing); lists of older data are
+        still used (removed places just have none), with a warning
+    """
+    path = related_path(directory_path)
+    try:
+        with open(path, encoding='utf-8') as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        print(f"⚠️  No related places in {path} - run `python related.py`")
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Related places {path} not readable: {e}")
+        return {}
+    if signature is None:
+        signature = directory_signature(BASE_PATH / directory_path)
+    if stored.get('key') != signature_key(signature):
+        print(f"⚠️  Related places in {path} are from older data - run `python related.py`")
+    return stored.get('related', {})
+
+
+def attach_precomputed(documents, directory_path=DATA_DIRECTORY):
+    """Store the lists read from the data directory in the documents (field 'related')"""
+    lists = read_related(directory_path)
+    for document in documents:
+        if document.get('dp_id'):
+            document['related'] = lists.get(document['dp_id'], {})
+    return documents
+
+
+def main():
+    import sys
+    import time
+
+    from storage import StorageError, connect, get_backend
+
+    # Local data: lists next to the GeoJSON files (local API server, SQLite build)
+    directory_path = sys.argv[1] if len(sys.argv) > 1 else DATA_DIRECTORY
+    started = time.perf_counter()
+    signature = directory_signature(BASE_PATH / directory_path)
+    lists = related_lists(load_directory(directory_path, with_kategorie=True))
+    path = write_related(lists, directory_path, signature)
+    print(f"✓ Related places of {len(lists)} places in {path} ({time.perf_counter() - started:.1f} s)")
+
+    backend = get_backend()
+    if backend == 'sqlite':
+        # The SQLite file is built from the GeoJSON files; a rebuild reads the new lists
+        from sqlite_store import DEFAULT_PATH, build_database
+        collection = build_database(DEFAULT_PATH)
+        print(f"✓ Rebuilt {DEFAULT_PATH} ({collection.count_documents({})} places)")
+        collection.close()
+        return
+    if len(sys.argv) > 1:
+        return  # another directory is not what MongoDB holds
+
+    from pymongo import UpdateOne
+
+    try:
+        client, collection = connect(backend)
+    except StorageError as e:
+        print(f"⚠️  MongoDB not updated: {e}")
+        return
+    started = time.perf_counter()
+    documents = list(collection.find({}, {'_id': 0, 'related': 0, 'geometry': 0, 'detail': 0}))
+    lists = related_lists(documents)
+    if lists:
+        collection.bulk_write([UpdateOne({'dp_id': dp_id}, {'$set': {'related': related}})
+                               for dp_id, related in lists.items()], ordered=False)
+    print(f"✓ Related places of {len(lists)} places ({time.perf_counter() - started:.1f} s)")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Canonical (slim) place document and the projections used by read paths
+
+Raw GeoJSON properties differ per source file and carry redundant data
+(wkt, x/y, OBJECTID, up to eight phone/fax/e-mail columns). At import every
+feature is turned into one shape:
+
+    {
+        "dp_id", "ds_id", "nazev", "popis", "source_file", "kategorie",
+        "source_files": [...], "merged_ids": [...],
+        "location": {"type": "Point", "coordinates": [lon, lat]},
+        "bbox": [min_lon, min_lat, max_lon, max_lat],
+        "geometry": <simplified geometry, for display>,
+        "nazev_okresu", "nazev_obce", "nazev_orp", "nazev_ulice",
+        "cislo_domovni", "cislo_orientacni", "psc", "www", "bezbarierovost",
+        "kontakt": {"telefon": [...], "email": [...], "fax": [...]},
+        "atributy": {<typed filter attributes, see ATTRIBUTE_TYPES>},
+        "detail": {<category specific properties>}
+    }
+
+location/bbox/geometry come from the geometry normalisation stage
+(geometry.py), so spatial indexes only ever see points. source_files and
+merged_ids are filled when cross-file duplicates are merged (dedup.py).
+atributy holds the filterable properties in one typed form ('ANO' / 'ne'
+-> bool, '300' -> 300), the raw values stay where they were.
+"""
+import unicodedata
+
+from geometry import normalize_geometry
+
+# Top-level fields of the slim document
+CORE_FIELDS = [
+    'dp_id', 'ds_id', 'nazev', 'popis', 'source_file', 'kategorie',
+    'nazev_okresu', 'nazev_obce', 'nazev_orp', 'nazev_ulice',
+    'cislo_domovni', 'cislo_orientacni', 'psc', 'www', 'bezbarierovost',
+]
+
+# Redundant fields dropped at import (wkt/x/y duplicate the geometry)
+DROPPED_FIELDS = {'wkt', 'x', 'y', 'OBJECTID', 'OBJECTID_1', 'type'}
+
+# Contact columns per kind - files use telefon, telefon_1..3, mobil_1..3, ...
+CONTACT_FIELDS = {
+    'telefon': ['telefon', 'telefon_1', 'telefon_2', 'telefon_3', 'mobil_1', 'mobil_2', 'mobil_3'],
+    'email': ['email', 'email_1', 'email_2', 'email_3'],
+    'fax': ['fax'],
+}
+
+# Alternative spellings of core fields in some source files
+FIELD_ALIASES = {
+    'bezbariérovost': 'bezbarierovost',
+}
+
+# Fallbacks for files without a 'nazev' column (Lázně)
+NAME_FALLBACKS = ['poskytovatel', 'druh_zarizeni', 'provozovatel']
+
+# Values treated as missing
+EMPTY_STRINGS = {'', '#N/A', 'N/A'}
+
+# Typed filter attributes: name in 'atributy' -> (source property, type)
+#   enum - normalised accessibility ('ano', 'částečně', 'ne')
+#   bool - ano / ne
+#   int  - whole number
+#   tags - comma separated list ('historické, umělecké')
+ATTRIBUTE_TYPES = {
+    'bezbarierovost': ('bezbarierovost', 'enum'),
+    'verejne': ('verejne_hriste', 'bool'),
+    'kapacita': ('kapacita', 'int'),
+    'pocet_salu': ('pocet_salu', 'int'),
+    'pocet_jamek': ('pocet_jamek', 'int'),
+    'typ_kina': ('typ_kina', 'tags'),
+    'typ_muzea': ('typ_muzea', 'tags'),
+}
+
+# Accessibility spellings (diacritics folded) -> normalised value
+ACCESSIBILITY_VALUES = {'ano': 'ano', 'ne': 'ne', 'castecne': 'částečně'}
+
+# Projection for list endpoints (map markers, search results)
+LIST_PROJECTION = {
+    '_id': 0,
+    'dp_id': 1,
+    'nazev': 1,
+    'source_file': 1,
+    'source_files': 1,
+    'kategorie': 1,
+    'location': 1,
+    'nazev_obce': 1,
+    'nazev_okresu': 1,
+}
+
+# Projection for a place detail (everything but the internal id and the related lists, related.py)
+DETAIL_PROJECTION = {'_id': 0, 'related': 0}
+
+# Projection for the precomputed related places of a place
+RELATED_PROJECTION = {'_id': 0, 'dp_id': 1, 'nazev': 1, 'related': 1}
+
+
+def is_empty(value):
+    return value is None or (isinstance(value, str) and value.strip() in EMPTY_STRINGS)
+
+
+def _contact_values(properties, fields):
+    values = []
+    for field in fields:
+        value = properties.get(field)
+        if is_empty(value):
+            continue
+        value = str(value).strip()
+        if value and value not in values:
+            values.append(value)
+    return values
+
+
+def _fold(value):
+    folded = unicodedata.normalize('NFKD', str(value).strip().lower())
+    return ''.join(c for c in folded if not unicodedata.combining(c))
+
+
+def accessibility(value):
+    """Normalised accessibility 'ano', 'částečně' or 'ne' (None when unknown)"""
+    return ACCESSIBILITY_VALUES.get(_fold(value)) if not is_empty(value) else None
+
+
+def _typed(value, kind):
+    if is_empty(value):
+        return None
+    if kind == 'enum':
+        return accessibility(value)
+    if kind == 'bool':
+        return {'ano': True, 'ne': False}.get(_fold(value))
+    if kind == 'int':
+        try:
+            return int(float(str(value).replace(',', '.').strip()))
+        except ValueError:
+            return None
+    tags = [tag.strip() for tag in str(value).split(',') if tag.strip()]
+    return tags or None
+
+
+def typed_attributes(properties):
+    """
+    Filter attributes of a feature in their typed form
+
+    Returns:
+        Attribute name -> value (unknown or unparsable values are left out)
+    """
+    attributes = {}
+    for name, (field, kind) in ATTRIBUTE_TYPES.items():
+        value = _typed(properties.get(field), kind)
+        if value is not None:
+            attributes[name] = value
+    return attributes
+
+
+def slim_document(document):
+    """
+    Turn a raw feature document into the canonical slim shape
+
+    Args:
+        document: Document from geojson_loader.extract_features
+
+    Returns:
+        Slim document (the input is not modified)
+    """
+    properties = {FIELD_ALIASES.get(k, k): v for k, v in document.items()}
+    contact_columns = {f for fields in CONTACT_FIELDS.values() for f in fields}
+
+    slim = {}
+    for field in CORE_FIELDS:
+        value = properties.get(field)
+        if not is_empty(value):
+            slim[field] = value.strip() if isinstance(value, str) else value
+
+    if 'nazev' not in slim:
+        for field in NAME_FALLBACKS:
+            if not is_empty(properties.get(field)):
+                slim['nazev'] = properties[field]
+                break
+
+    if 'source_file' in slim:
+        slim['source_files'] = [slim['source_file']]
+
+    slim.update(normalize_geometry(properties.get('geometry')))
+
+    kontakt = {}
+    for kind, fields in CONTACT_FIELDS.items():
+        values = _contact_values(properties, fields)
+        if values:
+            kontakt[kind] = values
+    if kontakt:
+        slim['kontakt'] = kontakt
+
+    atributy = typed_attributes(properties)
+    if atributy:
+        slim['atributy'] = atributy
+
+    detail = {}
+    for field, value in properties.items():
+        if (field in slim or field in CORE_FIELDS or field == 'geometry'
+                or field in DROPPED_FIELDS or field in contact_columns
+                or is_empty(value)):
+            continue
+        detail[field] = value
+    slim['detail'] = detail
+
+    return slim
+
+
+def list_view(document):
+    """LIST_PROJECTION applied to an in-memory document"""
+    return {field: document[field] for field in LIST_PROJECTION
+            if field != '_id' and field in document}
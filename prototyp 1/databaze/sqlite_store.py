@@ -0,0 +1,954 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite backend for the places collection
+
+SQLiteCollection is a drop-in for the subset of the pymongo Collection API
+used in this project (find/find_one/count_documents/distinct/aggregate and
+the import-time writes). Documents are stored as JSON; the indexed parts of
+a query are answered by SQLite:
+
+- dp_id equality          -> B-tree index
+- kategorie equality/$in  -> side table with an index
+- source_files equality/$in -> in-memory map built with the document cache
+- $near / $geoWithin      -> R*Tree over the location points
+- $text                   -> FTS5 over nazev + popis
+- atributy.* (typed attributes) -> in-memory bitmaps (bitmaps.py)
+- $or of indexed branches -> union of their candidates (corridor.py)
+
+The remaining conditions are checked in Python on the (already pruned)
+candidates, so the query semantics follow MongoDB for the operators below.
+
+Usage:
+    python sqlite_store.py [path]   # build the database from GeoJSON files
+"""
+import json
+import math
+import re
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from bitmaps import AttributeBitmaps
+from geojson_loader import load_directory
+from related import attach_precomputed
+from versions import assign_versions, next_version
+from telemetry import span
+
+DEFAULT_PATH = Path(__file__).parent / 'places.sqlite'
+
+# Earth radius used by MongoDB for 2dsphere distances
+EARTH_RADIUS_M = 6378100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    id INTEGER PRIMARY KEY,
+    dp_id TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS places_dp_id ON places (dp_id);
+CREATE TABLE IF NOT EXISTS place_kategorie (
+    place_id INTEGER NOT NULL,
+    kategorie TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS place_kategorie_idx ON place_kategorie (kategorie, place_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree (
+    id, min_x, max_x, min_y, max_y
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5 (
+    nazev, popis, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+class OperationFailure(Exception):
+    """Query that the SQLite backend cannot execute (mirrors pymongo.errors.OperationFailure)"""
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+# ---------------------------------------------------------------------------
+# Geometry helpers
+# ---------------------------------------------------------------------------
+
+def iter_coordinates(geometry):
+    """All [lon, lat] positions of a GeoJSON geometry"""
+    if not isinstance(geometry, dict):
+        return
+
+    def walk(coords):
+        if not isinstance(coords, list) or not coords:
+            return
+        if isinstance(coords[0], (int, float)):
+            yield coords[0], coords[1]
+        else:
+            for item in coords:
+                yield from walk(item)
+
+    if geometry.get('type') == 'GeometryCollection':
+        for part in geometry.get('geometries', []):
+            yield from iter_coordinates(part)
+    else:
+        yield from walk(geometry.get('coordinates'))
+
+
+def bounding_box(geometry):
+    """(min_x, max_x, min_y, max_y) of a geometry or None"""
+    coords = list(iter_coordinates(geometry))
+    if not coords:
+        return None
+    xs = [c[0] for c in coords]
+    ys = [c[1] for c in coords]
+    return min(xs), max(xs), min(ys), max(ys)
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    """Great-circle distance in meters"""
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geometry_distance_m(geometry, lon, lat):
+    """Distance from a point to the nearest vertex of a geometry (None without coordinates)"""
+    distances = [haversine_m(lon, lat, x, y) for x, y in iter_coordinates(geometry)]
+    return min(distances) if distances else None
+
+
+def circle_bbox(lon, lat, radius_m):
+    """Bounding box (min_x, max_x, min_y, max_y) of a circle around a point"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, dlat / cos_lat)
+    return lon - dlon, lon + dlon, lat - dlat, lat + dlat
+
+
+def _point_in_ring(x, y, ring):
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+def point_in_polygon(x, y, polygon):
+    """Point in a GeoJSON Polygon (list of rings, holes after the shell)"""
+    rings = [[tuple(p[:2]) for p in ring] for ring in polygon]
+    if not rings or not _point_in_ring(x, y, rings[0]):
+        return False
+    return not any(_point_in_ring(x, y, hole) for hole in rings[1:])
+
+
+def _within_shape(shape):
+    """Predicate (x, y) -> bool and bounding box for a $geoWithin argument"""
+    if '$geometry' in shape:
+        geometry = shape['$geometry']
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            raise OperationFailure(f"$geoWithin: unsupported geometry {geometry.get('type')}")
+        return (lambda x, y: any(point_in_polygon(x, y, p) for p in polygons),
+                bounding_box(geometry))
+    if '$centerSphere' in shape:
+        (cx, cy), radians = shape['$centerSphere']
+        radius_m = radians * EARTH_RADIUS_M
+        return (lambda x, y: haversine_m(cx, cy, x, y) <= radius_m,
+                circle_bbox(cx, cy, radius_m))
+    if '$box' in shape:
+        (x1, y1), (x2, y2) = shape['$box']
+        return (lambda x, y: x1 <= x <= x2 and y1 <= y <= y2, (x1, x2, y1, y2))
+    raise OperationFailure(f"$geoWithin: unsupported shape {list(shape)}")
+
+
+def _near_point(arg):
+    """(lon, lat, max_m, min_m) from a $near/$nearSphere argument"""
+    if not isinstance(arg, dict) or '$geometry' not in arg:
+        raise OperationFailure("$near: only the GeoJSON form with $geometry is supported")
+    lon, lat = arg['$geometry']['coordinates'][:2]
+    return lon, lat, arg.get('$maxDistance'), arg.get('$minDistance')
+
+
+# ---------------------------------------------------------------------------
+# Query matching
+# ---------------------------------------------------------------------------
+
+def get_values(doc, path):
+    """Values at a dotted path; arrays of sub-documents are traversed like in MongoDB"""
+    values = [doc]
+    for part in path.split('.'):
+        found = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit():
+                    if int(part) < len(value):
+                        found.append(value[int(part)])
+                else:
+                    found.extend(item[part] for item in value
+                                 if isinstance(item, dict) and part in item)
+        values = found
+    return values
+
+
+def _expand(values):
+    """Values plus elements of array values (MongoDB array matching)"""
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _equals(values, target):
+    if target is None:
+        return not values or any(v is None for v in _expand(values))
+    if isinstance(target, re.Pattern):
+        return any(isinstance(v, str) and target.search(v) for v in _expand(values))
+    return any(v == target for v in _expand(values))
+
+
+def _comparable(a, b):
+    numbers = (int, float)
+    return ((isinstance(a, numbers) and isinstance(b, numbers)
+             and not isinstance(a, bool) and not isinstance(b, bool))
+            or (isinstance(a, str) and isinstance(b, str)))
+
+
+def _compile_regex(pattern, options=''):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = 0
+    for option, flag in (('i', re.IGNORECASE), ('m', re.MULTILINE),
+                         ('s', re.DOTALL), ('x', re.VERBOSE)):
+        if option in (options or ''):
+            flags |= flag
+    return re.compile(pattern, flags)
+
+
+def _match_operator(values, operator, argument, condition):
+    if operator == '$eq':
+        return _equals(values, argument)
+    if operator == '$ne':
+        return not _equals(values, argument)
+    if operator == '$in':
+        return any(_equals(values, item) for item in argument)
+    if operator == '$nin':
+        return not any(_equals(values, item) for item in argument)
+    if operator == '$exists':
+        return bool(values) == bool(argument)
+    if operator in ('$gt', '$gte', '$lt', '$lte'):
+        compare = {
+            '$gt': lambda v: v > argument,
+            '$gte': lambda v: v >= argument,
+            '$lt': lambda v: v < argument,
+            '$lte': lambda v: v <= argument,
+        }[operator]
+        return any(_comparable(v, argument) and compare(v) for v in _expand(values))
+    if operator == '$regex':
+        regex = _compile_regex(argument, condition.get('$options', ''))
+        return any(isinstance(v, str) and regex.search(v) for v in _expand(values))
+    if operator == '$options':
+        return True
+    if operator == '$not':
+        if isinstance(argument, dict):
+            return not _match_condition(values, argument)
+        return not _equals(values, _compile_regex(argument))
+    if operator == '$size':
+        return any(isinstance(v, list) and len(v) == argument for v in values)
+    if operator == '$all':
+        return all(_equals(values, item) for item in argument)
+    if operator == '$elemMatch':
+        return any(isinstance(v, list) and any(
+            matches(item, argument) if isinstance(item, dict) else _match_condition([item], argument)
+            for item in v) for v in values)
+    if operator in ('$near', '$nearSphere'):
+        lon, lat, max_m, min_m = _near_point(argument)
+        distances = [geometry_distance_m(v, lon, lat) for v in values]
+        distances = [d for d in distances if d is not None]
+        if not distances:
+            return False
+        distance = min(distances)
+        return ((max_m is None or distance <= max_m)
+                and (min_m is None or distance >= min_m))
+    if operator == '$geoWithin':
+        inside, _ = _within_shape(argument)
+        return any(
+            isinstance(v, dict) and list(iter_coordinates(v))
+            and all(inside(x, y) for x, y in iter_coordinates(v))
+            for v in values)
+    raise OperationFailure(f"Unsupported query operator {operator}")
+
+
+def _is_operator_condition(condition):
+    return (isinstance(condition, dict) and condition
+            and all(key.startswith('$') for key in condition))
+
+
+def _match_condition(values, condition):
+    if _is_operator_condition(condition):
+        return all(_match_operator(values, op, arg, condition) for op, arg in condition.items())
+    return _equals(values, condition)
+
+
+def matches(doc, query, text_ids=None):
+    """
+    MongoDB query matching for a single document
+
+    Args:
+        doc: Document
+        query: MongoDB filter
+        text_ids: Set of document ids matching the $text part of the query
+    """
+    for key, condition in (query or {}).items():
+        if key == '$and':
+            if not all(matches(doc, sub, text_ids) for sub in condition):
+                return False
+        elif key == '$or':
+            if not any(matches(doc, sub, text_ids) for sub in condition):
+                return False
+        elif key == '$nor':
+            if any(matches(doc, sub, text_ids) for sub in condition):
+                return False
+        elif key == '$text':
+            if text_ids is None or doc.get('_id') not in text_ids:
+                return False
+        elif key == '$comment':
+            continue
+        elif key.startswith('$'):
+            raise OperationFailure(f"Unsupported top-level operator {key}")
+        elif not _match_condition(get_values(doc, key), condition):
+            return False
+    return True
+
+
+def _near_clause(query):
+    """(field, lon, lat, max_m) of the $near condition in a query, if any"""
+    for key, condition in (query or {}).items():
+        if key == '$and':
+            for sub in condition:
+                near = _near_clause(sub)
+                if near:
+                    return near
+        elif _is_operator_condition(condition):
+            for operator in ('$near', '$nearSphere'):
+                if operator in condition:
+                    lon, lat, max_m, _ = _near_point(condition[operator])
+                    return key, lon, lat, max_m
+    return None
+
+
+def _fts_query(search):
+    """FTS5 query for a MongoDB $text $search string (terms are ORed, prefix match)"""
+    terms = re.findall(r'\w+', search or '')
+    return ' OR '.join(f'"{term}"*' for term in terms)
+
+
+# ---------------------------------------------------------------------------
+# Projection, sorting and aggregation helpers
+# ---------------------------------------------------------------------------
+
+def _set_path(target, path, value):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _is_flag(value):
+    return isinstance(value, (bool, int, float))
+
+
+def project(doc, projection):
+    """Apply a MongoDB projection (inclusion, exclusion or computed fields)"""
+    if not projection:
+        return dict(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    include_id = projection.get('_id', 1)
+    fields = {k: v for k, v in projection.items() if k != '_id'}
+    included = [k for k, v in fields.items() if not _is_flag(v) or v]
+
+    if included:
+        result = {}
+        for path in included:
+            if _is_flag(fields[path]):
+                values = get_values(doc, path)
+                if values:
+                    _set_path(result, path, values[0])
+            else:
+                expression = fields[path]
+                # Like MongoDB, a field path to a missing field is left out
+                if isinstance(expression, str) and expression.startswith('$') \
+                        and not get_values(doc, expression[1:]):
+                    continue
+                _set_path(result, path, evaluate(doc, expression))
+    else:
+        result = dict(doc)
+        for path in fields:
+            parts = path.split('.')
+            target = result
+            for part in parts[:-1]:
+                if not isinstance(target.get(part), dict):
+                    break
+                target[part] = dict(target[part])
+                target = target[part]
+            else:
+                target.pop(parts[-1], None)
+
+    if include_id and '_id' in doc:
+        result['_id'] = doc['_id']
+    else:
+        result.pop('_id', None)
+    return result
+
+
+def _sort_key(value):
+    """Ordering across types like MongoDB: null < numbers < strings < objects < arrays"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (5, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, dict):
+        return (3, json.dumps(value, sort_keys=True, ensure_ascii=False))
+    return (4, json.dumps(value, ensure_ascii=False))
+
+
+def sort_documents(docs, sort_spec):
+    """Sort documents by [(field, direction), ...]"""
+    for field, direction in reversed(list(sort_spec)):
+        docs.sort(key=lambda d: _sort_key((get_values(d, field) or [None])[0]),
+                  reverse=direction < 0)
+    return docs
+
+
+def _normalize_sort(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+def _evaluate_operator(doc, operator, args):
+    if operator == '$literal':
+        return args
+    if not isinstance(args, list):
+        args = [args]
+    values = [evaluate(doc, arg) for arg in args]
+    if operator == '$substrCP':
+        text, start, length = values
+        return text[int(start):int(start) + int(length)] if isinstance(text, str) else ''
+    if operator == '$ifNull':
+        return next((v for v in values if v is not None), None)
+    if operator == '$cond':
+        condition, then, otherwise = values
+        return then if condition else otherwise
+    if operator == '$eq':
+        return values[0] == values[1]
+    if operator == '$arrayElemAt':
+        array, index = values
+        try:
+            return array[int(index)]
+        except (IndexError, TypeError):
+            return None
+    if operator == '$size':
+        return len(values[0]) if isinstance(values[0], list) else None
+    raise OperationFailure(f"Unsupported expression operator {operator}")
+
+
+def evaluate(doc, expression):
+    """Evaluate an aggregation expression ('$field', {'$op': ...}, {...}, literal)"""
+    if isinstance(expression, str) and expression.startswith('$'):
+        values = get_values(doc, expression[1:])
+        return values[0] if values else None
+    if isinstance(expression, dict):
+        if len(expression) == 1:
+            (key, value), = expression.items()
+            if key.startswith('$'):
+                return _evaluate_operator(doc, key, value)
+        return {key: evaluate(doc, value) for key, value in expression.items()}
+    if isinstance(expression, list):
+        return [evaluate(doc, item) for item in expression]
+    return expression
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = evaluate(doc, spec['_id'])
+        hashable = json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+        if hashable not in groups:
+            groups[hashable] = ({'_id': key}, [])
+        groups[hashable][1].append(doc)
+
+    results = []
+    for result, members in groups.values():
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (operator, expression), = accumulator.items()
+            values = [evaluate(doc, expression) for doc in members]
+            if operator == '$sum':
+                result[field] = sum(v for v in values if isinstance(v, (int, float)))
+            elif operator == '$avg':
+                numbers = [v for v in values if isinstance(v, (int, float))]
+                result[field] = sum(numbers) / len(numbers) if numbers else None
+            elif operator == '$min':
+                result[field] = min((v for v in values if v is not None), key=_sort_key, default=None)
+            elif operator == '$max':
+                result[field] = max((v for v in values if v is not None), key=_sort_key, default=None)
+            elif operator == '$first':
+                result[field] = values[0] if values else None
+            elif operator == '$push':
+                result[field] = values
+            elif operator == '$addToSet':
+                unique = []
+                for value in values:
+                    if value not in unique:
+                        unique.append(value)
+                result[field] = unique
+            else:
+                raise OperationFailure(f"Unsupported accumulator {operator}")
+        results.append(result)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Collection
+# ---------------------------------------------------------------------------
+
+class SQLiteCursor:
+    """Lazy cursor supporting limit/skip/sort like pymongo.cursor.Cursor"""
+
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._limit = 0
+        self._skip = 0
+        self._sort = None
+
+    def limit(self, limit):
+        self._limit = int(limit)
+        return self
+
+    def skip(self, skip):
+        self._skip = int(skip)
+        return self
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def __iter__(self):
+        limit = self._skip + self._limit if self._limit and not self._sort else 0
+        docs = self._collection._find_documents(self._query, limit)
+        if self._sort:
+            docs = sort_documents(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return iter([project(doc, self._projection) for doc in docs])
+
+
+class SQLiteCollection:
+    """
+    pymongo-compatible collection stored in a SQLite file
+
+    Decoded documents are cached in memory; returned documents are shallow
+    copies and must not be modified in nested fields.
+    """
+
+    GEO_FIELD = 'location'
+
+    def __init__(self, path=DEFAULT_PATH, name='places'):
+        self.path = str(path)
+        self.name = name
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._docs = None
+        self._bitmaps = None
+        self._sources = None
+
+    # -- internal ---------------------------------------------------------
+
+    def _all_documents(self):
+        """All documents in insertion order (decoded once, then cached)"""
+        with self._lock:
+            if self._docs is None:
+                rows = self._conn.execute('SELECT id, doc FROM places ORDER BY id')
+                self._docs = {}
+                for row_id, doc in rows:
+                    document = json.loads(doc)
+                    document['_id'] = row_id
+                    self._docs[row_id] = document
+            return self._docs
+
+    def _attribute_bitmaps(self):
+        """Bitmaps of the typed attributes (built with the document cache)"""
+        with self._lock:
+            if self._bitmaps is None:
+                self._bitmaps = AttributeBitmaps(self._all_documents())
+            return self._bitmaps
+
+    def _source_ids(self):
+        """Source file -> ids of the places that came from it (built with the document cache)"""
+        with self._lock:
+            if self._sources is None:
+                self._sources = {}
+                for row_id, document in self._all_documents().items():
+                    for source_file in document.get('source_files') or [document.get('source_file')]:
+                        if isinstance(source_file, str):
+                            self._sources.setdefault(source_file, set()).add(row_id)
+            return self._sources
+
+    def _ids(self, sql, params=()):
+        with self._lock:
+            return {row[0] for row in self._conn.execute(sql, params)}
+
+    def _candidate_ids(self, query):
+        """Ids allowed by the indexed parts of a query (None = no pruning)"""
+        candidates = None
+
+        def narrow(ids):
+            nonlocal candidates
+            candidates = ids if candidates is None else candidates & ids
+
+        parts = [query]
+        for sub in query.get('$and', []):
+            parts.append(sub)
+
+        for part in parts:
+            for key, condition in part.items():
+                if key == 'dp_id' and isinstance(condition, str):
+                    narrow(self._ids('SELECT id FROM places WHERE dp_id = ?', (condition,)))
+                elif key == 'kategorie':
+                    if isinstance(condition, str):
+                        values = [condition]
+                    elif _is_operator_condition(condition) and set(condition) == {'$in'} \
+                            and all(isinstance(v, str) for v in condition['$in']):
+                        values = condition['$in']
+                    else:
+                        continue
+                    marks = ','.join('?' * len(values))
+                    narrow(self._ids(
+                        f'SELECT place_id FROM place_kategorie WHERE kategorie IN ({marks})', values))
+                elif key == 'source_files':
+                    if isinstance(condition, str):
+                        values = [condition]
+                    elif _is_operator_condition(condition) and set(condition) == {'$in'} \
+                            and all(isinstance(v, str) for v in condition['$in']):
+                        values = condition['$in']
+                    else:
+                        continue
+                    sources = self._source_ids()
+                    narrow(set().union(*(sources.get(value, ()) for value in values)))
+                elif key == self.GEO_FIELD and _is_operator_condition(condition):
+                    box = None
+                    for operator in ('$near', '$nearSphere'):
+                        if operator in condition:
+                            lon, lat, max_m, _ = _near_point(condition[operator])
+                            if max_m is not None:
+                                box = circle_bbox(lon, lat, max_m)
+                    if '$geoWithin' in condition:
+                        box = _within_shape(condition['$geoWithin'])[1]
+                    if box:
+                        narrow(self._ids(
+                            'SELECT id FROM places_rtree '
+                            'WHERE max_x >= ? AND min_x <= ? AND max_y >= ? AND min_y <= ?',
+                            (box[0], box[1], box[2], box[3])))
+
+            # $or narrows when every branch does (corridor search: one R*Tree box per segment)
+            branches = part.get('$or')
+            if isinstance(branches, list) and branches:
+                union = set()
+                for branch in branches:
+                    ids = self._candidate_ids(branch) if isinstance(branch, dict) else None
+                    if ids is None:
+                        break
+                    union |= ids
+                else:
+                    narrow(union)
+
+        attribute_ids = self._attribute_bitmaps().candidate_ids(query)
+        if attribute_ids is not None:
+            narrow(attribute_ids)
+        return candidates
+
+    def _text_ids(self, query):
+        """Ids matching the $text part of a query, ordered by relevance"""
+        text = query.get('$text')
+        if text is None:
+            for sub in query.get('$and', []):
+                text = sub.get('$text') or text
+        if text is None:
+            return None
+        fts = _fts_query(text.get('$search'))
+        if not fts:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT rowid FROM places_fts WHERE places_fts MATCH ? ORDER BY rank', (fts,))
+            return [row[0] for row in rows]
+
+    def _find_documents(self, query, limit=0):
+        """Matching documents (unprojected), $near results sorted by distance"""
+        with span('sqlite.find') as s:
+            result = self._match_documents(query or {}, limit)
+            s.set(returned=len(result))
+            return result
+
+    def _match_documents(self, query, limit):
+        docs = self._all_documents()
+        text_ids = self._text_ids(query)
+        candidates = self._candidate_ids(query)
+
+        text_set = None
+        if text_ids is not None:
+            text_set = set(text_ids)
+            candidates = text_set if candidates is None else candidates & text_set
+            ordered = [i for i in text_ids if i in candidates]
+        elif candidates is not None:
+            ordered = sorted(candidates)
+        else:
+            ordered = list(docs)
+
+        near = _near_clause(query)
+        result = []
+        for i in ordered:
+            if i in docs and matches(docs[i], query, text_set):
+                result.append(docs[i])
+                # Without distance ordering the scan can stop early
+                if limit and not near and len(result) >= limit:
+                    break
+
+        if near:
+            field, lon, lat, _ = near
+            result.sort(key=lambda d: min(
+                (x for x in (geometry_distance_m(v, lon, lat) for v in get_values(d, field))
+                 if x is not None), default=math.inf))
+        return result
+
+    def _index_document(self, row_id, document):
+        kategorie = document.get('kategorie') or []
+        if isinstance(kategorie, str):
+            kategorie = [kategorie]
+        self._conn.executemany(
+            'INSERT INTO place_kategorie (place_id, kategorie) VALUES (?, ?)',
+            [(row_id, k) for k in kategorie if isinstance(k, str)])
+
+        box = bounding_box(document.get(self.GEO_FIELD))
+        if box:
+            self._conn.execute(
+                'INSERT INTO places_rtree (id, min_x, max_x, min_y, max_y) VALUES (?, ?, ?, ?, ?)',
+                (row_id, *box))
+
+        self._conn.execute(
+            'INSERT INTO places_fts (rowid, nazev, popis) VALUES (?, ?, ?)',
+            (row_id, str(document.get('nazev') or ''), str(document.get('popis') or '')))
+
+    # -- pymongo API ------------------------------------------------------
+
+    def find(self, filter=None, projection=None):
+        return SQLiteCursor(self, filter, projection)
+
+    def find_one(self, filter=None, projection=None):
+        for doc in self.find(filter, projection).limit(1):
+            return doc
+        return None
+
+    def count_documents(self, filter):
+        if not filter:
+            return len(self._all_documents())
+        return len(self._find_documents(filter))
+
+    def estimated_document_count(self):
+        return self.count_documents({})
+
+    def distinct(self, key, filter=None):
+        values = []
+        for doc in self._find_documents(filter):
+            for value in _expand(get_values(doc, key)):
+                if not isinstance(value, list) and value not in values:
+                    values.append(value)
+        return values
+
+    def aggregate(self, pipeline):
+        with span('sqlite.aggregate', stages=[next(iter(stage)) for stage in pipeline]):
+            return self._aggregate(pipeline)
+
+    def _aggregate(self, pipeline):
+        docs = None
+        for index, stage in enumerate(pipeline):
+            (operator, spec), = stage.items()
+            if operator == '$geoNear':
+                if index != 0:
+                    raise OperationFailure("$geoNear is only valid as the first stage")
+                docs = self._geo_near(spec)
+                continue
+            if docs is None:
+                if operator == '$match':
+                    following = pipeline[index + 1] if index + 1 < len(pipeline) else {}
+                    docs = self._find_documents(spec, following.get('$limit', 0))
+                    continue
+                docs = list(self._all_documents().values())
+
+            if operator == '$match':
+                docs = [d for d in docs if matches(d, spec)]
+            elif operator == '$project':
+                docs = [project(d, spec) for d in docs]
+            elif operator == '$sort':
+                docs = sort_documents(list(docs), _normalize_sort(spec))
+            elif operator == '$limit':
+                docs = docs[:spec]
+            elif operator == '$skip':
+                docs = docs[spec:]
+            elif operator == '$group':
+                docs = _group(docs, spec)
+            elif operator == '$count':
+                docs = [{spec: len(docs)}]
+            elif operator == '$unwind':
+                path = spec if isinstance(spec, str) else spec['path']
+                field = path[1:]
+                unwound = []
+                for doc in docs:
+                    value = (get_values(doc, field) or [None])[0]
+                    for item in (value if isinstance(value, list) else []):
+                        copy = dict(doc)
+                        _set_path(copy, field, item)
+                        unwound.append(copy)
+                docs = unwound
+            else:
+                raise OperationFailure(f"Unsupported aggregation stage {operator}")
+        return iter(docs if docs is not None else list(self._all_documents().values()))
+
+    def _geo_near(self, spec):
+        """$geoNear stage: documents sorted by distance with distanceField set"""
+        near = spec['near']
+        if isinstance(near, dict):
+            lon, lat = near['coordinates'][:2]
+        else:
+            lon, lat = near[:2]
+        field = spec.get('key', self.GEO_FIELD)
+        condition = {'$geometry': {'type': 'Point', 'coordinates': [lon, lat]}}
+        if spec.get('maxDistance') is not None:
+            condition['$maxDistance'] = spec['maxDistance']
+        if spec.get('minDistance') is not None:
+            condition['$minDistance'] = spec['minDistance']
+
+        query = {'$and': [spec.get('query') or {}, {field: {'$near': condition}}]}
+        results = []
+        for doc in self._find_documents(query):
+            distance = min(d for d in (geometry_distance_m(v, lon, lat)
+                                       for v in get_values(doc, field)) if d is not None)
+            doc = dict(doc)
+            _set_path(doc, spec['distanceField'], distance)
+            results.append(doc)
+        return results
+
+    def insert_many(self, documents):
+        ids = []
+        with self._lock:
+            with self._conn:
+                for document in documents:
+                    document = {k: v for k, v in document.items() if k != '_id'}
+                    cursor = self._conn.execute(
+                        'INSERT INTO places (dp_id, doc) VALUES (?, ?)',
+                        (document.get('dp_id'), json.dumps(document, ensure_ascii=False)))
+                    self._index_document(cursor.lastrowid, document)
+                    ids.append(cursor.lastrowid)
+            self._docs = None
+            self._bitmaps = None
+            self._sources = None
+        return InsertManyResult(ids)
+
+    def insert_one(self, document):
+        return self.insert_many([document]).inserted_ids[0]
+
+    def delete_many(self, filter):
+        ids = [doc['_id'] for doc in self._find_documents(filter)]
+        with self._lock:
+            with self._conn:
+                for table, column in (('places', 'id'), ('place_kategorie', 'place_id'),
+                                      ('places_rtree', 'id'), ('places_fts', 'rowid')):
+                    self._conn.executemany(
+                        f'DELETE FROM {table} WHERE {column} = ?', [(i,) for i in ids])
+            self._docs = None
+            self._bitmaps = None
+            self._sources = None
+        return DeleteResult(len(ids))
+
+    def create_index(self, keys, **kwargs):
+        """Indexes are fixed by the schema; kept for API compatibility"""
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+    def index_information(self):
+        return {
+            '_id_': {'key': [('_id', 1)]},
+            'dp_id_1': {'key': [('dp_id', 1)]},
+            'kategorie_1': {'key': [('kategorie', 1)]},
+            'atributy_bitmaps': {'key': [('atributy', 1)]},
+            f'{self.GEO_FIELD}_rtree': {'key': [(self.GEO_FIELD, '2dsphere')]},
+            'nazev_text_popis_text': {'key': [('nazev', 'text'), ('popis', 'text')]},
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_documents():
+    """Documents of the bundled GeoJSON files with the precomputed related places and one catalogue version"""
+    documents = attach_precomputed(load_directory(with_kategorie=True))
+    assign_versions(documents, {}, next_version())
+    return documents
+
+
+def build_database(path=DEFAULT_PATH):
+    """(Re)build the SQLite database from the bundled GeoJSON files"""
+    collection = SQLiteCollection(path)
+    collection.delete_many({})
+    collection.insert_many(load_documents())
+    return collection
+
+
+def open_database(path=DEFAULT_PATH):
+    """Open the SQLite database, building it first if it is missing or empty"""
+    collection = SQLiteCollection(path)
+    if collection.count_documents({}) == 0:
+        collection.insert_many(load_documents())
+    return collection
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    print(f"Building SQLite database {path}...")
+    collection = build_database(path)
+    print(f"✓ Imported {collection.count_documents({})} documents")
+    collection.close()
+
+
+if __name__ == "__main__":
+    main()
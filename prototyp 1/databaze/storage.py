@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Storage backend selection for the places collection
+
+STORAGE_BACKEND=mongo   MongoDB Atlas (MONGODB_URI, DATABASE_NAME, COLLECTION_NAME)
+STORAGE_BACKEND=sqlite  Embedded SQLite file (SQLITE_PATH, built from GeoJSON on first use)
+
+Both backends return an object with the pymongo Collection API used by the
+chatbot and the API servers, so callers do not care which one is active.
+"""
+import os
+
+from sqlite_store import DEFAULT_PATH, open_database
+from telemetry import mongo_listener
+
+
+class StorageError(Exception):
+    """The configured storage backend is not available"""
+
+
+def get_backend():
+    return os.getenv('STORAGE_BACKEND', 'mongo').strip().lower()
+
+
+def connect(backend=None, timeout_ms=10000):
+    """
+    Connect to the configured storage backend
+
+    Args:
+        backend: 'mongo' or 'sqlite' (default: STORAGE_BACKEND env variable)
+        timeout_ms: MongoDB server selection timeout
+
+    Returns:
+        (client, collection) - client has close()
+
+    Raises:
+        StorageError: Backend is not configured or not reachable
+    """
+    backend = backend or get_backend()
+
+    if backend == 'sqlite':
+        path = os.getenv('SQLITE_PATH') or DEFAULT_PATH
+        try:
+            collection = open_database(path)
+        except Exception as e:
+            raise StorageError(f"SQLite database {path} cannot be opened: {e}") from e
+        return collection, collection
+
+    if backend != 'mongo':
+        raise StorageError(f"Unknown STORAGE_BACKEND '{backend}' (use 'mongo' or 'sqlite')")
+
+    mongodb_uri = os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        raise StorageError("MONGODB_URI not found in .env file")
+
+    from pymongo import MongoClient
+
+    try:
+        # Every command is timed as a 'mongo.<command>' span (telemetry.py).
+        # A bounded pool keeps bursts from exhausting Atlas connections: requests
+        # queue for a free connection and fail after MONGO_WAIT_QUEUE_MS.
+        client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=timeout_ms,
+                             maxPoolSize=int(os.getenv('MONGO_MAX_POOL_SIZE', '20')),
+                             waitQueueTimeoutMS=int(os.getenv('MONGO_WAIT_QUEUE_MS', '2000')),
+                             event_listeners=[mongo_listener()])
+        client.admin.command('ping')
+    except Exception as e:
+        raise StorageError(f"MongoDB connection failed: {e}") from e
+
+    database_name = os.getenv('DATABASE_NAME', 'hackathon_hk')
+    collection_name = os.getenv('COLLECTION_NAME', 'places')
+    return client, client[database_name][collection_name]
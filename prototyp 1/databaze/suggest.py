@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Typo-tolerant autocomplete over place, town and district names
+
+    index = SuggestIndex(documents)
+    index.suggest('zamek opo')     # -> ([{'type': 'place', 'label': 'Zámek Opočno', ...}], None)
+    index.suggest('trutnvo')       # -> ([{'type': 'okres', 'label': 'Trutnov', ...}], 'trutno')
+    index.resolve_area('Trutnova') # -> 'Trutnov'
+
+Names are diacritics-folded (dedup.normalize_name) and indexed twice:
+
+- prefix index: every folded name and every suffix of it that starts at a
+  word ('zamek opocno', 'opocno') in one sorted array - a flattened trie.
+  A prefix is a bisect range; ranges too long to scan per keystroke
+  (short prefixes) have their top entries precomputed at build time.
+- trigram index over the word vocabulary: a word that is neither known nor
+  a prefix of a known word is replaced by the closest vocabulary word
+  (edit distance 1-2, ties broken by frequency), then the prefix index is
+  asked again.
+
+Towns and districts rank above places (by their number of places), whole
+names above matches inside a name. The same index resolves misspelt
+region / text arguments from the chatbot before they reach the database.
+"""
+import heapq
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from dedup import normalize_name
+
+# Most suggestions one request can ask for
+MAX_LIMIT = 20
+DEFAULT_LIMIT = 8
+
+# Longer prefix ranges use the top entries precomputed at build time
+SCAN_LIMIT = 256
+
+# Words shorter than this are not corrected (too many neighbours)
+MIN_FUZZY_LENGTH = 3
+
+# Vocabulary words compared exactly after the trigram filter
+FUZZY_CANDIDATES = 24
+TRIGRAMS_PER_EDIT = 4
+
+# Whole-name matches rank above matches starting inside the name
+FULL_NAME_BONUS = 1e6
+
+# Upper bound for folded keys (they only contain [a-z0-9 ])
+_KEY_END = '\x7f'
+
+
+def fold(text):
+    """Lowercase ASCII words of a text ('Zámek  Opočno!' -> 'zamek opocno')"""
+    return normalize_name(text)
+
+
+def _alignment_rows(a, b, limit):
+    """
+    Rows of the optimal string alignment table of a (rows) against b
+
+    Only the diagonal band |i - j| <= limit is computed (cells outside it
+    are above limit anyway) and the rows stop once a whole row exceeds limit.
+    """
+    over = limit + 1
+    previous2, previous = None, [j if j <= limit else over for j in range(len(b) + 1)]
+    yield previous
+    for i, char_a in enumerate(a, 1):
+        current = [i if i <= limit else over] + [over] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            char_b = b[j - 1]
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = min(value, over)
+        if min(current) > limit:
+            return
+        yield current
+        previous2, previous = previous, current
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance of a and b, or limit + 1 when it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    rows = 0
+    for rows, row in enumerate(_alignment_rows(a, b, limit)):
+        pass
+    return min(row[-1], limit + 1) if rows == len(a) else limit + 1
+
+
+def closest_prefix(word, candidate, limit):
+    """
+    Beginning of candidate closest to word ('trutnvo', 'trutnova' -> (1, 'trutno'))
+
+    Returns:
+        (distance, prefix) - the shortest prefix at the smallest distance;
+        distance is limit + 1 when no prefix is within limit
+    """
+    best, length = limit + 1, 0
+    for i, row in enumerate(_alignment_rows(candidate[:len(word) + limit], word, limit)):
+        if row[-1] < best:
+            best, length = row[-1], i
+    return best, candidate[:length]
+
+
+def _trigrams(word):
+    padded = f" {word}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _surface_words(text):
+    """(folded word, original word) pairs of a name"""
+    pairs = []
+    for word in re.findall(r'\w+', text or ''):
+        folded = fold(word)
+        if folded and ' ' not in folded:
+            pairs.append((folded, word))
+    return pairs
+
+
+class Vocabulary:
+    """Folded words with their frequency and a trigram index for spelling correction"""
+
+    def __init__(self, frequency):
+        self.frequency = dict(frequency)
+        self.words = sorted(self.frequency)
+        self._trigram_words = defaultdict(list)
+        for word_id, word in enumerate(self.words):
+            for trigram in _trigrams(word):
+                self._trigram_words[trigram].append(word_id)
+
+    def is_known(self, word, prefix=False):
+        """Word is in the vocabulary (prefix: some vocabulary word starts with it)"""
+        if not prefix:
+            return word in self.frequency
+        position = bisect_left(self.words, word)
+        return position < len(self.words) and self.words[position].startswith(word)
+
+    def correct(self, word, prefix=False):
+        """
+        Closest vocabulary word of a misspelt folded word
+
+        Args:
+            prefix: The word is still being typed - compare it with the
+                    beginnings of the vocabulary words
+
+        Returns:
+            The corrected word, or None when the word is known or nothing is close
+        """
+        if len(word) < MIN_FUZZY_LENGTH or self.is_known(word, prefix):
+            return None
+
+        trigrams = _trigrams(word)
+        overlap = Counter()
+        for trigram in trigrams:
+            overlap.update(self._trigram_words.get(trigram, ()))
+        limit = 1 if len(word) <= 5 else 2
+
+        best = None
+        for word_id, shared in overlap.most_common(FUZZY_CANDIDATES):
+            # One edit (or swap) breaks at most four trigrams - fewer shared ones cannot beat the best
+            if shared < len(trigrams) - TRIGRAMS_PER_EDIT * (best[0] if best else limit):
+                break
+            candidate = self.words[word_id]
+            if len(candidate) < len(word) - limit or (not prefix and len(candidate) > len(word) + limit):
+                continue
+            if prefix:
+                # The word is completed again from the prefix index - keep only the matching beginning
+                distance, replacement = closest_prefix(word, candidate, limit)
+            else:
+                distance, replacement = edit_distance(word, candidate, limit), candidate
+            rank = (distance, -self.frequency[candidate], replacement)
+            if distance <= limit and (best is None or rank < best):
+                best = rank
+        return best[2] if best else None
+
+    def correct_text(self, folded, typing=False):
+        """
+        Folded text with misspelt words replaced, or None when nothing changed
+
+        Args:
+            typing: The last word is still being typed
+        """
+        words = folded.split()
+        fixed = [self.correct(word, prefix=typing and i == len(words) - 1) or word
+                 for i, word in enumerate(words)]
+        return ' '.join(fixed) if fixed != words else None
+
+
+class SuggestIndex:
+    """Immutable autocomplete index built from place documents"""
+
+    def __init__(self, documents):
+        self.entries = []
+        self._folded = []  # folded name of each entry
+        self._weights = []
+        self._by_kind = defaultdict(dict)  # kind -> folded name -> entry id
+
+        towns = Counter()
+        districts = Counter()
+        places = []
+        for document in documents:
+            okres = document.get('nazev_okresu')
+            obec = document.get('nazev_obce')
+            if okres:
+                districts[okres] += 1
+            if obec:
+                towns[(obec, okres)] += 1
+            if document.get('nazev'):
+                places.append(document)
+
+        for okres, count in districts.items():
+            self._add({'type': 'okres', 'label': okres, 'count': count}, count)
+        for (obec, okres), count in towns.items():
+            self._add({'type': 'obec', 'label': obec, 'okres': okres, 'count': count}, count)
+        for document in places:
+            nazev = document['nazev']
+            self._add({'type': 'place', 'label': nazev, 'dp_id': document.get('dp_id'),
+                       'obec': document.get('nazev_obce')},
+                      1.0 - min(len(nazev), 200) / 1000)
+
+        self._build_prefix_index()
+        self._build_vocabulary()
+
+    def _add(self, entry, weight):
+        folded = fold(entry['label'])
+        if not folded:
+            return
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        self._folded.append(folded)
+        self._weights.append(weight)
+        self._by_kind[entry['type']].setdefault(folded, entry_id)
+
+    # Prefix index
+
+    def _build_prefix_index(self):
+        keyed = []
+        for entry_id, folded in enumerate(self._folded):
+            weight = self._weights[entry_id]
+            words = folded.split()
+            for start in range(len(words)):
+                score = weight + (FULL_NAME_BONUS if start == 0 else 0.0)
+                keyed.append((' '.join(words[start:]), -score, entry_id))
+        keyed.sort()
+        self._keys = [key for key, _, _ in keyed]
+        self._scores = [-score for _, score, _ in keyed]
+        self._key_entries = [entry_id for _, _, entry_id in keyed]
+
+        # Top entries of every prefix whose range is too long to scan per request
+        self._top = {}
+        pending = [('', 0, len(self._keys))]
+        while pending:
+            prefix, lo, hi = pending.pop()
+            if hi - lo <= SCAN_LIMIT:
+                continue
+            if prefix:
+                self._top[prefix] = self._rank(lo, hi, MAX_LIMIT)
+            depth = len(prefix)
+            i = lo
+            while i < hi:
+                if len(self._keys[i]) <= depth:
+                    i += 1
+                    continue
+                child = self._keys[i][:depth + 1]
+                j = bisect_left(self._keys, child + _KEY_END, i, hi)
+                pending.append((child, i, j))
+                i = j
+
+    def _rank(self, lo, hi, limit):
+        """Entry ids of a key range, best score first (each entry once)"""
+        best = {}
+        for position in range(lo, hi):
+            entry_id = self._key_entries[position]
+            score = self._scores[position]
+            if score > best.get(entry_id, -1.0):
+                best[entry_id] = score
+        return [entry_id for entry_id, _ in heapq.nlargest(limit, best.items(), key=lambda item: item[1])]
+
+    def _lookup(self, prefix, limit):
+        if not prefix:
+            return []
+        top = self._top.get(prefix)
+        if top is not None:
+            return top[:limit]
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + _KEY_END, lo)
+        return self._rank(lo, hi, limit)
+
+    # Spelling correction
+
+    def _build_vocabulary(self):
+        words = Counter()
+        area_words = Counter()
+        surfaces = defaultdict(Counter)
+        for entry in self.entries:
+            for folded, original in _surface_words(entry['label']):
+                words[folded] += 1
+                surfaces[folded][original] += 1
+                if entry['type'] != 'place':
+                    area_words[folded] += 1
+        self.words = Vocabulary(words)
+        self.area_words = Vocabulary(area_words)  # region arguments are corrected only to town/district words
+        self._surface = {word: forms.most_common(1)[0][0] for word, forms in surfaces.items()}
+
+    # Public API
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """
+        Ranked completions of a partially typed name
+
+        Returns:
+            (suggestions, corrected) - corrected is the folded query after
+            spelling correction when it was needed, otherwise None
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        folded = fold(query)
+        if not folded:
+            return [], None
+
+        ids = self._lookup(folded, limit)
+        corrected = None
+        if len(ids) < limit:
+            # The last word is still being typed unless the query ends with a space
+            corrected = self.words.correct_text(folded, typing=not query.endswith(' '))
+            if corrected:
+                seen = set(ids)
+                ids += [entry_id for entry_id in self._lookup(corrected, limit) if entry_id not in seen]
+        return [self.entries[entry_id] for entry_id in ids[:limit]], corrected
+
+    def resolve_area(self, text):
+        """
+        District or town name for a region argument that would match nothing
+
+        'Trutnov' and 'Hradec' stay as they are (they are part of a name),
+        'Jicin' becomes 'Jičín', 'Trutnova' becomes 'Trutnov'.
+
+        Returns:
+            The replacement name, or None when the text is fine or unknown
+        """
+        if not isinstance(text, str) or not text.strip():
+            return None
+        needle = text.strip().lower()
+        areas = [self.entries[entry_id] for kind in ('okres', 'obec')
+                 for entry_id in self._by_kind[kind].values()]
+        if any(needle in area['label'].lower() for area in areas):
+            return None
+
+        folded = fold(text)
+        # Inflected forms ('Trutnova', 'Náchodě') are a small edit away from the name
+        candidates = [text for text in (folded, self.area_words.correct_text(folded),
+                                        self.area_words.correct_text(folded, typing=True)) if text]
+        for candidate in candidates:
+            for kind in ('okres', 'obec'):
+                entry_id = self._by_kind[kind].get(candidate)
+                if entry_id is not None:
+                    return self.entries[entry_id]['label']
+        # A word taken for another one ('Trutnova' in 'Olešnice u Trutnova')
+        nearest = self._nearest_area(folded)
+        if nearest is not None:
+            return nearest
+        for candidate in candidates:
+            for entry_id in self._lookup(candidate, MAX_LIMIT):
+                if self.entries[entry_id]['type'] in ('okres', 'obec'):
+                    return self.entries[entry_id]['label']
+        return None
+
+    def _nearest_area(self, folded):
+        """Label of the district or town within a small edit distance of the whole text"""
+        limit = 1 if len(folded) <= 5 else 2
+        best = None
+        for kind in ('okres', 'obec'):
+            for key, entry_id in self._by_kind[kind].items():
+                if abs(len(key) - len(folded)) > limit:
+                    continue
+                distance = edit_distance(folded, key, limit)
+                rank = (distance, -self.entries[entry_id]['count'], key, entry_id)
+                if distance <= limit and (best is None or rank < best):
+                    best = rank
+        return self.entries[best[3]]['label'] if best else None
+
+    def resolve_text(self, text):
+        """
+        Search text with misspelt words replaced by known ones (with diacritics)
+
+        Returns:
+            The corrected text, or None when every word is known
+        """
+        if not isinstance(text, str):
+            return None
+        changed = False
+        words = []
+        for word in re.findall(r'\w+', text):
+            folded = fold(word)
+            replacement = self.words.correct(folded) if folded and ' ' not in folded else None
+            if replacement:
+                words.append(self._surface.get(replacement, replacement))
+                changed = True
+            else:
+                words.append(word)
+        return ' '.join(words) if changed else None
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Tracing spans and latency metrics for the chatbot and the API servers
+
+    with span('llm.generate') as s:
+        response = chat.send_message(...)
+        s.set(prompt_tokens=...)
+
+Every finished span is recorded in a latency histogram under its name
+(count, mean, p50/p95/p99, max), linked to its parent span and, when
+TRACE_LOG is set, written as one JSON line to that file. Counters track
+token counts and cache hits; 'x.hit' / 'x.miss' pairs are reported as hit
+rates. snapshot() is what the API servers return from /metrics.
+
+MongoDB commands are timed with pymongo command monitoring
+(mongo_listener()), the SQLite backend records its own spans.
+"""
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per histogram for the percentiles
+RESERVOIR_SIZE = 2048
+
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Latency samples in milliseconds (last RESERVOIR_SIZE samples for the percentiles)"""
+
+    def __init__(self, size=RESERVOIR_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        ordered = sorted(self.samples)
+        summary = {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+        }
+        for p in PERCENTILES:
+            summary[f'p{p}_ms'] = round(percentile(ordered, p), 3)
+        return summary
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of sorted values"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Metrics:
+    """Thread-safe registry of histograms and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+
+    def observe(self, name, value_ms):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value_ms)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            histograms = {name: h.snapshot() for name, h in sorted(self.histograms.items())}
+            counters = dict(sorted(self.counters.items()))
+
+        hit_rates = {}
+        for name, hits in counters.items():
+            if name.endswith('.hit'):
+                prefix = name[:-len('.hit')]
+                total = hits + counters.get(prefix + '.miss', 0)
+                hit_rates[prefix] = round(hits / total, 4) if total else 0.0
+
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'latency': histograms,
+            'counters': counters,
+            'hit_rates': hit_rates,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+
+class Span:
+    """One timed operation of a trace"""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self.duration_ms = None
+        self.attributes = dict(attributes or {})
+        self.children = []
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def breakdown(self):
+        """Total milliseconds per span name over all descendants"""
+        totals = {}
+        stack = list(self.children)
+        while stack:
+            child = stack.pop()
+            totals[child.name] = totals.get(child.name, 0.0) + (child.duration_ms or 0.0)
+            stack.extend(child.children)
+        return totals
+
+    def to_dict(self):
+        record = {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration_ms': round(self.duration_ms or 0.0, 3),
+        }
+        record.update(self.attributes)
+        return record
+
+
+class JsonLogSink:
+    """Appends finished spans as JSON lines to a file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+metrics = Metrics()
+_sinks = []
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def add_sink(sink):
+    """Register a sink with a write(record) method"""
+    _sinks.append(sink)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def _finish(span):
+    if span.parent is not None:
+        span.parent.children.append(span)
+    metrics.observe(span.name, span.duration_ms)
+    if 'error' in span.attributes:
+        metrics.increment(f'{span.name}.errors')
+    if _sinks:
+        record = span.to_dict()
+        for sink in _sinks:
+            try:
+                sink.write(record)
+            except OSError:
+                pass
+
+
+def start_span(name, **attributes):
+    """Open a span as the current one; close it with end_span (for request hooks)"""
+    s = Span(name, _current_span.get(), attributes)
+    s._token = _current_span.set(s)
+    s._started = time.perf_counter()
+    return s
+
+
+def end_span(s, **attributes):
+    s.set(**attributes)
+    s.duration_ms = (time.perf_counter() - s._started) * 1000
+    try:
+        _current_span.reset(s._token)
+    except ValueError:
+        # Closed from another context - just drop it as the current span
+        _current_span.set(s.parent)
+    _finish(s)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the current span"""
+    s = start_span(name, **attributes)
+    try:
+        yield s
+    except Exception as e:
+        s.set(error=f'{type(e).__name__}: {e}')
+        raise
+    finally:
+        end_span(s)
+
+
+def record(name, duration_ms, **attributes):
+    """Record an operation timed elsewhere (e.g. by a driver) as a finished span"""
+    s = Span(name, _current_span.get(), attributes)
+    s.start -= duration_ms / 1000
+    s.duration_ms = duration_ms
+    _finish(s)
+    return s
+
+
+def snapshot():
+    return metrics.snapshot()
+
+
+def instrument_flask(app):
+    """Time every request as an 'http.<endpoint>' span and serve GET /metrics"""
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def _start_request_span():
+        g.telemetry_span = start_span(f'http.{request.endpoint or "unknown"}',
+                                      method=request.method, path=request.path)
+
+    @app.after_request
+    def _record_status(response):
+        s = g.get('telemetry_span')
+        if s is not None:
+            s.set(status=response.status_code)
+            metrics.increment(f'http.status.{response.status_code // 100}xx')
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        s = g.pop('telemetry_span', None)
+        if s is not None:
+            end_span(s, **({'error': str(exc)} if exc else {}))
+
+    app.add_url_rule('/metrics', 'metrics', lambda: jsonify(snapshot()))
+    return app
+
+
+def mongo_listener():
+    """pymongo CommandListener that records every command as a 'mongo.<command>' span"""
+    from pymongo import monitoring
+
+    class MongoCommandListener(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            record(f'mongo.{event.command_name}', event.duration_micros / 1000,
+                   database=event.database_name)
+
+        def failed(self, event):
+            record(f'mongo.{event.command_name}', event.duration_micros / 1000,
+                   database=event.database_name, error=str(event.failure))
+
+    return MongoCommandListener()
+
+
+if os.getenv('TRACE_LOG'):
+    add_sink(JsonLogSink(os.getenv('TRACE_LOG')))
@@ -7,6 +7,8 @@ from pymongo import MongoClient
 from dotenv import load_dotenv
 from collections import Counter
 
+from geometry import geometry_report, print_report
+
 # Load environment variables
 load_dotenv()
 
@@ -21,37 +23,19 @@ def test_connection(client):
         return False
 
 def analyze_geometry_types(collection):
-    """Analyze geometry types in the database"""
-    print("\n" + "=" * 60)
-    print("GEOMETRY TYPE ANALYSIS")
-    print("=" * 60)
-    
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$geometry.type",
-                "count": {"$sum": 1}
-            }
-        },
-        {"$sort": {"count": -1}}
-    ]
-    
-    results = list(collection.aggregate(pipeline))
-    
-    print("\nGeometry types in database:")
-    for result in results:
-        geom_type = result['_id']
-        count = result['count']
-        print(f"  {geom_type}: {count} documents")
-    
-    # Check for polygons
-    polygon_count = sum(r['count'] for r in results if 'Polygon' in str(r['_id']))
-    if polygon_count > 0:
-        print(f"\n⚠ WARNING: Found {polygon_count} polygon documents!")
+    """Validate stored geometries and check that every place has a point location"""
+    documents = collection.find({}, {'_id': 0, 'dp_id': 1, 'source_file': 1, 'geometry': 1})
+    report = geometry_report(documents)
+    print_report(report)
+
+    # Spatial index works on 'location' only - it has to be a Point everywhere
+    not_points = collection.count_documents({'location.type': {'$ne': 'Point'}})
+    if not_points:
+        print(f"\n⚠ WARNING: {not_points} documents without a point location!")
     else:
-        print("\n✓ No polygon geometries found")
-    
-    return results
+        print("\n✓ All documents have a point location")
+
+    return report
 
 def analyze_source_files(collection):
     """Analyze distribution by source file"""
@@ -90,7 +74,7 @@ def check_required_fields(collection):
     print(f"\nTotal documents: {total_docs}")
     
     # Check for required fields
-    fields_to_check = ['geometry', 'nazev', 'dp_id', 'source_file', 'popis']
+    fields_to_check = ['location', 'geometry', 'nazev', 'dp_id', 'source_file', 'popis']
     
     print("\nField presence:")
     for field in fields_to_check:
@@ -102,9 +86,9 @@ def check_required_fields(collection):
     # Check for documents with missing coordinates
     missing_coords = collection.count_documents({
         "$or": [
-            {"geometry": {"$exists": False}},
-            {"geometry.coordinates": {"$exists": False}},
-            {"geometry.coordinates": None}
+            {"location": {"$exists": False}},
+            {"location.coordinates": {"$exists": False}},
+            {"location.coordinates": None}
         ]
     })
     
@@ -123,10 +107,10 @@ def test_queries(collection):
     
     # Test 1: Find by dp_id
     print("\n1. Query by dp_id (HKFP1):")
-    doc = collection.find_one({"dp_id": "HKFP1"})
+    doc = collection.find_one({"dp_id": "HKFP1"}, {"nazev": 1, "location": 1})
     if doc:
         print(f"   ✓ Found: {doc.get('nazev', 'N/A')}")
-        print(f"     Location: {doc.get('geometry', {}).get('coordinates', 'N/A')}")
+        print(f"     Location: {doc.get('location', {}).get('coordinates', 'N/A')}")
     else:
         print("   ✗ Not found")
     
@@ -144,7 +128,7 @@ def test_queries(collection):
     print("\n3. Geospatial query (near Hradec Králové):")
     # Hradec Králové approximate coordinates: [15.8333, 50.2097]
     results = list(collection.find({
-        "geometry": {
+        "location": {
             "$near": {
                 "$geometry": {
                     "type": "Point",
@@ -153,7 +137,7 @@ def test_queries(collection):
                 "$maxDistance": 5000  # 5km
             }
         }
-    }).limit(5))
+    }, {"nazev": 1, "source_file": 1}).limit(5))
     print(f"   Found {len(results)} places within 5km:")
     for doc in results:
         print(f"   - {doc.get('nazev', 'N/A')} ({doc.get('source_file', 'N/A')})")
@@ -161,7 +145,7 @@ def test_queries(collection):
     # Test 4: Count by region
     print("\n4. Count by region:")
     pipeline = [
-        {"$group": {"_id": "$region", "count": {"$sum": 1}}},
+        {"$group": {"_id": "$nazev_okresu", "count": {"$sum": 1}}},
         {"$sort": {"count": -1}},
         {"$limit": 5}
     ]
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Request coalescing and rate limiting in front of Gemini and the database
+
+SingleFlight   concurrent identical requests share one computation
+               (a burst of '/api/places?limit=1000' is one query)
+TokenBucket    rate + burst; callers either shed (try_acquire) or queue
+               for a bounded time (acquire)
+upstream(name) process-wide bucket per upstream service, configured with
+               RATE_LIMIT_<NAME>='<per second>:<burst>' ('0' = unlimited)
+limit_clients  per-client limit of a Flask app (API_RATE_LIMIT / API_RATE_BURST,
+               off by default), excess requests get 429 with Retry-After; the
+               client is the remote address (X-Forwarded-For only behind
+               TRUSTED_PROXY_HOPS proxies)
+
+Counters: 'singleflight.shared', 'ratelimit.<name>.shed' / '.queued'.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from telemetry import metrics
+
+# Gemini free tier is ~15 requests/min; Atlas shared tiers cope with tens of ops/s
+DEFAULT_UPSTREAM_LIMITS = {
+    'gemini': '0.25:4',
+    'atlas': '50:100',
+}
+
+# How long a caller may wait for an upstream token before the request is shed
+DEFAULT_QUEUE_TIMEOUT_S = 10.0
+
+# Idle per-client buckets kept in memory
+MAX_CLIENTS = 10000
+
+
+class RateLimited(Exception):
+    """No token became available in time"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Rate limit '{name}' exceeded, retry in {retry_after:.1f} s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, at most burst tokens"""
+
+    def __init__(self, rate, burst, name='bucket'):
+        self.rate = float(rate)
+        self.burst = float(max(burst, 1))
+        self.name = name
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """Take tokens if available; otherwise seconds until they will be"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting (shed when empty)"""
+        if self.reserve(tokens) == 0.0:
+            return True
+        metrics.increment(f'ratelimit.{self.name}.shed')
+        return False
+
+    def acquire(self, timeout=DEFAULT_QUEUE_TIMEOUT_S, tokens=1):
+        """
+        Wait up to timeout seconds for tokens
+
+        Raises:
+            RateLimited: Tokens would not be available within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        queued = False
+        while True:
+            wait = self.reserve(tokens)
+            if wait == 0.0:
+                return
+            if time.monotonic() + wait > deadline:
+                metrics.increment(f'ratelimit.{self.name}.shed')
+                raise RateLimited(self.name, wait)
+            if not queued:
+                metrics.increment(f'ratelimit.{self.name}.queued')
+                queued = True
+            time.sleep(wait)
+
+
+class UnlimitedBucket:
+    """Bucket that never limits (RATE_LIMIT_<NAME>=0)"""
+
+    def reserve(self, tokens=1):
+        return 0.0
+
+    def try_acquire(self, tokens=1):
+        return True
+
+    def acquire(self, timeout=DEFAULT_QUEUE_TIMEOUT_S, tokens=1):
+        return
+
+
+def parse_limit(value):
+    """'<rate>:<burst>' -> (rate, burst); '0' or '' -> None (unlimited)"""
+    if not value or value.strip() in ('0', 'off'):
+        return None
+    rate, _, burst = value.partition(':')
+    rate = float(rate)
+    return rate, float(burst) if burst else max(rate, 1.0)
+
+
+def make_bucket(name, value):
+    limit = parse_limit(value)
+    return TokenBucket(*limit, name=name) if limit else UnlimitedBucket()
+
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def upstream(name):
+    """Process-wide bucket of an upstream service ('gemini', 'atlas', ...)"""
+    with _upstreams_lock:
+        bucket = _upstreams.get(name)
+        if bucket is None:
+            value = os.getenv(f'RATE_LIMIT_{name.upper()}', DEFAULT_UPSTREAM_LIMITS.get(name, '0'))
+            bucket = _upstreams[name] = make_bucket(name, value)
+        return bucket
+
+
+class SingleFlight:
+    """Concurrent calls with the same key run the function once and share its result"""
+
+    def __init__(self, name='singleflight'):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Run function() or wait for the identical call already in flight
+
+        Returns:
+            (result, shared) - shared is True for callers that only waited
+        Raises:
+            Whatever the leading call raised
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            metrics.increment(f'{self.name}.shared')
+            return future.result(), True
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class ClientRateLimiter:
+    """Token bucket per client id; the least recently seen clients are forgotten"""
+
+    def __init__(self, rate, burst, max_clients=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(self, client):
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, name='client')
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client)
+        return bucket.reserve()
+
+
+def limit_clients(app, exempt=('/metrics', '/api/health')):
+    """
+    Per-client rate limit of a Flask app
+
+    API_RATE_LIMIT requests per second (default 0 = off) with API_RATE_BURST
+    burst. The client is the remote address. Any caller can send
+    X-Forwarded-For, so it is used only behind a reverse proxy:
+    TRUSTED_PROXY_HOPS=N takes the address that the N-th proxy from the
+    server saw (ProxyFix). Without it every client behind a proxy would share
+    the proxy's bucket - a limited app that sees X-Forwarded-For with
+    TRUSTED_PROXY_HOPS=0 warns once.
+    RateLimited raised by a view (an upstream is saturated) becomes 503.
+    """
+    from flask import jsonify, request
+
+    hops = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+    if hops > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops)
+
+    @app.errorhandler(RateLimited)
+    def _upstream_busy(e):
+        response = jsonify({'error': 'Service busy', 'message': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, round(e.retry_after)))
+        return response
+
+    limit = parse_limit(os.getenv('API_RATE_LIMIT', '0'))
+    if limit is None:
+        return app
+    rate, burst = limit
+    limiter = ClientRateLimiter(rate, float(os.getenv('API_RATE_BURST', burst * 2)))
+    proxy_warned = threading.Event()
+
+    @app.before_request
+    def _limit_client():
+        if request.path in exempt:
+            return None
+        if hops == 0 and 'X-Forwarded-For' in request.headers and not proxy_warned.is_set():
+            proxy_warned.set()
+            print("⚠️  X-Forwarded-For seen with TRUSTED_PROXY_HOPS=0 - "
+                  "all clients behind the proxy share one API_RATE_LIMIT bucket")
+        wait = limiter.reserve(request.remote_addr or 'unknown')
+        if wait == 0.0:
+            return None
+        metrics.increment('ratelimit.client.shed')
+        response = jsonify({'error': 'Too many requests', 'retry_after': round(wait, 1)})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, round(wait)))
+        return response
+
+    return app
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Catalogue versions for delta sync (GET /api/changes?since=<version>)
+
+    previous = stored_versions(collection)     # before the import replaces the places
+    assign_versions(documents, previous, version)
+
+Every import gets a new catalogue version, an increasing integer, and each
+place document carries
+
+    version        catalogue version in which the place last changed
+    content_hash   hash of its content (without the derived 'related' lists)
+
+A place whose hash did not change keeps its version, so a client that
+synced at version N downloads only the places with version > N. Places an
+import removed become tombstones ({'dp_id', 'version'}) that tell the
+client what to delete.
+
+- MongoDB: the current version is the META_COLLECTION document
+  {'_id': 'catalogue', 'version': N} (a counter bumped by each import),
+  tombstones are in TOMBSTONE_COLLECTION.
+- SQLite is always rebuilt whole: one version per build, no tombstones.
+- The local API server: every gunicorn worker loads the GeoJSON files
+  itself, so the versions are shared through a state file (STATE_PATH,
+  shared_versions). The first process that loads a directory signature
+  computes the versions from the previous state and writes them, the
+  others (and recycled or restarted workers) read the same numbers.
+  Versions are timestamps, so they keep increasing even without the file.
+
+A client whose version is unknown (0, from before a restart, or newer than
+the server's) gets the full catalogue with 'full': true.
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows - only the single-process development server
+    fcntl = None
+
+# Fields that are not part of the place content
+HASH_EXCLUDED = {'_id', 'version', 'content_hash', 'related'}
+
+META_COLLECTION = 'catalogue_meta'
+META_ID = 'catalogue'
+TOMBSTONE_COLLECTION = 'places_deleted'
+
+VERSION_PROJECTION = {'_id': 0, 'dp_id': 1, 'version': 1, 'content_hash': 1}
+
+# Versions of the local catalogue shared by the API server processes
+STATE_PATH = Path(os.getenv('CATALOGUE_STATE_PATH', Path(__file__).parent / 'catalogue_state.json'))
+
+
+def content_hash(document):
+    """Stable hash of a place document (key order and version fields do not matter)"""
+    content = {key: value for key, value in document.items() if key not in HASH_EXCLUDED}
+    serialized = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def next_version(current=0):
+    """Timestamp version, increasing even when two builds fall into the same second"""
+    return max(current + 1, int(time.time()))
+
+
+def version_map(documents, previous, version):
+    """
+    Version of every place after an import
+
+    Args:
+        documents: New place documents
+        previous: dp_id -> (content_hash, version) of the replaced catalogue
+        version: Version of this import
+
+    Returns:
+        dp_id -> (content_hash, version) - unchanged places keep their version
+    """
+    versions = {}
+    for document in documents:
+        dp_id = document.get('dp_id')
+        if not dp_id:
+            continue
+        digest = content_hash(document)
+        old_hash, old_version = previous.get(dp_id, (None, None))
+        versions[dp_id] = (digest, old_version if old_hash == digest and old_version else version)
+    return versions
+
+
+def assign_versions(documents, previous, version):
+    """
+    Store version and content_hash in the documents themselves
+
+    Returns:
+        Number of new or changed places
+    """
+    versions = version_map(documents, previous, version)
+    for document in documents:
+        if document.get('dp_id') in versions:
+            document['content_hash'], document['version'] = versions[document['dp_id']]
+    return sum(1 for _, place_version in versions.values() if place_version == version)
+
+
+def tombstones_after(previous_tombstones, previous_ids, current_ids, version):
+    """Tombstones after an import: removed places added, re-added places dropped"""
+    tombstones = {dp_id: deleted_at for dp_id, deleted_at in previous_tombstones.items()
+                  if dp_id not in current_ids}
+    tombstones.update({dp_id: version for dp_id in previous_ids if dp_id not in current_ids})
+    return tombstones
+
+
+def stored_versions(collection):
+    """dp_id -> (content_hash, version) of the places in a MongoDB collection"""
+    return {document['dp_id']: (document.get('content_hash'), document.get('version'))
+            for document in collection.find({}, VERSION_PROJECTION) if document.get('dp_id')}
+
+
+def current_version(meta):
+    """Current catalogue version (0 = catalogue imported without versions)"""
+    document = meta.find_one({'_id': META_ID})
+    return document.get('version', 0) if document else 0
+
+
+def record_import(database, version, deleted_ids, current_ids):
+    """Write the tombstones of an import and publish its version (last, once the places are in)"""
+    tombstones = database[TOMBSTONE_COLLECTION]
+    if current_ids:
+        tombstones.delete_many({'dp_id': {'$in': list(current_ids)}})
+    if deleted_ids:
+        tombstones.insert_many([{'dp_id': dp_id, 'version': version} for dp_id in deleted_ids])
+    tombstones.create_index('version')
+    database[META_COLLECTION].update_one({'_id': META_ID}, {'$set': {'version': version}}, upsert=True)
+
+
+def signature_key(signature):
+    """Short stable key of a directory signature (file_watcher.directory_signature)"""
+    return hashlib.sha1(json.dumps([list(entry) for entry in signature]).encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _locked(path):
+    """Exclusive lock of the state file across processes (no-op without fcntl)"""
+    with open(f"{path}.lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    state['versions'] = {dp_id: tuple(entry) for dp_id, entry in state.get('versions', {}).items()}
+    return state
+
+
+def _write_state(path, state):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(temporary, path)  # readers never see a half-written file
+
+
+def next_state(documents, previous=None, key=None):
+    """
+    Versions of a catalogue after the previous one
+
+    Returns:
+        {'key', 'version', 'base_version', 'versions': dp_id -> (content_hash, version),
+         'tombstones': dp_id -> version} - base_version is the oldest version
+        deltas can be computed from
+    """
+    previous = previous or {}
+    version = next_version(previous.get('version', 0))
+    versions = version_map(documents, previous.get('versions', {}), version)
+    return {
+        'key': key,
+        'version': version,
+        'base_version': previous.get('base_version', version),
+        'versions': versions,
+        'tombstones': tombstones_after(previous.get('tombstones', {}), previous.get('versions', {}),
+                                       versions, version),
+    }
+
+
+def shared_versions(documents, signature, path=STATE_PATH):
+    """
+    Versions of a local catalogue, the same in every process that loads the same files
+
+    Args:
+        documents: Place documents read from the directory
+        signature: Directory signature taken before reading the files
+        path: State file (None = only in memory, no history)
+
+    Returns:
+        State as returned by next_state()
+    """
+    if path is None or signature is None:
+        return next_state(documents)
+    key = signature_key(signature)
+    try:
+        with _locked(path):
+            state = _read_state(path)
+            if state and state.get('key') == key:
+                return state
+            state = next_state(documents, state, key)
+            _write_state(path, state)
+            return state
+    except OSError as e:
+        print(f"⚠️  Catalogue state {path} not shared: {e}")
+        return next_state(documents, key=key)